@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs, Diode - SDK - Parallel builder benchmark."""
+import argparse
+import functools
+import os
+import time
+
+from netboxlabs.diode.sdk.ingester import Interface
+from netboxlabs.diode.sdk.parallel import ParallelBuilder, _build_chunk, _init_worker
+
+_build_interfaces = functools.partial(Interface.from_records, as_entities=True)
+
+
+def _chunks(rows: int, chunk_size: int) -> list[list[dict]]:
+    """Return chunks of rows interfaces, 48 per device, the devices spread over 10 sites."""
+    records = [
+        {"name": f"eth{i % 48}", "device": f"Device {i // 48}", "site": f"Site {i // 48 % 10}", "mtu": 1500}
+        for i in range(rows)
+    ]
+    return [records[i:i + chunk_size] for i in range(0, rows, chunk_size)]
+
+
+def main():
+    """Print the number of entities built and serialized per second, in the calling process and by worker pools."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000, help="entities built")
+    parser.add_argument("--chunk-size", type=int, default=5_000, help="rows per chunk")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count(), help="largest worker pool")
+    args = parser.parse_args()
+
+    chunks = _chunks(args.rows, args.chunk_size)
+    _init_worker(_build_interfaces)
+    start = time.perf_counter()
+    for chunk in chunks:
+        _build_chunk(chunk)
+    print(f"{'in process':<12} {args.rows / (time.perf_counter() - start):>12,.0f} entities/s")
+
+    workers = 1
+    while workers <= args.max_workers:
+        with ParallelBuilder(_build_interfaces, max_workers=workers) as builder:
+            # Start the workers before timing
+            list(builder.map(chunks[:workers]))
+            start = time.perf_counter()
+            for _ in builder.map(chunks):
+                pass
+            elapsed = time.perf_counter() - start
+        print(f"{f'{workers} workers':<12} {args.rows / elapsed:>12,.0f} entities/s")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs, Diode - SDK - Sentry overhead benchmark."""
+import argparse
+import functools
+import statistics
+import time
+from concurrent import futures
+from unittest import mock
+
+import grpc
+import sentry_sdk
+from sentry_sdk.transport import Transport
+
+from netboxlabs.diode.sdk import DiodeClient, TraceSampler
+from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+from netboxlabs.diode.sdk.ingester import Device, Entity
+
+_DSN = "https://public@sentry.invalid/1"
+
+
+class _NullTransport(Transport):
+    """Sentry transport dropping envelopes, so that only the SDK overhead is measured."""
+
+    def capture_envelope(self, envelope):
+        pass
+
+
+def _start_server() -> tuple[grpc.Server, int]:
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    handler = grpc.unary_unary_rpc_method_handler(
+        lambda request, context: ingester_pb2.IngestResponse(),
+        request_deserializer=ingester_pb2.IngestRequest.FromString,
+        response_serializer=ingester_pb2.IngestResponse.SerializeToString,
+    )
+    server.add_generic_rpc_handlers(
+        (grpc.method_handlers_generic_handler("diode.v1.IngesterService", {"Ingest": handler}),)
+    )
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    return server, port
+
+
+def _measure(target: str, entities: list[Entity], ingests: int, **kwargs) -> list[float]:
+    """Return the duration of each ingest, in seconds."""
+    with mock.patch("sentry_sdk.init", functools.partial(sentry_sdk.init, transport=_NullTransport)):
+        client = DiodeClient(target=target, app_name="benchmark", app_version="0.0.1", api_key="abcde", **kwargs)
+    durations = []
+    with client:
+        client.ingest(entities)
+        for _ in range(ingests):
+            start = time.perf_counter()
+            client.ingest(entities)
+            durations.append(time.perf_counter() - start)
+    sentry_sdk.init()
+    return durations
+
+
+def main():
+    """Print the time per ingest with Sentry off, with the default sampling and tracing every ingest."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--rounds", type=int, default=10, help="rounds, each measuring every mode in turn")
+    parser.add_argument("--ingests", type=int, default=500, help="ingests per mode and round")
+    parser.add_argument("--entities", type=int, default=100, help="entities per ingest")
+    args = parser.parse_args()
+
+    entities = [Entity(device=Device(name=f"Device {i}", site="Site A")) for i in range(args.entities)]
+    server, port = _start_server()
+    target = f"grpc://127.0.0.1:{port}"
+    modes = {
+        "sentry off": {},
+        "sampled (default)": {"sentry_dsn": _DSN},
+        "traced at 100%": {
+            "sentry_dsn": _DSN,
+            "sentry_trace_sampler": TraceSampler(sample_rate=1.0, max_traces_per_second=1e9),
+        },
+    }
+    durations = {mode: [] for mode in modes}
+    try:
+        # Modes are measured in turn within each round so that drift affects them alike
+        for _ in range(args.rounds):
+            for mode, kwargs in modes.items():
+                durations[mode].extend(_measure(target, entities, args.ingests, **kwargs))
+    finally:
+        server.stop(None)
+
+    baseline = statistics.median(durations["sentry off"]) * 1e6
+    for mode in modes:
+        median = statistics.median(durations[mode]) * 1e6
+        print(f"{mode:>20}: {median:8.1f} us per ingest, overhead {median - baseline:+7.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs, Diode - SDK - Message wrappers benchmark."""
+import argparse
+import timeit
+
+from netboxlabs.diode.sdk.ingester import Device, Entity, Interface, IPAddress
+
+_CASES = {
+    "Device": lambda: Device(
+        name="Device A",
+        device_type="Device Type A",
+        role="Role ABC",
+        platform="Platform A",
+        serial="123456",
+        site="Site ABC",
+        status="active",
+        tags=["tag 1", "tag 2"],
+        manufacturer="Cisco",
+    ),
+    "Interface": lambda: Interface(
+        name="Interface A",
+        device="Device A",
+        device_type="Device Type A",
+        role="Role ABC",
+        platform="Platform A",
+        manufacturer="Cisco",
+        site="Site ABC",
+        type="1000base-t",
+        enabled=True,
+        mtu=1500,
+        tags=["tag 1", "tag 2"],
+    ),
+    "IPAddress": lambda: IPAddress(
+        address="192.168.0.1/24",
+        interface="Interface A",
+        device="Device A",
+        device_type="Device Type A",
+        device_role="Role ABC",
+        platform="Platform A",
+        manufacturer="Cisco",
+        site="Site ABC",
+        status="active",
+        tags=["tag 1", "tag 2"],
+    ),
+    "Entity": lambda: Entity(device="Device A"),
+}
+
+
+def _interface_columns(rows: int) -> dict[str, list]:
+    """Return the columns of rows interfaces, 48 per device, the devices spread over 10 sites and 3 manufacturers."""
+    return {
+        "name": [f"eth{i % 48}" for i in range(rows)],
+        "device": [f"Device {i // 48}" for i in range(rows)],
+        "device_type": [f"Device Type {i // 48 % 20}" for i in range(rows)],
+        "manufacturer": [f"Manufacturer {i // 48 % 3}" for i in range(rows)],
+        "site": [f"Site {i // 48 % 10}" for i in range(rows)],
+        "role": ["access"] * rows,
+        "mtu": [1500] * rows,
+    }
+
+
+def main():
+    """Print the number of messages built per second by the wrappers."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    # Many short rounds, the fastest being reported, are less sensitive to noise than a few long ones
+    parser.add_argument("--number", type=int, default=2_000, help="messages built per round")
+    parser.add_argument("--rounds", type=int, default=50, help="rounds, the fastest being reported")
+    args = parser.parse_args()
+
+    for name, build in _CASES.items():
+        seconds = min(timeit.repeat(build, number=args.number, repeat=args.rounds))
+        print(f"{name:<10} {args.number / seconds:>12,.0f} entities/s")
+
+    columns = _interface_columns(args.number)
+    rows = [dict(zip(columns, row)) for row in zip(*columns.values())]
+    bulk = {
+        "Entity(interface=Interface(...)) per row": lambda: [Entity(interface=Interface(**row)) for row in rows],
+        "Interface.from_columns(as_entities=True)": lambda: Interface.from_columns(columns, as_entities=True),
+    }
+    for name, build in bulk.items():
+        seconds = min(timeit.repeat(build, number=1, repeat=args.rounds))
+        print(f"{name:<42} {args.number / seconds:>12,.0f} entities/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,42 @@
 #!/usr/bin/env python
 # Copyright 2024 NetBox Labs Inc
 """NetBox Labs, Diode - SDK."""
+import importlib
 
-from netboxlabs.diode.sdk.client import DiodeClient
+# Public names are imported from their module on first access, so that importing the package stays cheap
+_LAZY_IMPORTS = {
+    "AdaptiveCompression": "netboxlabs.diode.sdk.compression",
+    "AdaptiveConcurrencyLimiter": "netboxlabs.diode.sdk.limiter",
+    "AsyncDiodeClient": "netboxlabs.diode.sdk.aio",
+    "AsyncTimingInterceptor": "netboxlabs.diode.sdk.interceptors",
+    "ChannelRegistry": "netboxlabs.diode.sdk.registry",
+    "CircuitBreaker": "netboxlabs.diode.sdk.breaker",
+    "ClientMetrics": "netboxlabs.diode.sdk.metrics",
+    "DiodeBatcher": "netboxlabs.diode.sdk.batcher",
+    "DiodeClient": "netboxlabs.diode.sdk.client",
+    "FingerprintCache": "netboxlabs.diode.sdk.fingerprint",
+    "ParallelBuilder": "netboxlabs.diode.sdk.parallel",
+    "PrometheusExporter": "netboxlabs.diode.sdk.metrics",
+    "RetryPolicy": "netboxlabs.diode.sdk.retry",
+    "Spool": "netboxlabs.diode.sdk.spool",
+    "serialize_entities": "netboxlabs.diode.sdk.wire",
+    "TimingInterceptor": "netboxlabs.diode.sdk.interceptors",
+    "TraceSampler": "netboxlabs.diode.sdk.tracing",
+}
 
-assert DiodeClient
+__all__ = sorted(_LAZY_IMPORTS)
+
+
+def __getattr__(name: str):
+    """Import public names lazily."""
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    """List module attributes, including lazily imported names."""
+    return sorted(set(globals()) | set(__all__))
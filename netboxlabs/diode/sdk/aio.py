@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs, Diode - SDK - asyncio Client."""
+import asyncio
+import collections
+import itertools
+import logging
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+
+import grpc
+
+from netboxlabs.diode.sdk.breaker import CircuitBreaker
+from netboxlabs.diode.sdk.client import (
+    _DEFAULT_MAX_REQUEST_SIZE,
+    _DEFAULT_STREAM,
+    _BaseDiodeClient,
+    _entity_field_size,
+    _ssl_channel_credentials,
+)
+from netboxlabs.diode.sdk.compression import AdaptiveCompression
+from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+from netboxlabs.diode.sdk.exceptions import DiodeClientError, DiodeConnectionError
+from netboxlabs.diode.sdk.fingerprint import FingerprintCache
+from netboxlabs.diode.sdk.ingester import Entity
+from netboxlabs.diode.sdk.interceptors import _QUEUED_AT, _IngesterServiceStub
+from netboxlabs.diode.sdk.metrics import ClientMetrics
+from netboxlabs.diode.sdk.retry import RetryPolicy
+from netboxlabs.diode.sdk.tracing import TraceSampler
+from netboxlabs.diode.sdk.wire import BytesLike, _entity_frames
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AsyncDiodeClient(_BaseDiodeClient):
+    """
+    Diode asyncio Client.
+
+    Same as DiodeClient, but built on grpc.aio so that ingest() does not block the event loop. The client should be
+    created and used from within a running event loop. With warm_up, the connection is established when entering the
+    client context, see connect(). interceptors are grpc.aio client interceptors, such as an AsyncTimingInterceptor.
+
+    """
+
+    def __init__(
+        self,
+        target: str,
+        app_name: str,
+        app_version: str,
+        api_key: str | None = None,
+        sentry_dsn: str = None,
+        sentry_traces_sample_rate: float = 0.01,
+        sentry_profiles_sample_rate: float = 0.0,
+        retry_policy: RetryPolicy | None = None,
+        compression: grpc.Compression | AdaptiveCompression | None = None,
+        wait_for_ready: bool | None = None,
+        warm_up: bool = False,
+        connect_timeout: float | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        metrics: ClientMetrics | None = None,
+        interceptors: Iterable[grpc.aio.ClientInterceptor] | None = None,
+        sentry_trace_sampler: TraceSampler | None = None,
+        deterministic_request_ids: bool = False,
+        acked_request_cache_size: int = 1024,
+        fingerprint_cache: FingerprintCache | None = None,
+        compression_sample_interval: int = 0,
+        acked_request_ttl: float = 60.0,
+    ):
+        """Initiate a new client."""
+        self._configure(target, app_name, app_version, api_key, compression, compression_sample_interval)
+        self._retry_policy = retry_policy
+        self._breaker = circuit_breaker
+        self._metrics = metrics
+        self._configure_request_ids(deterministic_request_ids, acked_request_cache_size, acked_request_ttl)
+        self._fingerprints = fingerprint_cache
+        self._wait_for_ready = wait_for_ready
+        self._warm_up = warm_up
+        self._connect_timeout = connect_timeout
+
+        channel_opts = self._channel_options()
+
+        interceptors = list(interceptors or [])
+        if self._path:
+            _LOGGER.debug(f"Setting up gRPC interceptor for path: {self._path}")
+            interceptors.append(DiodeMethodAsyncClientInterceptor(subpath=self._path))
+
+        if self._tls_verify:
+            _LOGGER.debug("Setting up gRPC secure channel")
+            self._channel = grpc.aio.secure_channel(
+                self._target,
+                _ssl_channel_credentials(),
+                options=channel_opts,
+                compression=self._channel_compression(),
+                interceptors=interceptors or None,
+            )
+        else:
+            _LOGGER.debug("Setting up gRPC insecure channel")
+            self._channel = grpc.aio.insecure_channel(
+                target=self._target,
+                options=channel_opts,
+                compression=self._channel_compression(),
+                interceptors=interceptors or None,
+            )
+
+        self._stub = _IngesterServiceStub(self._channel)
+
+        self._configure_sentry(
+            sentry_dsn, sentry_traces_sample_rate, sentry_profiles_sample_rate, sentry_trace_sampler
+        )
+
+    @property
+    def channel(self) -> grpc.aio.Channel:
+        """Retrieve the channel."""
+        return self._channel
+
+    async def connect(self, timeout: float | None = None) -> float:
+        """
+        Establish the connection of the channel ahead of the first call.
+
+        Returns the connection setup time in seconds, also available from connect_time. Raises DiodeConnectionError
+        if the channel is not ready within timeout seconds.
+
+        """
+        _LOGGER.debug(f"Connecting to {self._target}")
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._channel.channel_ready(), timeout)
+        except asyncio.TimeoutError as err:
+            raise DiodeConnectionError(f"connection to {self._target} not ready after {timeout}s") from err
+
+        self._connect_time = time.perf_counter() - start
+        _LOGGER.debug(f"Connected to {self._target} in {self._connect_time:.3f}s")
+        return self._connect_time
+
+    async def __aenter__(self):
+        """Enters the runtime context related to the channel object, closing the client if warming up fails."""
+        if self._warm_up:
+            try:
+                await self.connect(timeout=self._connect_timeout)
+            except BaseException:
+                await self.close()
+                raise
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        """Exits the runtime context related to the channel object."""
+        await self.close()
+
+    async def close(self):
+        """Close the channel, saving the fingerprint cache, if any."""
+        if self._fingerprints is not None:
+            self._fingerprints.save()
+        await self._channel.close()
+
+    async def ingest(
+        self,
+        entities: Iterable[Entity | ingester_pb2.Entity | None] | AsyncIterable[Entity | ingester_pb2.Entity | None],
+        stream: str | None = _DEFAULT_STREAM,
+        max_request_size: int | None = None,
+        compression: grpc.Compression | None = None,
+    ) -> ingester_pb2.IngestResponse:
+        """
+        Ingest entities.
+
+        Entities can be provided as an iterable or an async iterable. See DiodeClient.ingest() for max_request_size
+        and compression.
+
+        """
+        if isinstance(entities, AsyncIterable):
+            entities = [entity async for entity in entities]
+
+        entities, fingerprints = self._changed_entities(entities)
+        if fingerprints is not None and not entities:
+            return ingester_pb2.IngestResponse()
+
+        try:
+            with self._trace_ingest():
+                if max_request_size is None:
+                    response = await self._ingest(self._build_request(entities, stream), compression)
+                else:
+                    errors = []
+                    for chunk in self._chunk_entities(entities, stream, max_request_size):
+                        response = await self._ingest(self._build_request(chunk, stream), compression)
+                        errors.extend(response.errors)
+                    response = ingester_pb2.IngestResponse(errors=errors)
+        except DiodeClientError:
+            raise
+        except grpc.RpcError as err:
+            raise DiodeClientError(err) from err
+        self._record_fingerprints(fingerprints, response)
+        return response
+
+    async def ingest_stream(
+        self,
+        entities: Iterable[Entity | ingester_pb2.Entity | None] | AsyncIterable[Entity | ingester_pb2.Entity | None],
+        stream: str | None = _DEFAULT_STREAM,
+        max_request_size: int = _DEFAULT_MAX_REQUEST_SIZE,
+        max_request_entities: int | None = None,
+        max_pending: int = 1,
+        compression: grpc.Compression | None = None,
+    ) -> ingester_pb2.IngestResponse:
+        """
+        Ingest entities pulled lazily from an iterable or an async iterable, see DiodeClient.ingest_stream().
+
+        With max_pending above 1, requests are sent concurrently from tasks.
+
+        """
+        if max_pending < 1:
+            raise ValueError("max_pending should be at least 1")
+        chunks = self._chunk_entities_async(entities, stream, max_request_size, max_request_entities)
+        errors = []
+        pending = collections.deque()
+        try:
+            async for chunk in chunks:
+                if len(pending) == max_pending:
+                    errors.extend((await pending.popleft()).errors)
+                pending.append(asyncio.ensure_future(self.ingest(chunk, stream, compression=compression)))
+            while pending:
+                errors.extend((await pending.popleft()).errors)
+        finally:
+            for task in pending:
+                task.cancel()
+        return ingester_pb2.IngestResponse(errors=errors)
+
+    async def _chunk_entities_async(
+        self,
+        entities: Iterable[Entity | ingester_pb2.Entity | None] | AsyncIterable[Entity | ingester_pb2.Entity | None],
+        stream: str | None,
+        max_request_size: int,
+        max_entities: int | None = None,
+    ) -> AsyncIterator[list[ingester_pb2.Entity]]:
+        """Split entities, consumed lazily, into chunks fitting into requests, see _chunk_entities()."""
+        if not isinstance(entities, AsyncIterable):
+            for chunk in self._chunk_entities(entities, stream, max_request_size, max_entities):
+                yield chunk
+            return
+
+        chunker = self._chunker(stream, max_request_size, max_entities)
+        async for entity in entities:
+            if entity is not None:
+                chunk = chunker.add(entity, _entity_field_size(entity.ByteSize()))
+                if chunk is not None:
+                    yield chunk
+        chunk = chunker.flush()
+        if chunk is not None:
+            yield chunk
+
+    async def ingest_serialized(
+        self,
+        entities: BytesLike | Iterable[BytesLike],
+        stream: str | None = _DEFAULT_STREAM,
+        max_request_size: int | None = None,
+        compression: grpc.Compression | None = None,
+    ) -> ingester_pb2.IngestResponse:
+        """Ingest serialized entities, see DiodeClient.ingest_serialized()."""
+        frames = _entity_frames(entities, split=max_request_size is not None)
+        try:
+            with self._trace_ingest():
+                if max_request_size is None:
+                    return await self._ingest(self._build_serialized_request(frames, stream), compression)
+                errors = []
+                for chunk in self._chunk_frames(frames, stream, max_request_size):
+                    response = await self._ingest(self._build_serialized_request(chunk, stream), compression)
+                    errors.extend(response.errors)
+                return ingester_pb2.IngestResponse(errors=errors)
+        except DiodeClientError:
+            raise
+        except grpc.RpcError as err:
+            raise DiodeClientError(err) from err
+
+    async def _ingest(
+        self, request: ingester_pb2.IngestRequest, compression: grpc.Compression | None = None
+    ) -> ingester_pb2.IngestResponse:
+        """Send an ingest request, retrying according to the retry policy, unless it was acknowledged recently."""
+        response = self._acked_response(request)
+        if response is not None:
+            return response
+
+        if self._retry_policy is None:
+            response = await self._send(request, compression=compression)
+        else:
+            attempts = itertools.count()
+
+            async def attempt(timeout: float | None) -> ingester_pb2.IngestResponse:
+                if next(attempts):
+                    self._record_retry()
+                return await self._send(request, timeout, compression)
+
+            response = await self._retry_policy.call_async(attempt)
+        self._remember_ack(request, response)
+        return response
+
+    async def _send(
+        self,
+        request: ingester_pb2.IngestRequest,
+        timeout: float | None = None,
+        compression: grpc.Compression | None = None,
+    ) -> ingester_pb2.IngestResponse:
+        """Send an ingest request."""
+        _QUEUED_AT.set(time.perf_counter())
+        request_size = request.ByteSize()
+        compression = self._call_compression(request_size, compression)
+        permit = self._allow_call()
+        self._call_started()
+        start = time.perf_counter()
+        try:
+            response = await self._stub.Ingest(
+                request,
+                metadata=self._metadata,
+                timeout=timeout,
+                compression=compression,
+                wait_for_ready=self._wait_for_ready,
+            )
+        except BaseException as err:
+            self._call_finished(time.perf_counter() - start, request_size, err)
+            self._record_outcome(permit, err)
+            raise
+        elapsed = time.perf_counter() - start
+        self._call_finished(elapsed, request_size)
+        self._record_outcome(permit)
+        self._record_call(request, request_size, compression, elapsed)
+        return response
+
+
+class DiodeMethodAsyncClientInterceptor(
+    grpc.aio.UnaryUnaryClientInterceptor, grpc.aio.StreamUnaryClientInterceptor
+):
+    """
+    Diode Method asyncio Client Interceptor class.
+
+    The grpc.aio counterpart of DiodeMethodClientInterceptor, prepending the generated method name with the path
+    extracted from initial target.
+
+    """
+
+    def __init__(self, subpath):
+        """Initiate a new interceptor."""
+        self._subpath = subpath
+
+    def _call_details(self, client_call_details):
+        """Return call details with the method prefixed by the subpath."""
+        method = client_call_details.method
+        if isinstance(method, bytes):
+            method = self._subpath.encode() + method
+        elif method is not None:
+            method = f"{self._subpath}{method}"
+
+        return grpc.aio.ClientCallDetails(
+            method,
+            client_call_details.timeout,
+            client_call_details.metadata,
+            client_call_details.credentials,
+            client_call_details.wait_for_ready,
+        )
+
+    async def intercept_unary_unary(self, continuation, client_call_details, request):
+        """Intercept unary unary."""
+        return await continuation(self._call_details(client_call_details), request)
+
+    async def intercept_stream_unary(
+        self, continuation, client_call_details, request_iterator
+    ):
+        """Intercept stream unary."""
+        return await continuation(self._call_details(client_call_details), request_iterator)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs, Diode - SDK - Batcher."""
+import collections
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+
+from netboxlabs.diode.sdk.client import _DEFAULT_STREAM, DiodeClient, _entity_field_size
+from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+from netboxlabs.diode.sdk.exceptions import DiodeClientError
+from netboxlabs.diode.sdk.ingester import Entity
+
+_DEFAULT_MAX_BATCH_SIZE = 1000
+_DEFAULT_MAX_BATCH_BYTES = 3 * 1024 * 1024
+_DEFAULT_MAX_LINGER = 1.0
+_DEFAULT_MAX_QUEUE_BYTES = 64 * 1024 * 1024
+_LOGGER = logging.getLogger(__name__)
+
+
+class DiodeBatcher:
+    """
+    Diode Batcher.
+
+    Collects single entities on a thread-safe queue and ingests them in batches from a background thread. A batch is
+    flushed as soon as it reaches max_batch_size entities or max_batch_bytes serialized bytes, or when its oldest
+    entity has been queued for max_linger seconds.
+
+    Queued and in-flight entities are capped at max_queue_bytes serialized bytes. When the cap is reached, put()
+    blocks until a batch has been sent, or raises queue.Full if called with block=False or its timeout expires.
+
+    """
+
+    def __init__(
+        self,
+        client: DiodeClient,
+        stream: str | None = _DEFAULT_STREAM,
+        max_batch_size: int = _DEFAULT_MAX_BATCH_SIZE,
+        max_batch_bytes: int = _DEFAULT_MAX_BATCH_BYTES,
+        max_linger: float = _DEFAULT_MAX_LINGER,
+        max_queue_bytes: int = _DEFAULT_MAX_QUEUE_BYTES,
+        on_response: Callable[[list[ingester_pb2.Entity], ingester_pb2.IngestResponse], None] | None = None,
+        on_error: Callable[[list[ingester_pb2.Entity], DiodeClientError], None] | None = None,
+    ):
+        """Initiate a new batcher and start its background thread."""
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size should be a positive number")
+        if max_batch_bytes <= 0 or max_queue_bytes <= 0:
+            raise ValueError("max_batch_bytes and max_queue_bytes should be a positive number of bytes")
+
+        self._client = client
+        self._stream = stream
+        self._max_batch_size = max_batch_size
+        self._max_batch_bytes = max_batch_bytes
+        self._max_linger = max_linger
+        self._max_queue_bytes = max_queue_bytes
+        self._on_response = on_response
+        self._on_error = on_error
+
+        self._cond = threading.Condition()
+        self._queue = collections.deque()
+        self._queued_bytes = 0
+        self._pending_bytes = 0
+        self._sending = False
+        self._flushing = 0
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name="diode-batcher", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending_bytes(self) -> int:
+        """Retrieve the serialized size of queued and in-flight entities."""
+        return self._pending_bytes
+
+    @property
+    def closed(self) -> bool:
+        """Retrieve whether the batcher is closed."""
+        return self._closed
+
+    def __enter__(self):
+        """Enters the runtime context related to the batcher object."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        """Exits the runtime context related to the batcher object."""
+        self.close()
+
+    def put(
+        self,
+        entity: Entity | ingester_pb2.Entity,
+        block: bool = True,
+        timeout: float | None = None,
+    ):
+        """Queue an entity for ingestion."""
+        size = _entity_field_size(entity.ByteSize())
+        if size > self._max_queue_bytes:
+            raise ValueError(f"entity of {size} bytes exceeds max_queue_bytes")
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("batcher is closed")
+                if self._pending_bytes + size <= self._max_queue_bytes:
+                    break
+                if not block:
+                    raise queue.Full
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Full
+                self._cond.wait(remaining)
+
+            self._queue.append((entity, size, time.monotonic()))
+            self._queued_bytes += size
+            self._pending_bytes += size
+            # Wake up the background thread to start the linger timer, or when a full batch is ready
+            if (
+                len(self._queue) == 1
+                or len(self._queue) >= self._max_batch_size
+                or self._queued_bytes >= self._max_batch_bytes
+            ):
+                self._cond.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Send all queued entities and wait until they are ingested, returns False if timeout expired."""
+        with self._cond:
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(lambda: not self._queue and not self._sending, timeout)
+            finally:
+                self._flushing -= 1
+
+    def close(self, timeout: float | None = None):
+        """Flush queued entities and stop the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self):
+        """Background thread loop."""
+        while True:
+            with self._cond:
+                while not self._batch_ready():
+                    self._cond.wait(self._linger_remaining())
+                if not self._queue:
+                    return
+                batch, batch_bytes = self._pop_batch()
+                self._sending = True
+
+            try:
+                self._send(batch)
+            except Exception:
+                _LOGGER.exception(f"Unexpected error while sending batch of {len(batch)} entities")
+            finally:
+                with self._cond:
+                    self._sending = False
+                    self._pending_bytes -= batch_bytes
+                    self._cond.notify_all()
+
+    def _batch_ready(self) -> bool:
+        """Check whether a batch should be sent, or the loop should stop."""
+        if not self._queue:
+            return self._closed
+        return (
+            self._closed
+            or self._flushing > 0
+            or len(self._queue) >= self._max_batch_size
+            or self._queued_bytes >= self._max_batch_bytes
+            or self._linger_remaining() <= 0
+        )
+
+    def _linger_remaining(self) -> float | None:
+        """Seconds until the oldest queued entity reaches max_linger."""
+        if not self._queue:
+            return None
+        return self._queue[0][2] + self._max_linger - time.monotonic()
+
+    def _pop_batch(self) -> tuple[list[ingester_pb2.Entity], int]:
+        """Pop the next batch off the queue."""
+        batch = []
+        batch_bytes = 0
+        while self._queue and len(batch) < self._max_batch_size:
+            entity, size, _ = self._queue[0]
+            if batch and batch_bytes + size > self._max_batch_bytes:
+                break
+            self._queue.popleft()
+            batch.append(entity)
+            batch_bytes += size
+        self._queued_bytes -= batch_bytes
+        return batch, batch_bytes
+
+    def _send(self, batch: list[ingester_pb2.Entity]):
+        """Ingest a batch and report its outcome."""
+        try:
+            response = self._client.ingest(entities=batch, stream=self._stream)
+        except DiodeClientError as err:
+            if self._on_error is None:
+                _LOGGER.error(f"Failed to ingest batch of {len(batch)} entities: {err!r}")
+            else:
+                self._on_error(batch, err)
+            return
+
+        if self._on_response is not None:
+            self._on_response(batch, response)
+        elif response.errors:
+            _LOGGER.warning(f"Batch of {len(batch)} entities ingested with errors: {list(response.errors)}")
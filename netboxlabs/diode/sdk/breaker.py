@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs, Diode - SDK - Circuit breaker."""
+import collections
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterable
+
+import grpc
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+DEFAULT_FAILURE_STATUS_CODES = frozenset(
+    {
+        grpc.StatusCode.UNAVAILABLE,
+        grpc.StatusCode.DEADLINE_EXCEEDED,
+    }
+)
+_LOGGER = logging.getLogger(__name__)
+
+# Permit of an allowed call: generation numbers the states the breaker went through, probe tells a half-open probe call
+_Permit = collections.namedtuple("_Permit", ("generation", "probe"))
+
+
+class CircuitBreaker:
+    """
+    Circuit Breaker class.
+
+    While closed, calls are allowed and their outcomes recorded in a rolling window of the last window_size calls.
+    Once the window holds at least minimum_calls calls and the rate of calls failing with one of failure_status_codes
+    reaches failure_rate_threshold, the breaker opens: calls are rejected without being sent. After open_duration
+    seconds, the breaker is half-open and lets up to half_open_max_calls probe calls through: the breaker closes
+    once they all succeeded, and opens again as soon as one fails.
+
+    allow() returns a permit to record the outcome of the call with. Outcomes of calls allowed before the last state
+    change are ignored, so that a call sent while closed and completing once half-open is not taken for a probe.
+
+    Calls failing with other status codes reached the server and count as successes. on_state_change is called with
+    the previous and new states on each transition, from the thread recording the call outcome.
+
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        minimum_calls: int = 10,
+        window_size: int = 50,
+        open_duration: float = 30.0,
+        half_open_max_calls: int = 1,
+        failure_status_codes: Iterable[grpc.StatusCode] = DEFAULT_FAILURE_STATUS_CODES,
+        on_state_change: Callable[[str, str], None] | None = None,
+    ):
+        """Initiate a new circuit breaker."""
+        if not 0 < failure_rate_threshold <= 1:
+            raise ValueError("failure_rate_threshold should be within (0, 1]")
+        if not 1 <= minimum_calls <= window_size:
+            raise ValueError("minimum_calls should be at least 1 and at most window_size")
+        if open_duration < 0:
+            raise ValueError("open_duration should not be negative")
+        if half_open_max_calls < 1:
+            raise ValueError("half_open_max_calls should be at least 1")
+
+        self._failure_rate_threshold = failure_rate_threshold
+        self._minimum_calls = minimum_calls
+        self._open_duration = open_duration
+        self._half_open_max_calls = half_open_max_calls
+        self._failure_status_codes = frozenset(failure_status_codes)
+        self._on_state_change = on_state_change
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._outcomes = collections.deque(maxlen=window_size)
+        self._failures = 0
+        self._opened_at = None
+        self._generation = 0
+        self._probes = 0
+        self._probe_successes = 0
+        self._rejected = 0
+
+    @property
+    def state(self) -> str:
+        """Retrieve the state, "closed", "open" or "half_open"."""
+        with self._lock:
+            return self._current_state()
+
+    @property
+    def failure_rate(self) -> float:
+        """Retrieve the failure rate of the calls in the rolling window."""
+        with self._lock:
+            return self._failures / len(self._outcomes) if self._outcomes else 0.0
+
+    def retry_after(self) -> float:
+        """Return the time in seconds until the open breaker lets a probe call through."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(self._opened_at + self._open_duration - time.monotonic(), 0.0)
+
+    def allow(self) -> _Permit | None:
+        """Check whether a call can be made, returns its permit, a probe call's when half-open, or None if rejected."""
+        with self._lock:
+            transition = None
+            if self._current_state() == HALF_OPEN and self._state == OPEN:
+                transition = self._transition(HALF_OPEN)
+            permit = None
+            if self._state == CLOSED:
+                permit = _Permit(self._generation, probe=False)
+            elif self._state == HALF_OPEN and self._probes < self._half_open_max_calls:
+                self._probes += 1
+                permit = _Permit(self._generation, probe=True)
+            else:
+                self._rejected += 1
+        self._notify(transition)
+        return permit
+
+    def record(self, err: BaseException | None = None, permit: _Permit | None = None):
+        """
+        Record the outcome of an allowed call, err being the error it failed with, if any.
+
+        permit is the one allow() returned for the call. Without permit, the call counts as allowed in the current
+        state.
+
+        """
+        failed = self.is_failure(err)
+        with self._lock:
+            transition = None
+            if permit is not None and permit.generation != self._generation:
+                _LOGGER.debug(f"Ignoring the outcome of a call allowed before the circuit breaker went {self._state}")
+            elif self._state == CLOSED:
+                transition = self._record_closed(failed)
+            elif self._state == HALF_OPEN:
+                transition = self._record_half_open(failed, counted=err is None or isinstance(err, grpc.RpcError))
+        self._notify(transition)
+
+    def is_failure(self, err: BaseException | None) -> bool:
+        """Check whether an error is a failure of the server to handle the call."""
+        if not isinstance(err, grpc.RpcError):
+            return False
+        code = getattr(err, "status_code", None)
+        if code is None and callable(getattr(err, "code", None)):
+            code = err.code()
+        return code in self._failure_status_codes
+
+    def snapshot(self) -> dict:
+        """Return the circuit breaker stats as a dict."""
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "calls": len(self._outcomes),
+                "failures": self._failures,
+                "failure_rate": self._failures / len(self._outcomes) if self._outcomes else 0.0,
+                "rejected": self._rejected,
+            }
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() >= self._opened_at + self._open_duration:
+            return HALF_OPEN
+        return self._state
+
+    def _record_closed(self, failed: bool) -> tuple[str, str] | None:
+        if len(self._outcomes) == self._outcomes.maxlen and self._outcomes[0]:
+            self._failures -= 1
+        self._outcomes.append(failed)
+        self._failures += failed
+        if (
+            len(self._outcomes) >= self._minimum_calls
+            and self._failures / len(self._outcomes) >= self._failure_rate_threshold
+        ):
+            return self._transition(OPEN)
+        return None
+
+    def _record_half_open(self, failed: bool, counted: bool) -> tuple[str, str] | None:
+        self._probes = max(self._probes - 1, 0)
+        if failed:
+            return self._transition(OPEN)
+        if counted:
+            self._probe_successes += 1
+            if self._probe_successes >= self._half_open_max_calls:
+                return self._transition(CLOSED)
+        return None
+
+    def _transition(self, state: str) -> tuple[str, str]:
+        """Change the state, returns the transition to notify once the lock is released."""
+        previous, self._state = self._state, state
+        self._generation += 1
+        self._probes = 0
+        self._probe_successes = 0
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        elif state == CLOSED:
+            self._outcomes.clear()
+            self._failures = 0
+        return previous, state
+
+    def _notify(self, transition: tuple[str, str] | None):
+        if transition is None:
+            return
+        previous, state = transition
+        _LOGGER.info(f"Circuit breaker {previous} -> {state}")
+        if self._on_state_change is not None:
+            self._on_state_change(previous, state)
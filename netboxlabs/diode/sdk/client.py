@@ -2,34 +2,73 @@
 # Copyright 2024 NetBox Labs Inc
 """NetBox Labs, Diode - SDK - Client."""
 import collections
+import concurrent.futures
+import contextlib
+import functools
+import hashlib
+import itertools
 import logging
 import os
 import platform
+import threading
+import time
 import uuid
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable, Iterator
+from typing import TYPE_CHECKING, Any
 from urllib.parse import urlparse
 
-import certifi
 import grpc
-import sentry_sdk
 
-from netboxlabs.diode.sdk.diode.v1 import ingester_pb2, ingester_pb2_grpc
-from netboxlabs.diode.sdk.exceptions import DiodeClientError, DiodeConfigError
+from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+from netboxlabs.diode.sdk.exceptions import (
+    DiodeCircuitOpenError,
+    DiodeClientError,
+    DiodeConfigError,
+    DiodeConnectionError,
+)
 from netboxlabs.diode.sdk.ingester import Entity
+from netboxlabs.diode.sdk.interceptors import _QUEUED_AT, _IngesterServiceStub
+
+# The modules of opt-in features are imported where they are used, so that importing the client stays cheap
+if TYPE_CHECKING:
+    from netboxlabs.diode.sdk.breaker import CircuitBreaker, _Permit
+    from netboxlabs.diode.sdk.compression import AdaptiveCompression
+    from netboxlabs.diode.sdk.fingerprint import FingerprintCache
+    from netboxlabs.diode.sdk.limiter import AdaptiveConcurrencyLimiter
+    from netboxlabs.diode.sdk.metrics import ClientMetrics
+    from netboxlabs.diode.sdk.pool import ChannelPool, PooledChannel
+    from netboxlabs.diode.sdk.registry import ChannelRegistry
+    from netboxlabs.diode.sdk.retry import RetryPolicy
+    from netboxlabs.diode.sdk.spool import Spool, SpoolRecord
+    from netboxlabs.diode.sdk.tracing import TraceSampler
+    from netboxlabs.diode.sdk.wire import BytesLike, _SerializedRequest
 
 _DIODE_API_KEY_ENVVAR_NAME = "DIODE_API_KEY"
 _DIODE_SDK_LOG_LEVEL_ENVVAR_NAME = "DIODE_SDK_LOG_LEVEL"
 _DIODE_SENTRY_DSN_ENVVAR_NAME = "DIODE_SENTRY_DSN"
 _DEFAULT_STREAM = "latest"
+_DEFAULT_MAX_REQUEST_SIZE = 3 * 1024 * 1024
+_ENTITIES_FIELD_TAG_SIZE = 1
+# Namespace of the name-based (version 5) UUIDs derived from request content
+_REQUEST_ID_NAMESPACE = uuid.UUID("5f0c8a4e-3b8e-4d1a-9f57-2b1d6c0e8a91")
 _LOGGER = logging.getLogger(__name__)
 
 
 def _load_certs() -> bytes:
     """Loads cacert.pem."""
+    import certifi
+
     with open(certifi.where(), "rb") as f:
         return f.read()
 
 
+def _ssl_channel_credentials() -> grpc.ChannelCredentials:
+    """Create TLS channel credentials trusting the certifi CA bundle."""
+    return grpc.ssl_channel_credentials(
+        root_certificates=_load_certs(),
+    )
+
+
 def _get_api_key(api_key: str | None = None) -> str:
     """Get API Key either from provided value or environment variable."""
     if api_key is None:
@@ -58,6 +97,158 @@ def parse_target(target: str) -> tuple[str, str, bool]:
     return authority, parsed_target.path, tls_verify
 
 
+def _varint_size(value: int) -> int:
+    """Number of bytes used to encode value as a protobuf varint."""
+    size = 1
+    while value > 0x7F:
+        value >>= 7
+        size += 1
+    return size
+
+
+def _entity_field_size(entity_size: int) -> int:
+    """Number of bytes an entity of entity_size bytes adds to the repeated entities field of a request."""
+    return _ENTITIES_FIELD_TAG_SIZE + _varint_size(entity_size) + entity_size
+
+
+def _resolve_future(future: concurrent.futures.Future, call: grpc.Future):
+    """Resolve a future with the outcome of a completed gRPC call."""
+    if call.cancelled():
+        future.cancel()
+        return
+    # The future may have been cancelled by the caller in the meantime
+    try:
+        response = call.result()
+    except grpc.RpcError as err:
+        with contextlib.suppress(concurrent.futures.InvalidStateError):
+            future.set_exception(DiodeClientError(err))
+        return
+    with contextlib.suppress(concurrent.futures.InvalidStateError):
+        future.set_result(response)
+
+
+def _completed_future(
+    response: ingester_pb2.IngestResponse, callback: Callable[[concurrent.futures.Future], None] | None = None
+) -> concurrent.futures.Future:
+    """Return a future resolved to a response, calling the optional callback with it."""
+    future = concurrent.futures.Future()
+    future.set_result(response)
+    if callback is not None:
+        future.add_done_callback(callback)
+    return future
+
+
+class _DeadlineExceededError(grpc.RpcError):
+    """Error of a call not sent before its deadline, e.g. while waiting for the concurrency limiter."""
+
+    def __init__(self, details: str):
+        """Initiate a new error."""
+        self._details = details
+
+    def code(self) -> grpc.StatusCode:
+        """Return the status code."""
+        return grpc.StatusCode.DEADLINE_EXCEEDED
+
+    def details(self) -> str:
+        """Return the error details."""
+        return self._details
+
+
+def _status_code(err: BaseException) -> grpc.StatusCode | None:
+    """Return the status code of a gRPC or Diode client error."""
+    if isinstance(err, DiodeClientError):
+        return err.status_code
+    if callable(getattr(err, "code", None)):
+        return err.code()
+    return None
+
+
+def _is_target_failure(err: BaseException | None) -> bool:
+    """Check whether an RPC error shows that its target could not handle it."""
+    from netboxlabs.diode.sdk.breaker import DEFAULT_FAILURE_STATUS_CODES
+
+    if err is None or isinstance(err, DiodeClientError):
+        return False
+    return _status_code(err) in DEFAULT_FAILURE_STATUS_CODES
+
+
+def _content_request_id(request: ingester_pb2.IngestRequest) -> str:
+    """Derive a request id from the deterministic serialization of a request without id, as a version 5 UUID."""
+    from netboxlabs.diode.sdk.wire import _request_id
+
+    return _request_id(_REQUEST_ID_NAMESPACE, [request.SerializeToString(deterministic=True)])
+
+
+class _AckedRequests:
+    """Least recently used cache of the responses to requests acknowledged less than ttl seconds ago, by request id."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._responses = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def get(self, request_id: str) -> ingester_pb2.IngestResponse | None:
+        with self._lock:
+            entry = self._responses.get(request_id)
+            if entry is None:
+                return None
+            expires_at, response = entry
+            if time.monotonic() >= expires_at:
+                del self._responses[request_id]
+                return None
+            self._responses.move_to_end(request_id)
+            return response
+
+    def put(self, request_id: str, response: ingester_pb2.IngestResponse):
+        with self._lock:
+            self._responses[request_id] = (time.monotonic() + self._ttl, response)
+            self._responses.move_to_end(request_id)
+            if len(self._responses) > self._maxsize:
+                self._responses.popitem(last=False)
+
+
+class _Chunker:
+    """Groups items into chunks fitting into requests of at most max_request_size bytes and max_entities items."""
+
+    __slots__ = ("_header_size", "_max_request_size", "_max_entities", "_chunk", "_chunk_size")
+
+    def __init__(self, header_size: int, max_request_size: int, max_entities: int | None = None):
+        """Initiate a new chunker, header_size being the size of a request without entities."""
+        self._header_size = header_size
+        self._max_request_size = max_request_size
+        self._max_entities = max_entities
+        self._chunk = []
+        self._chunk_size = header_size
+
+    def add(self, item: Any, item_size: int) -> list | None:
+        """
+        Add an item, with the number of bytes it adds to a request, returns the chunk it did not fit into, if any.
+
+        An item which does not fit into an empty request on its own makes a single-item chunk.
+
+        """
+        full = None
+        if self._chunk and (
+            self._chunk_size + item_size > self._max_request_size
+            or (self._max_entities is not None and len(self._chunk) >= self._max_entities)
+        ):
+            full = self.flush()
+        self._chunk.append(item)
+        self._chunk_size += item_size
+        return full
+
+    def flush(self) -> list | None:
+        """Return the current chunk, if not empty, and start a new one."""
+        chunk = self._chunk or None
+        self._chunk = []
+        self._chunk_size = self._header_size
+        return chunk
+
+
 def _get_sentry_dsn(sentry_dsn: str | None = None) -> str | None:
     """Get Sentry DSN either from provided value or environment variable."""
     if sentry_dsn is None:
@@ -65,8 +256,8 @@ def _get_sentry_dsn(sentry_dsn: str | None = None) -> str | None:
     return sentry_dsn
 
 
-class DiodeClient:
-    """Diode Client."""
+class _BaseDiodeClient:
+    """Configuration, request building and properties shared by Diode clients."""
 
     _name = "diode-sdk-python"
     _version = "0.0.1"
@@ -74,18 +265,26 @@ class DiodeClient:
     _app_version = None
     _channel = None
     _stub = None
+    _connect_time = None
+    _breaker = None
+    _metrics = None
+    _tracer = None
+    _deterministic_request_ids = False
+    _fingerprints = None
+    _acked_requests = None
 
-    def __init__(
+    def _configure(
         self,
         target: str,
         app_name: str,
         app_version: str,
         api_key: str | None = None,
-        sentry_dsn: str = None,
-        sentry_traces_sample_rate: float = 1.0,
-        sentry_profiles_sample_rate: float = 1.0,
+        compression: "grpc.Compression | AdaptiveCompression | None" = None,
+        compression_sample_interval: int = 0,
     ):
-        """Initiate a new client."""
+        """Parse the target and set up the client identity, call metadata and compression."""
+        from netboxlabs.diode.sdk.compression import AdaptiveCompression, CompressionStats
+
         log_level = os.getenv(_DIODE_SDK_LOG_LEVEL_ENVVAR_NAME, "INFO").upper()
         logging.basicConfig(level=log_level)
 
@@ -102,46 +301,21 @@ class DiodeClient:
             ("python-version", self._python_version),
         )
 
-        channel_opts = (
-            ("grpc.primary_user_agent", f"{self._name}/{self._version} {self._app_name}/{self._app_version}"),
-        )
-
-        if self._tls_verify:
-            _LOGGER.debug("Setting up gRPC secure channel")
-            self._channel = grpc.secure_channel(
-                self._target,
-                grpc.ssl_channel_credentials(
-                    root_certificates=_load_certs(),
-                ),
-                options=channel_opts,
-            )
-        else:
-            _LOGGER.debug("Setting up gRPC insecure channel")
-            self._channel = grpc.insecure_channel(
-                target=self._target,
-                options=channel_opts,
-            )
-
-        channel = self._channel
-
-        if self._path:
-            _LOGGER.debug(f"Setting up gRPC interceptor for path: {self._path}")
-            rpc_method_interceptor = DiodeMethodClientInterceptor(subpath=self._path)
-
-            intercept_channel = grpc.intercept_channel(
-                self._channel, rpc_method_interceptor
-            )
-            channel = intercept_channel
-
-        self._stub = ingester_pb2_grpc.IngesterServiceStub(channel)
+        self._compression = compression
+        self._adaptive_compression = compression if isinstance(compression, AdaptiveCompression) else None
+        self._compression_stats = CompressionStats(compression_sample_interval)
 
-        self._sentry_dsn = _get_sentry_dsn(sentry_dsn)
+    def _channel_compression(self) -> grpc.Compression | None:
+        """Compression set on gRPC channels, adaptive compression is selected per call."""
+        if self._adaptive_compression is not None:
+            return None
+        return self._compression
 
-        if self._sentry_dsn is not None:
-            _LOGGER.debug("Setting up Sentry")
-            self._setup_sentry(
-                self._sentry_dsn, sentry_traces_sample_rate, sentry_profiles_sample_rate
-            )
+    def _channel_options(self) -> tuple:
+        """Options for gRPC channels."""
+        return (
+            ("grpc.primary_user_agent", f"{self._name}/{self._version} {self._app_name}/{self._app_version}"),
+        )
 
     @property
     def name(self) -> str:
@@ -183,42 +357,294 @@ class DiodeClient:
         """Retrieve the channel."""
         return self._channel
 
-    def __enter__(self):
-        """Enters the runtime context related to the channel object."""
-        return self
+    def _build_request(
+        self,
+        entities: Iterable[Entity | ingester_pb2.Entity | None],
+        stream: str | None,
+    ) -> ingester_pb2.IngestRequest:
+        """Build an ingest request with a new request id, recording the time spent when metrics or tracing are enabled."""
+        trace = self._tracer.current() if self._tracer is not None else None
+        if self._metrics is None and trace is None:
+            return self._new_request(entities, stream)
+        start = time.perf_counter()
+        request = self._new_request(entities, stream)
+        end = time.perf_counter()
+        if self._metrics is not None:
+            self._metrics.record_build(end - start, (entity.WhichOneof("entity") for entity in request.entities))
+        if trace is not None:
+            trace.span("diode.build", start, end)
+        return request
 
-    def __exit__(self, exc_type, exc_value, exc_traceback):
-        """Exits the runtime context related to the channel object."""
-        self.close()
+    def _new_request(
+        self,
+        entities: Iterable[Entity | ingester_pb2.Entity | None],
+        stream: str | None,
+    ) -> ingester_pb2.IngestRequest:
+        """Create an ingest request with a new request id, or one derived from its content."""
+        request = ingester_pb2.IngestRequest(
+            stream=stream,
+            entities=entities,
+            sdk_name=self.name,
+            sdk_version=self.version,
+            producer_app_name=self.app_name,
+            producer_app_version=self.app_version,
+        )
+        request.id = _content_request_id(request) if self._deterministic_request_ids else str(uuid.uuid4())
+        return request
 
-    def close(self):
-        """Close the channel."""
-        self._channel.close()
+    def _build_serialized_request(self, frames: "list[BytesLike]", stream: str | None) -> "_SerializedRequest":
+        """Assemble an ingest request from entity frames, recording the time spent when metrics or tracing are enabled."""
+        trace = self._tracer.current() if self._tracer is not None else None
+        if self._metrics is None and trace is None:
+            return self._new_serialized_request(frames, stream)
+        start = time.perf_counter()
+        request = self._new_serialized_request(frames, stream)
+        end = time.perf_counter()
+        if self._metrics is not None:
+            from netboxlabs.diode.sdk.wire import _entity_types
 
-    def ingest(
+            self._metrics.record_build(end - start, _entity_types(frames))
+        if trace is not None:
+            trace.span("diode.build", start, end)
+        return request
+
+    def _new_serialized_request(self, frames: "list[BytesLike]", stream: str | None) -> "_SerializedRequest":
+        """Assemble an ingest request with a new request id, or one derived from its content, from entity frames."""
+        from netboxlabs.diode.sdk.wire import _request_id, _SerializedRequest
+
+        trailer = ingester_pb2.IngestRequest(
+            sdk_name=self.name,
+            sdk_version=self.version,
+            producer_app_name=self.app_name,
+            producer_app_version=self.app_version,
+        )
+        if self._deterministic_request_ids:
+            request_id = functools.partial(_request_id, _REQUEST_ID_NAMESPACE)
+        else:
+            request_id = str(uuid.uuid4())
+        return _SerializedRequest(stream, frames, trailer, request_id)
+
+    def _changed_entities(
+        self, entities: Iterable[Entity | ingester_pb2.Entity | None]
+    ) -> tuple[Iterable[Entity | ingester_pb2.Entity | None], list[tuple[bytes, bytes]] | None]:
+        """Drop the entities unchanged since they were last sent, when a fingerprint cache is set."""
+        if self._fingerprints is None:
+            return entities, None
+        return self._fingerprints.changed(entities)
+
+    def _record_fingerprints(
+        self, fingerprints: list[tuple[bytes, bytes]] | None, response: ingester_pb2.IngestResponse
+    ):
+        """Record the fingerprints of the entities sent, once the server acknowledged them without errors."""
+        if fingerprints and not response.errors:
+            self._fingerprints.update(fingerprints)
+
+    @property
+    def fingerprint_cache(self) -> "FingerprintCache | None":
+        """Retrieve the fingerprint cache, if any."""
+        return self._fingerprints
+
+    def _configure_request_ids(
+        self, deterministic_request_ids: bool, acked_request_cache_size: int, acked_request_ttl: float
+    ):
+        """Set up content-derived request ids and the cache of acknowledged requests."""
+        if acked_request_cache_size < 0:
+            raise ValueError("acked_request_cache_size should not be negative")
+        if acked_request_ttl < 0:
+            raise ValueError("acked_request_ttl should not be negative")
+        self._deterministic_request_ids = deterministic_request_ids
+        if deterministic_request_ids and acked_request_cache_size and acked_request_ttl:
+            self._acked_requests = _AckedRequests(acked_request_cache_size, acked_request_ttl)
+
+    def _acked_response(self, request: ingester_pb2.IngestRequest) -> ingester_pb2.IngestResponse | None:
+        """Return the response to a request with the same id acknowledged recently, if any."""
+        if self._acked_requests is None:
+            return None
+        response = self._acked_requests.get(request.id)
+        if response is not None:
+            _LOGGER.debug(f"Skipping ingest request {request.id}, already acknowledged")
+        return response
+
+    def _remember_ack(self, request: ingester_pb2.IngestRequest, response: ingester_pb2.IngestResponse):
+        """Remember the response to an acknowledged request, when content-derived request ids are enabled."""
+        if self._acked_requests is not None:
+            self._acked_requests.put(request.id, response)
+
+    def _chunk_entities(
         self,
         entities: Iterable[Entity | ingester_pb2.Entity | None],
-        stream: str | None = _DEFAULT_STREAM,
-    ) -> ingester_pb2.IngestResponse:
-        """Ingest entities."""
-        try:
-            request = ingester_pb2.IngestRequest(
-                stream=stream,
-                id=str(uuid.uuid4()),
-                entities=entities,
-                sdk_name=self.name,
-                sdk_version=self.version,
-                producer_app_name=self.app_name,
-                producer_app_version=self.app_version,
+        stream: str | None,
+        max_request_size: int,
+        max_entities: int | None = None,
+    ) -> Iterator[list[ingester_pb2.Entity]]:
+        """
+        Split entities into chunks fitting into requests of at most max_request_size bytes and max_entities entities.
+
+        Entities are consumed lazily. An entity which does not fit into an empty request on its own is yielded as a
+        single-entity chunk.
+
+        """
+        sized = ((entity, _entity_field_size(entity.ByteSize())) for entity in entities if entity is not None)
+        return self._chunk(sized, stream, max_request_size, max_entities)
+
+    def _chunk_frames(
+        self, frames: "list[BytesLike]", stream: str | None, max_request_size: int
+    ) -> "Iterator[list[BytesLike]]":
+        """Split entity frames into chunks fitting into requests of at most max_request_size bytes."""
+        return self._chunk(((frame, len(frame)) for frame in frames), stream, max_request_size)
+
+    def _chunk(
+        self,
+        sized: Iterable[tuple[Any, int]],
+        stream: str | None,
+        max_request_size: int,
+        max_entities: int | None = None,
+    ) -> Iterator[list]:
+        """Split items, with the number of bytes each adds to a request, into chunks fitting into requests."""
+        chunker = self._chunker(stream, max_request_size, max_entities)
+        for item, item_size in sized:
+            chunk = chunker.add(item, item_size)
+            if chunk is not None:
+                yield chunk
+        chunk = chunker.flush()
+        if chunk is not None:
+            yield chunk
+
+    def _chunker(self, stream: str | None, max_request_size: int, max_entities: int | None = None) -> _Chunker:
+        """Return a chunker grouping entities into requests of at most max_request_size bytes and max_entities."""
+        if max_request_size <= 0:
+            raise ValueError("max_request_size should be a positive number of bytes")
+        if max_entities is not None and max_entities < 1:
+            raise ValueError("max_request_entities should be at least 1")
+        return _Chunker(self._new_request([], stream).ByteSize(), max_request_size, max_entities)
+
+    def _call_compression(
+        self, request_size: int, compression: grpc.Compression | None
+    ) -> grpc.Compression | None:
+        """Select the compression of an ingest call, a per-call compression overrides the client compression."""
+        if compression is not None:
+            return compression
+        if self._adaptive_compression is not None:
+            return self._adaptive_compression.select(request_size)
+        return self._compression
+
+    def _record_call(
+        self,
+        request: ingester_pb2.IngestRequest,
+        request_size: int,
+        compression: grpc.Compression | None,
+        elapsed: float,
+    ):
+        """Record the size of an ingest request before and after compression, and its RPC time."""
+        if self._adaptive_compression is not None:
+            self._adaptive_compression.observe(request_size, compression, elapsed)
+
+        from netboxlabs.diode.sdk.compression import compressed_size, is_compressed
+
+        sent_size = None if is_compressed(compression) else request_size
+        if self._compression_stats.sample(compression):
+            sent_size = compressed_size(request.SerializeToString(), compression)
+        self._compression_stats.record(request_size, sent_size, compression)
+        sent = f"{sent_size} bytes sent" if sent_size is not None else "sent"
+        _LOGGER.debug(f"Ingest request {request.id}: {request_size} bytes, {sent} ({compression}) in {elapsed:.3f}s")
+
+    def _allow_call(self) -> "_Permit | None":
+        """Return the circuit breaker permit of a call, if any, raising DiodeCircuitOpenError while it rejects calls."""
+        if self._breaker is None:
+            return None
+        permit = self._breaker.allow()
+        if permit is None:
+            raise DiodeCircuitOpenError(self._breaker.retry_after())
+        return permit
+
+    def _record_outcome(self, permit: "_Permit | None", err: BaseException | None = None):
+        """Record the outcome of a call allowed by the circuit breaker with its permit."""
+        if self._breaker is not None:
+            self._breaker.record(err, permit)
+
+    def _call_started(self):
+        """Record the start of a call when metrics or tracing are enabled."""
+        if self._tracer is not None:
+            self._tracer.call_started()
+        if self._metrics is not None:
+            self._metrics.call_started()
+
+    def _call_finished(self, elapsed: float, request_size: int, err: BaseException | None = None):
+        """Record the end of a call, and the status code it failed with, when metrics or tracing are enabled."""
+        if self._tracer is not None:
+            self._tracer.call_finished(elapsed, err)
+        if self._metrics is None:
+            return
+        status_code = None
+        if err is not None:
+            code = _status_code(err)
+            status_code = code.name if code is not None else grpc.StatusCode.UNKNOWN.name
+        self._metrics.call_finished(elapsed, request_size, status_code)
+
+    def _record_retry(self):
+        """Record a retry when metrics are enabled."""
+        if self._metrics is not None:
+            self._metrics.record_retry()
+
+    @property
+    def metrics(self) -> "ClientMetrics | None":
+        """Retrieve the metrics, if enabled."""
+        return self._metrics
+
+    @property
+    def circuit_breaker(self) -> "CircuitBreaker | None":
+        """Retrieve the circuit breaker, if any."""
+        return self._breaker
+
+    @property
+    def connect_time(self) -> float | None:
+        """Retrieve the connection setup time in seconds, if connect() was called."""
+        return self._connect_time
+
+    @property
+    def compression_stats(self) -> dict:
+        """Retrieve cumulative request sizes before and after compression."""
+        return self._compression_stats.snapshot()
+
+    def _configure_sentry(
+        self,
+        sentry_dsn: str | None,
+        traces_sample_rate: float,
+        profiles_sample_rate: float,
+        trace_sampler: "TraceSampler | None" = None,
+    ):
+        """Set up Sentry and the tracing of ingests when a DSN is provided or configured in the environment."""
+        self._sentry_dsn = _get_sentry_dsn(sentry_dsn)
+
+        if self._sentry_dsn is not None:
+            from netboxlabs.diode.sdk.tracing import TraceSampler, _IngestTracer
+
+            _LOGGER.debug("Setting up Sentry")
+            self._setup_sentry(
+                self._sentry_dsn, traces_sample_rate, profiles_sample_rate
             )
+            if trace_sampler is None and traces_sample_rate > 0:
+                trace_sampler = TraceSampler(sample_rate=traces_sample_rate)
+            if trace_sampler is not None:
+                self._tracer = _IngestTracer(trace_sampler)
 
-            return self._stub.Ingest(request, metadata=self._metadata)
-        except grpc.RpcError as err:
-            raise DiodeClientError(err) from err
+    def _trace_ingest(self) -> contextlib.AbstractContextManager:
+        """Return a context tracing an ingest when tracing is enabled."""
+        if self._tracer is None:
+            return contextlib.nullcontext()
+        return self._tracer.trace(f"{type(self).__name__}.ingest")
+
+    @property
+    def trace_sampler(self) -> "TraceSampler | None":
+        """Retrieve the sampler of ingest traces, if tracing is enabled."""
+        return self._tracer.sampler if self._tracer is not None else None
 
     def _setup_sentry(
         self, dsn: str, traces_sample_rate: float, profiles_sample_rate: float
     ):
+        # sentry_sdk is only imported when a DSN is configured
+        import sentry_sdk
+
         sentry_sdk.init(
             dsn=dsn,
             release=self.version,
@@ -234,6 +660,879 @@ class DiodeClient:
         sentry_sdk.set_tag("python_version", self._python_version)
 
 
+class DiodeClient(_BaseDiodeClient):
+    """
+    Diode Client.
+
+    ingest_future() and ingest_many() send requests without waiting for their responses. With max_in_flight set,
+    they block while max_in_flight of their requests are awaiting a response.
+
+    With warm_up, the connection is established during construction, see connect(). With wait_for_ready, calls wait
+    for the connection to be ready, up to their timeout, instead of failing fast while it is being established.
+
+    The compression argument is either a grpc.Compression algorithm set on the channel, or an AdaptiveCompression
+    selecting the compression of each call. Cumulative request sizes before and after compression are available from
+    compression_stats. Measuring the size of a compressed request takes compressing it again, so it is only measured
+    for one in compression_sample_interval compressed requests, none by default, see CompressionStats.
+
+    Without retry_policy, a failed request raises DiodeClientError straight away. With a RetryPolicy, requests failing
+    with a retriable status code are resent, with the same request id, according to the policy.
+
+    With concurrency_limiter, the number of ingest calls in flight across all threads is limited by an
+    AdaptiveConcurrencyLimiter, which adjusts its limit from the observed latency and RESOURCE_EXHAUSTED errors.
+    Waiting for the limiter counts towards the attempt timeout of the retry policy: a request still waiting when it
+    runs out raises DiodeClientError with DEADLINE_EXCEEDED without being sent.
+
+    With metrics, a ClientMetrics records request build times, call latencies, request sizes, entity counts, errors,
+    retries and calls in flight.
+
+    With interceptors, gRPC unary-unary or stream-unary client interceptors, such as a TimingInterceptor, are chained
+    in order around every call, ahead of the interceptor adding the target path.
+
+    With deterministic_request_ids, the id of a request is derived from its content, the stream, the entities and the
+    producer, so that a request built again from the same entities, for instance by an application resending a batch
+    after a timeout, is recognized by the server. The responses to the last acked_request_cache_size requests
+    acknowledged less than acked_request_ttl seconds ago are then kept, and requests with the same id are not sent
+    again within that time: their recorded response is returned instead. A request built from the same entities later
+    on, for instance by a periodic re-sync, is sent again. Retries and spool replays always resend the request with
+    its original id.
+
+    With fingerprint_cache, a FingerprintCache, entities unchanged since they were last sent are dropped from
+    ingest(), ingest_future() and ingest_many() calls, and calls left without entities are not sent.
+
+    With a Sentry DSN, errors are reported to Sentry and ingest() calls are traced, with child spans for building
+    requests, RPCs and serializing requests. Whether an ingest is sent to Sentry is decided once it completed by
+    sentry_trace_sampler, by default a TraceSampler keeping failed and slow ingests and sentry_traces_sample_rate of the
+    others, at most once per second. sentry_profiles_sample_rate is passed to Sentry and defaults to no profiling.
+
+    With circuit_breaker, calls fail immediately with DiodeCircuitOpenError, a DiodeClientError with status code
+    UNAVAILABLE, while the CircuitBreaker is open after too many calls failed to reach the server.
+
+    By default the client uses a single channel. With channel_pool_size greater than 1, RPCs are spread over a pool
+    of channels, each with its own connection, selected according to channel_pool_policy ("round_robin",
+    "least_outstanding" or "ewma").
+
+    target may also be a list of targets, each with its own TLS setting and path. channel_pool_size channels are
+    connected to each of them and RPCs are spread over all their channels. Targets failing to handle RPCs are ejected
+    and re-admitted after a backoff, see ChannelPool, and ingest() and ingest_future() fail over to another target when
+    a request fails with UNAVAILABLE or DEADLINE_EXCEEDED. The health and latency of each target are available from
+    target_stats.
+
+    With channel_registry, for instance ChannelRegistry.default(), channels are shared with the other clients using
+    the same registry, target, TLS setting and options, and close() only releases the references of the client.
+
+    With spool, a directory path or a Spool, requests are written to a write-ahead spool on disk before they are
+    sent and deleted once the server responded. Requests failing with a retriable status code, or left over by a
+    previous process, stay in the spool: they are sent in order before the next ingest(), by replay_spool(), or in
+    the background when the client is created and once the channel gets connected. ingest() still raises
+    DiodeClientError when its request could not be sent.
+
+    """
+
+    _pool = None
+    _spool = None
+    _registry = None
+
+    def __init__(
+        self,
+        target: str | list[str],
+        app_name: str,
+        app_version: str,
+        api_key: str | None = None,
+        sentry_dsn: str = None,
+        sentry_traces_sample_rate: float = 0.01,
+        sentry_profiles_sample_rate: float = 0.0,
+        channel_pool_size: int = 1,
+        channel_pool_policy: str = "round_robin",
+        max_in_flight: int | None = None,
+        retry_policy: "RetryPolicy | None" = None,
+        compression: "grpc.Compression | AdaptiveCompression | None" = None,
+        wait_for_ready: bool | None = None,
+        warm_up: bool = False,
+        connect_timeout: float | None = None,
+        spool: "str | os.PathLike | Spool | None" = None,
+        concurrency_limiter: "AdaptiveConcurrencyLimiter | None" = None,
+        circuit_breaker: "CircuitBreaker | None" = None,
+        channel_registry: "ChannelRegistry | None" = None,
+        metrics: "ClientMetrics | None" = None,
+        interceptors: Iterable[grpc.UnaryUnaryClientInterceptor | grpc.StreamUnaryClientInterceptor] | None = None,
+        sentry_trace_sampler: "TraceSampler | None" = None,
+        deterministic_request_ids: bool = False,
+        acked_request_cache_size: int = 1024,
+        fingerprint_cache: "FingerprintCache | None" = None,
+        compression_sample_interval: int = 0,
+        acked_request_ttl: float = 60.0,
+    ):
+        """Initiate a new client."""
+        targets = [target] if isinstance(target, str) else list(target)
+        if not targets:
+            raise ValueError("at least one target is required")
+
+        self._configure(targets[0], app_name, app_version, api_key, compression, compression_sample_interval)
+        self._targets = [(t, *parse_target(t)) for t in targets]
+        self._retry_policy = retry_policy
+        self._wait_for_ready = wait_for_ready
+        self._limiter = concurrency_limiter
+        self._breaker = circuit_breaker
+        self._metrics = metrics
+        self._interceptors = list(interceptors or [])
+        self._configure_request_ids(deterministic_request_ids, acked_request_cache_size, acked_request_ttl)
+        self._fingerprints = fingerprint_cache
+
+        if channel_pool_size < 1:
+            raise ValueError("channel_pool_size should be at least 1")
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError("max_in_flight should be at least 1")
+
+        self._in_flight = threading.BoundedSemaphore(max_in_flight) if max_in_flight is not None else None
+
+        self._registry = channel_registry
+        self._registry_keys = []
+        self._create_channels(channel_pool_size, channel_pool_policy)
+
+        # Release the channels if the client cannot be set up, the caller never getting a client to close
+        try:
+            self._configure_sentry(
+                sentry_dsn, sentry_traces_sample_rate, sentry_profiles_sample_rate, sentry_trace_sampler
+            )
+
+            # Connect before subscribing the spool to the channel, its pending requests being replayed once connected
+            if warm_up:
+                self.connect(timeout=connect_timeout)
+
+            if spool is not None:
+                self._configure_spool(spool)
+        except BaseException:
+            self.close()
+            raise
+
+    def _configure_spool(self, spool: "str | os.PathLike | Spool"):
+        """Set up the spool, replaying its pending requests now and whenever the channel gets connected."""
+        from netboxlabs.diode.sdk.spool import Spool
+
+        self._spool = spool if isinstance(spool, Spool) else Spool(spool)
+        _LOGGER.debug(f"Setting up spool in {self._spool.directory}")
+        self._replay_lock = threading.Lock()
+        self._channel.subscribe(self._on_connectivity_change)
+        # An idle channel does not connect until a call is made, replay the requests left by a previous process now
+        if len(self._spool):
+            threading.Thread(target=self._replay_spool_in_background, daemon=True).start()
+
+    def _create_channels(self, channel_pool_size: int, channel_pool_policy: str):
+        """Create the channel, or the pool of channel_pool_size channels to each target."""
+        channel_opts = self._channel_options()
+        if channel_pool_size > 1:
+            # Channels with identical arguments share their connections unless each uses its own subchannel pool
+            channel_opts += (("grpc.use_local_subchannel_pool", 1),)
+
+        self._channel, self._stub = self._create_channel(channel_opts)
+        if channel_pool_size == 1 and len(self._targets) == 1:
+            return
+
+        from netboxlabs.diode.sdk.pool import ChannelPool
+
+        _LOGGER.debug(f"Setting up gRPC channel pool of size {channel_pool_size} for {len(self._targets)} targets")
+        channels = [(self._channel, self._stub)]
+        names = [self._targets[0][0]]
+        for i, (name, authority, path, tls_verify) in enumerate(self._targets):
+            for index in range(0 if i else 1, channel_pool_size):
+                channels.append(self._create_channel(channel_opts, authority, path, tls_verify, index))
+                names.append(name)
+        self._pool = ChannelPool(channels, policy=channel_pool_policy, targets=names)
+
+    def _create_channel(
+        self,
+        channel_opts: tuple,
+        target: str | None = None,
+        path: str | None = None,
+        tls_verify: bool | None = None,
+        index: int = 0,
+    ) -> tuple[grpc.Channel, _IngesterServiceStub]:
+        """
+        Create a channel and its stub, to the client target unless another target is given.
+
+        With a channel registry, the channel is shared with the clients using the same target, TLS setting and
+        channel options, index telling apart the channels of a pool.
+
+        """
+        if target is None:
+            target, path, tls_verify = self._target, self._path, self._tls_verify
+
+        if self._registry is None:
+            channel = self._new_channel(channel_opts, target, tls_verify)
+        else:
+            key = (target, tls_verify, channel_opts, self._channel_compression(), index)
+            channel = self._registry.acquire(
+                key, functools.partial(self._new_channel, channel_opts, target, tls_verify)
+            )
+            self._registry_keys.append(key)
+
+        stub_channel = channel
+        interceptors = list(self._interceptors)
+
+        if path:
+            _LOGGER.debug(f"Setting up gRPC interceptor for path: {path}")
+            interceptors.append(DiodeMethodClientInterceptor(subpath=path))
+
+        if interceptors:
+            stub_channel = grpc.intercept_channel(channel, *interceptors)
+
+        return channel, _IngesterServiceStub(stub_channel)
+
+    @property
+    def pool(self) -> "ChannelPool | None":
+        """Retrieve the channel pool, if any."""
+        return self._pool
+
+    def _new_channel(self, channel_opts: tuple, target: str, tls_verify: bool) -> grpc.Channel:
+        """Open a new secure or insecure channel."""
+        if tls_verify:
+            _LOGGER.debug("Setting up gRPC secure channel")
+            if self._registry is not None:
+                credentials = self._registry.credentials(_ssl_channel_credentials)
+            else:
+                credentials = _ssl_channel_credentials()
+            return grpc.secure_channel(
+                target,
+                credentials,
+                options=channel_opts,
+                compression=self._channel_compression(),
+            )
+
+        _LOGGER.debug("Setting up gRPC insecure channel")
+        return grpc.insecure_channel(
+            target=target,
+            options=channel_opts,
+            compression=self._channel_compression(),
+        )
+
+    @property
+    def targets(self) -> list[str]:
+        """Retrieve the targets."""
+        return [name for name, *_ in self._targets]
+
+    @property
+    def target_stats(self) -> dict[str, dict]:
+        """Retrieve the health and latency stats of each target, when RPCs are spread over a pool."""
+        return self._pool.target_stats() if self._pool is not None else {}
+
+    @property
+    def spool(self) -> "Spool | None":
+        """Retrieve the spool, if any."""
+        return self._spool
+
+    @property
+    def concurrency_limiter(self) -> "AdaptiveConcurrencyLimiter | None":
+        """Retrieve the concurrency limiter, if any."""
+        return self._limiter
+
+    def connect(self, timeout: float | None = None) -> float:
+        """
+        Establish the connection of the channel, or of all channels of the pool, ahead of the first call.
+
+        Returns the connection setup time in seconds, also available from connect_time. Raises DiodeConnectionError
+        if the channels are not ready within timeout seconds.
+
+        """
+        channels = [pooled.channel for pooled in self._pool.channels] if self._pool is not None else [self._channel]
+        _LOGGER.debug(f"Connecting to {self._target}")
+        start = time.perf_counter()
+        ready_futures = [grpc.channel_ready_future(channel) for channel in channels]
+        try:
+            for ready_future in ready_futures:
+                remaining = None if timeout is None else max(timeout - (time.perf_counter() - start), 0)
+                ready_future.result(timeout=remaining)
+        except grpc.FutureTimeoutError as err:
+            for ready_future in ready_futures:
+                ready_future.cancel()
+            raise DiodeConnectionError(f"connection to {self._target} not ready after {timeout}s") from err
+
+        self._connect_time = time.perf_counter() - start
+        _LOGGER.debug(f"Connected to {self._target} in {self._connect_time:.3f}s")
+        return self._connect_time
+
+    def __enter__(self):
+        """Enters the runtime context related to the channel object."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        """Exits the runtime context related to the channel object."""
+        self.close()
+
+    def close(self):
+        """
+        Close the channel, or all channels of the pool, and the spool, releasing shared channels instead.
+
+        The fingerprint cache, if any, is saved.
+
+        """
+        if self._fingerprints is not None:
+            self._fingerprints.save()
+        if self._spool is not None:
+            self._channel.unsubscribe(self._on_connectivity_change)
+            self._spool.close()
+        if self._registry is not None:
+            for key in self._registry_keys:
+                self._registry.release(key)
+            self._registry_keys = []
+        elif self._pool is not None:
+            self._pool.close()
+        else:
+            self._channel.close()
+
+    def ingest(
+        self,
+        entities: Iterable[Entity | ingester_pb2.Entity | None],
+        stream: str | None = _DEFAULT_STREAM,
+        max_request_size: int | None = None,
+        compression: grpc.Compression | None = None,
+    ) -> ingester_pb2.IngestResponse:
+        """
+        Ingest entities.
+
+        By default all entities are sent in a single request. When max_request_size is set, entities are split into
+        multiple requests, each with its own id and a serialized size of at most max_request_size bytes, and the
+        errors of all responses are merged into a single response.
+
+        The compression argument overrides the client compression for this call.
+
+        """
+        entities, fingerprints = self._changed_entities(entities)
+        if fingerprints is not None and not entities:
+            return ingester_pb2.IngestResponse()
+
+        ingest = self._ingest if self._spool is None else self._ingest_spooled
+        try:
+            with self._trace_ingest():
+                if max_request_size is None:
+                    response = ingest(self._build_request(entities, stream), compression)
+                else:
+                    errors = []
+                    for chunk in self._chunk_entities(entities, stream, max_request_size):
+                        errors.extend(ingest(self._build_request(chunk, stream), compression).errors)
+                    response = ingester_pb2.IngestResponse(errors=errors)
+        except DiodeClientError:
+            raise
+        except grpc.RpcError as err:
+            raise DiodeClientError(err) from err
+        self._record_fingerprints(fingerprints, response)
+        return response
+
+    def ingest_stream(
+        self,
+        entities: Iterable[Entity | ingester_pb2.Entity | None],
+        stream: str | None = _DEFAULT_STREAM,
+        max_request_size: int = _DEFAULT_MAX_REQUEST_SIZE,
+        max_request_entities: int | None = None,
+        max_pending: int = 1,
+        compression: grpc.Compression | None = None,
+    ) -> ingester_pb2.IngestResponse:
+        """
+        Ingest entities pulled lazily from an iterable, such as a generator.
+
+        Entities are sent in requests of at most max_request_size bytes and, if set, max_request_entities entities, each
+        sent as soon as the next entity does not fit into it. With max_pending above 1, requests are sent with
+        ingest_future() and up to max_pending requests await a response while the next one is filled, so that at most
+        max_pending + 1 requests are held in memory regardless of the number of entities. The errors of all responses
+        are merged into a single response. On error, the requests awaiting a response are cancelled.
+
+        Unchanged entities are dropped from each request when a fingerprint cache is set, see ingest().
+
+        """
+        if max_pending < 1:
+            raise ValueError("max_pending should be at least 1")
+        chunks = self._chunk_entities(entities, stream, max_request_size, max_request_entities)
+        errors = []
+        if max_pending == 1:
+            for chunk in chunks:
+                errors.extend(self.ingest(chunk, stream, compression=compression).errors)
+            return ingester_pb2.IngestResponse(errors=errors)
+
+        pending = collections.deque()
+        try:
+            for chunk in chunks:
+                if len(pending) == max_pending:
+                    errors.extend(pending.popleft().result().errors)
+                pending.append(self.ingest_future(chunk, stream, compression=compression))
+            while pending:
+                errors.extend(pending.popleft().result().errors)
+        finally:
+            for future in pending:
+                future.cancel()
+        return ingester_pb2.IngestResponse(errors=errors)
+
+    def ingest_serialized(
+        self,
+        entities: "BytesLike | Iterable[BytesLike]",
+        stream: str | None = _DEFAULT_STREAM,
+        max_request_size: int | None = None,
+        compression: grpc.Compression | None = None,
+    ) -> ingester_pb2.IngestResponse:
+        """
+        Ingest serialized entities.
+
+        entities are either entities serialized by serialize_entities(), e.g. by other processes or read from disk,
+        or an iterable of serialized Entity messages. Requests are assembled around the serialized entities, which are
+        neither parsed nor filtered by the fingerprint cache. See ingest() for max_request_size and compression.
+
+        """
+        from netboxlabs.diode.sdk.wire import _entity_frames
+
+        frames = _entity_frames(entities, split=max_request_size is not None)
+        ingest = self._ingest if self._spool is None else self._ingest_spooled
+        try:
+            with self._trace_ingest():
+                if max_request_size is None:
+                    return ingest(self._build_serialized_request(frames, stream), compression)
+                errors = []
+                for chunk in self._chunk_frames(frames, stream, max_request_size):
+                    errors.extend(ingest(self._build_serialized_request(chunk, stream), compression).errors)
+                return ingester_pb2.IngestResponse(errors=errors)
+        except DiodeClientError:
+            raise
+        except grpc.RpcError as err:
+            raise DiodeClientError(err) from err
+
+    def _ingest(
+        self, request: ingester_pb2.IngestRequest, compression: grpc.Compression | None = None
+    ) -> ingester_pb2.IngestResponse:
+        """Send an ingest request, retrying according to the retry policy, unless it was acknowledged recently."""
+        response = self._acked_response(request)
+        if response is not None:
+            return response
+
+        if self._retry_policy is None:
+            response = self._send(request, compression=compression)
+        else:
+            attempts = itertools.count()
+
+            def attempt(timeout: float | None) -> ingester_pb2.IngestResponse:
+                if next(attempts):
+                    self._record_retry()
+                return self._send(request, timeout, compression)
+
+            response = self._retry_policy.call(attempt)
+        self._remember_ack(request, response)
+        return response
+
+    def _ingest_spooled(
+        self, request: ingester_pb2.IngestRequest, compression: grpc.Compression | None = None
+    ) -> ingester_pb2.IngestResponse:
+        """Spool an ingest request, send the requests pending in the spool and then the request."""
+        record = self._spool.append(request, hold=True)
+        try:
+            # Wait for a replay in progress, so that the request is sent after the requests spooled before it
+            self._replay_spool(compression, wait=True)
+            response = self._ingest(request, compression)
+            self._spool.ack(record)
+            return response
+        except grpc.RpcError as err:
+            if not self._is_spool_retriable(err):
+                self._spool.ack(record)
+            raise
+        finally:
+            self._spool.release(record)
+
+    def replay_spool(self, compression: grpc.Compression | None = None) -> int:
+        """
+        Send the requests pending in the spool, in order.
+
+        Returns the number of requests sent. Raises DiodeClientError, leaving the request and the following ones in the
+        spool, when a request fails with a retriable status code. Does nothing while another replay is running.
+
+        """
+        try:
+            return self._replay_spool(compression)
+        except DiodeClientError:
+            raise
+        except grpc.RpcError as err:
+            raise DiodeClientError(err) from err
+
+    def _replay_spool(self, compression: grpc.Compression | None = None, wait: bool = False) -> int:
+        """Send the requests pending in the spool, except those being sent, waiting for another replay with wait."""
+        if self._spool is None or (not wait and len(self._spool) <= self._spool.held):
+            return 0
+        if not self._replay_lock.acquire(blocking=wait):
+            return 0
+        sent = 0
+        try:
+            for record, request in self._spool.pending():
+                if self._spool.is_held(record):
+                    continue
+                self._spool.hold(record)
+                try:
+                    self._ingest(request, compression)
+                except grpc.RpcError as err:
+                    if self._is_spool_retriable(err):
+                        raise
+                    _LOGGER.warning(f"Dropping spooled request {request.id} failed with {err.code()}")
+                finally:
+                    self._spool.release(record)
+                self._spool.ack(record)
+                sent += 1
+        finally:
+            self._replay_lock.release()
+        if sent:
+            _LOGGER.debug(f"Replayed {sent} spooled requests")
+        return sent
+
+    def _is_spool_retriable(self, err: BaseException) -> bool:
+        """Check whether a failed request should stay in the spool to be sent again."""
+        from netboxlabs.diode.sdk.retry import DEFAULT_RETRIABLE_STATUS_CODES
+
+        code = _status_code(err)
+        if self._retry_policy is not None:
+            return code in self._retry_policy.retriable_status_codes
+        return code in DEFAULT_RETRIABLE_STATUS_CODES
+
+    def _on_connectivity_change(self, state: grpc.ChannelConnectivity):
+        """Replay the spool in the background once the channel is connected."""
+        if state == grpc.ChannelConnectivity.READY and len(self._spool) > self._spool.held:
+            threading.Thread(target=self._replay_spool_in_background, daemon=True).start()
+
+    def _replay_spool_in_background(self):
+        try:
+            self._replay_spool()
+        except grpc.RpcError as err:
+            _LOGGER.warning(f"Spool replay failed with {_status_code(err)}, retrying on the next ingest")
+
+    def _send(
+        self,
+        request: ingester_pb2.IngestRequest,
+        timeout: float | None = None,
+        compression: grpc.Compression | None = None,
+    ) -> ingester_pb2.IngestResponse:
+        """Send an ingest request, failing over to another target when the selected one cannot handle it."""
+        tried = set()
+        for _ in range(len(self._targets) - 1):
+            try:
+                return self._send_once(request, timeout, compression, tried)
+            except grpc.RpcError as err:
+                if not _is_target_failure(err):
+                    raise
+                _LOGGER.debug(f"Ingest request {request.id} failed with {err.code()}, failing over")
+                self._record_retry()
+        return self._send_once(request, timeout, compression, tried)
+
+    def _send_once(
+        self,
+        request: ingester_pb2.IngestRequest,
+        timeout: float | None = None,
+        compression: grpc.Compression | None = None,
+        tried: set[str] | None = None,
+    ) -> ingester_pb2.IngestResponse:
+        """Send an ingest request over the channel, or a channel selected from the pool, not connected to tried targets."""
+        _QUEUED_AT.set(time.perf_counter())
+        request_size = request.ByteSize()
+        compression = self._call_compression(request_size, compression)
+        timeout, permit = self._acquire_call(timeout)
+        pooled = self._pool.acquire(tried or ()) if self._pool is not None else None
+        if pooled is not None and tried is not None:
+            tried.add(pooled.target.target)
+        stub = pooled.stub if pooled is not None else self._stub
+        self._call_started()
+        start = time.perf_counter()
+        try:
+            response = stub.Ingest(
+                request,
+                metadata=self._metadata,
+                timeout=timeout,
+                compression=compression,
+                wait_for_ready=self._wait_for_ready,
+            )
+        except BaseException as err:
+            self._call_finished(time.perf_counter() - start, request_size, err)
+            self._release_pooled(pooled, err=err)
+            self._release_limiter(err=err)
+            self._record_outcome(permit, err)
+            raise
+        elapsed = time.perf_counter() - start
+        self._call_finished(elapsed, request_size)
+        self._release_pooled(pooled, latency=elapsed)
+        self._release_limiter(latency=elapsed)
+        self._record_outcome(permit)
+        self._record_call(request, request_size, compression, elapsed)
+        return response
+
+    def ingest_future(
+        self,
+        entities: Iterable[Entity | ingester_pb2.Entity | None],
+        stream: str | None = _DEFAULT_STREAM,
+        callback: Callable[[concurrent.futures.Future], None] | None = None,
+        compression: grpc.Compression | None = None,
+    ) -> concurrent.futures.Future:
+        """
+        Ingest entities without waiting for the response.
+
+        Returns a future resolving to the IngestResponse, or raising DiodeClientError. Errors before the request is
+        sent, such as a spool write error or DiodeCircuitOpenError, are raised by the future as well. The optional
+        callback is called with the future once it is done, from a gRPC thread.
+
+        """
+        entities, fingerprints = self._changed_entities(entities)
+        if fingerprints is not None and not entities:
+            return _completed_future(ingester_pb2.IngestResponse(), callback)
+
+        request = self._build_request(entities, stream)
+        future = self._ingest_future(request, callback, compression)
+        if fingerprints:
+            future.add_done_callback(functools.partial(self._on_fingerprinted_future_done, fingerprints))
+        return future
+
+    def _on_fingerprinted_future_done(self, fingerprints: list[tuple[bytes, bytes]], future: concurrent.futures.Future):
+        """Record the fingerprints of the entities of a request once it succeeded."""
+        if not future.cancelled() and future.exception() is None:
+            self._record_fingerprints(fingerprints, future.result())
+
+    def ingest_many(
+        self,
+        batches: Iterable[Iterable[Entity | ingester_pb2.Entity | None]],
+        stream: str | None = _DEFAULT_STREAM,
+        callback: Callable[[concurrent.futures.Future], None] | None = None,
+        compression: grpc.Compression | None = None,
+    ) -> list[concurrent.futures.Future]:
+        """Ingest each batch of entities as a separate request without waiting, returns futures in batch order."""
+        return [self.ingest_future(batch, stream, callback, compression) for batch in batches]
+
+    def _ingest_future(
+        self,
+        request: ingester_pb2.IngestRequest,
+        callback: Callable[[concurrent.futures.Future], None] | None = None,
+        compression: grpc.Compression | None = None,
+    ) -> concurrent.futures.Future:
+        """Send an ingest request asynchronously, waiting for an in-flight slot if capped, errors fail the future."""
+        response = self._acked_response(request)
+        if response is not None:
+            return _completed_future(response, callback)
+
+        if self._in_flight is not None:
+            self._in_flight.acquire()
+
+        ingest_future = _IngestFuture(self, request, compression)
+        try:
+            if self._spool is not None:
+                record = self._spool.append(request, hold=True)
+                ingest_future.future.add_done_callback(functools.partial(self._on_spooled_future_done, record))
+            ingest_future.send()
+        except BaseException as err:
+            self._release_in_flight()
+            ingest_future.future.set_exception(err)
+            if not isinstance(err, Exception):
+                raise
+
+        if callback is not None:
+            ingest_future.future.add_done_callback(callback)
+        return ingest_future.future
+
+    def _send_future(
+        self,
+        request: ingester_pb2.IngestRequest,
+        timeout: float | None,
+        compression: grpc.Compression | None = None,
+        tried: set[str] | None = None,
+    ) -> grpc.Future:
+        """Send an ingest request over the channel, or a channel selected from the pool, without waiting."""
+        _QUEUED_AT.set(time.perf_counter())
+        request_size = request.ByteSize()
+        compression = self._call_compression(request_size, compression)
+        timeout, permit = self._acquire_call(timeout)
+        pooled = self._pool.acquire(tried or ()) if self._pool is not None else None
+        if pooled is not None and tried is not None:
+            tried.add(pooled.target.target)
+        stub = pooled.stub if pooled is not None else self._stub
+        self._call_started()
+        start = time.perf_counter()
+        try:
+            call = stub.Ingest.future(
+                request,
+                metadata=self._metadata,
+                timeout=timeout,
+                compression=compression,
+                wait_for_ready=self._wait_for_ready,
+            )
+        except BaseException as err:
+            self._call_finished(time.perf_counter() - start, request_size, err)
+            self._release_pooled(pooled)
+            self._release_limiter(err=err)
+            self._record_outcome(permit, err)
+            raise
+
+        def on_call_done(call: grpc.Future):
+            elapsed = time.perf_counter() - start
+            if call.cancelled():
+                self._call_finished(elapsed, request_size, concurrent.futures.CancelledError())
+                self._release_pooled(pooled)
+                self._release_limiter()
+                self._record_outcome(permit, concurrent.futures.CancelledError())
+            elif call.exception() is not None:
+                self._call_finished(elapsed, request_size, call.exception())
+                self._release_pooled(pooled, err=call.exception())
+                self._release_limiter(err=call.exception())
+                self._record_outcome(permit, call.exception())
+            else:
+                self._call_finished(elapsed, request_size)
+                self._release_pooled(pooled, latency=elapsed)
+                self._release_limiter(latency=elapsed)
+                self._record_outcome(permit)
+                self._record_call(request, request_size, compression, elapsed)
+
+        call.add_done_callback(on_call_done)
+        return call
+
+    def _on_spooled_future_done(self, record: "SpoolRecord", future: concurrent.futures.Future):
+        """Remove the request of an asynchronous request from the spool, unless it should be sent again."""
+        err = None if future.cancelled() else future.exception()
+        if err is None or not self._is_spool_retriable(err):
+            self._spool.ack(record)
+        self._spool.release(record)
+
+    def _acquire_call(self, timeout: float | None) -> "tuple[float | None, _Permit | None]":
+        """
+        Wait for the concurrency limiter and the circuit breaker to let a call through.
+
+        Returns the call timeout left and the circuit breaker permit of the call, if any.
+
+        Raises DiodeClientError with DEADLINE_EXCEEDED when the limiter does not admit the call within timeout, before
+        the circuit breaker is asked, so that calls never sent are not recorded as its outcomes.
+
+        """
+        if self._limiter is not None:
+            try:
+                waited = self._limiter.acquire(timeout)
+            except TimeoutError as err:
+                raise DiodeClientError(_DeadlineExceededError(str(err))) from err
+            if timeout is not None:
+                timeout = max(timeout - waited, 0.0)
+        try:
+            permit = self._allow_call()
+        except DiodeCircuitOpenError:
+            if self._limiter is not None:
+                self._limiter.release()
+            raise
+        return timeout, permit
+
+    def _release_limiter(self, latency: float | None = None, err: BaseException | None = None):
+        """Release a call from the concurrency limiter, RESOURCE_EXHAUSTED errors signal an overload."""
+        if self._limiter is None:
+            return
+        overloaded = (
+            isinstance(err, grpc.RpcError)
+            and callable(getattr(err, "code", None))
+            and err.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+        )
+        self._limiter.release(latency, overloaded)
+
+    def _release_pooled(
+        self, pooled: "PooledChannel | None", latency: float | None = None, err: BaseException | None = None
+    ):
+        """Release a pooled channel with the outcome of its RPC."""
+        if pooled is not None:
+            self._pool.release(pooled, latency, failed=_is_target_failure(err))
+
+    def _release_in_flight(self):
+        """Release the in-flight slot held by an asynchronous request."""
+        if self._in_flight is not None:
+            self._in_flight.release()
+
+    def batcher(self, **kwargs):
+        """
+        Create a batcher ingesting entities queued one at a time through this client.
+
+        Keyword arguments are passed to DiodeBatcher.
+
+        """
+        from netboxlabs.diode.sdk.batcher import DiodeBatcher
+
+        return DiodeBatcher(self, **kwargs)
+
+
+class _IngestFuture:
+    """
+    Asynchronous ingest request.
+
+    Sends the request, fails over to another target when the selected one cannot handle it, like DiodeClient.ingest(),
+    resends it on retriable errors according to the client retry policy, and resolves the future once the last attempt
+    is done.
+
+    """
+
+    def __init__(
+        self,
+        client: DiodeClient,
+        request: ingester_pb2.IngestRequest,
+        compression: grpc.Compression | None = None,
+    ):
+        """Initiate a new asynchronous ingest request."""
+        self._client = client
+        self._request = request
+        self._compression = compression
+        self._retry_policy = client._retry_policy
+        self._deadline = self._retry_policy.deadline() if self._retry_policy is not None else None
+        self._attempt = 1
+        # Targets the current attempt was sent to and number of sends, each attempt failing over to each target once
+        self._tried = set()
+        self._sends = 0
+        self._call = None
+        self.future = concurrent.futures.Future()
+        self.future.add_done_callback(self._on_future_done)
+
+    def send(self):
+        """Send the current attempt."""
+        timeout = self._retry_policy.attempt_timeout(self._deadline) if self._retry_policy is not None else None
+        self._sends += 1
+        call = self._client._send_future(self._request, timeout, self._compression, self._tried)
+        self._call = call
+        call.add_done_callback(self._on_call_done)
+
+    def _resend(self):
+        """Send a retry attempt, failing the future if it cannot be sent."""
+        if self.future.cancelled():
+            self._client._release_in_flight()
+            return
+        try:
+            self.send()
+        except Exception as err:
+            self._client._release_in_flight()
+            with contextlib.suppress(concurrent.futures.InvalidStateError):
+                self.future.set_exception(err)
+
+    def _on_call_done(self, call: grpc.Future):
+        """Fail over, retry or resolve the future once an attempt is done."""
+        err = None if call.cancelled() else call.exception()
+        if err is not None and not self.future.done() and self._fail_over(err):
+            return
+        if self._retry_policy is not None and err is not None and not self.future.done():
+            delay = self._retry_policy.retry_delay(err, self._attempt, self._deadline)
+            if delay is not None:
+                self._attempt += 1
+                self._tried = set()
+                self._sends = 0
+                self._client._record_retry()
+                timer = threading.Timer(delay, self._resend)
+                timer.daemon = True
+                timer.start()
+                return
+        self._client._release_in_flight()
+        if not call.cancelled() and call.exception() is None:
+            self._client._remember_ack(self._request, call.result())
+        _resolve_future(self.future, call)
+
+    def _fail_over(self, err: BaseException) -> bool:
+        """Resend the current attempt to a target not tried yet when the selected one cannot handle it."""
+        if not _is_target_failure(err) or self._sends >= len(self._client._targets):
+            return False
+        _LOGGER.debug(f"Ingest request {self._request.id} failed with {err.code()}, failing over")
+        self._client._record_retry()
+        # Resend from another thread, sending may wait on the concurrency limiter while called from a gRPC thread
+        threading.Thread(target=self._resend, daemon=True).start()
+        return True
+
+    def _on_future_done(self, future: concurrent.futures.Future):
+        """Cancel the current attempt when the future is cancelled."""
+        if future.cancelled() and self._call is not None:
+            self._call.cancel()
+
+
 class _ClientCallDetails(
     collections.namedtuple(
         "_ClientCallDetails",
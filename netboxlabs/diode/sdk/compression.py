@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs, Diode - SDK - Compression."""
+import threading
+import zlib
+
+import grpc
+
+# zlib wbits producing the gzip and deflate (zlib) formats gRPC uses for message compression
+_ZLIB_WBITS = {
+    grpc.Compression.Gzip: 16 + zlib.MAX_WBITS,
+    grpc.Compression.Deflate: zlib.MAX_WBITS,
+}
+
+
+def is_compressed(compression: grpc.Compression | None) -> bool:
+    """Check whether a compression algorithm actually compresses."""
+    return compression is not None and compression != grpc.Compression.NoCompression
+
+
+def compressed_size(data: bytes, compression: grpc.Compression | None) -> int:
+    """Return the size of data once compressed with the given algorithm."""
+    if not is_compressed(compression):
+        return len(data)
+    compressor = zlib.compressobj(wbits=_ZLIB_WBITS[compression])
+    return len(compressor.compress(data)) + len(compressor.flush())
+
+
+class AdaptiveCompression:
+    """
+    Adaptive Compression class.
+
+    Compresses an ingest request with the given algorithm only when it is worth it: requests smaller than min_size
+    bytes are never compressed. Requests of at least min_size bytes are always compressed unless
+    throughput_threshold (in bytes per second) is set, in which case they are compressed only while the measured
+    throughput of uncompressed requests is below the threshold, i.e. when the network link is the bottleneck.
+
+    The throughput is a moving average of request bytes per second of RPC time, smoothed with the given factor. While
+    requests are compressed, one in probe_interval is sent uncompressed to keep measuring it.
+
+    """
+
+    def __init__(
+        self,
+        algorithm: grpc.Compression = grpc.Compression.Gzip,
+        min_size: int = 1024,
+        throughput_threshold: float | None = None,
+        smoothing: float = 0.2,
+        probe_interval: int = 20,
+    ):
+        """Initiate a new adaptive compression."""
+        if not is_compressed(algorithm):
+            raise ValueError("algorithm should be grpc.Compression.Gzip or grpc.Compression.Deflate")
+        if min_size < 0:
+            raise ValueError("min_size should not be negative")
+        if not 0 < smoothing <= 1:
+            raise ValueError("smoothing should be within (0, 1]")
+        if probe_interval < 1:
+            raise ValueError("probe_interval should be at least 1")
+
+        self._algorithm = algorithm
+        self._min_size = min_size
+        self._throughput_threshold = throughput_threshold
+        self._smoothing = smoothing
+        self._probe_interval = probe_interval
+        self._throughput = None
+        self._compressed_since_probe = 0
+        self._lock = threading.Lock()
+
+    @property
+    def algorithm(self) -> grpc.Compression:
+        """Retrieve the compression algorithm."""
+        return self._algorithm
+
+    @property
+    def throughput(self) -> float | None:
+        """Retrieve the measured throughput of uncompressed requests, in bytes per second."""
+        return self._throughput
+
+    def select(self, request_size: int) -> grpc.Compression:
+        """Select the compression of a request of request_size bytes."""
+        if request_size < self._min_size:
+            return grpc.Compression.NoCompression
+        if self._throughput_threshold is None:
+            return self._algorithm
+        # Until uncompressed throughput is measured, send uncompressed
+        if self._throughput is None or self._throughput >= self._throughput_threshold:
+            return grpc.Compression.NoCompression
+        with self._lock:
+            self._compressed_since_probe += 1
+            if self._compressed_since_probe >= self._probe_interval:
+                self._compressed_since_probe = 0
+                return grpc.Compression.NoCompression
+        return self._algorithm
+
+    def observe(self, request_size: int, compression: grpc.Compression | None, elapsed: float):
+        """Record the RPC time of a request to update the measured throughput."""
+        if is_compressed(compression) or elapsed <= 0 or request_size < self._min_size:
+            return
+        throughput = request_size / elapsed
+        with self._lock:
+            if self._throughput is None:
+                self._throughput = throughput
+            else:
+                self._throughput += self._smoothing * (throughput - self._throughput)
+
+
+class CompressionStats:
+    """
+    Compression Stats class, cumulative request sizes before and after compression.
+
+    gRPC does not expose the size of compressed messages, measuring it takes compressing a request a second time. The
+    compressed size is only measured for one in sample_interval compressed requests, none by default, the compressed
+    size of the others being estimated from the compression ratio of the measured ones. Until a compressed request is
+    measured, sent_bytes and ratio are None.
+
+    """
+
+    def __init__(self, sample_interval: int = 0):
+        """Initiate new stats."""
+        if sample_interval < 0:
+            raise ValueError("sample_interval should not be negative")
+        self._sample_interval = sample_interval
+        self._until_sample = 1
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._compressed_requests = 0
+        self._sampled_requests = 0
+        self._request_bytes = 0
+        self._uncompressed_bytes = 0
+        self._compressed_bytes = 0
+        self._sampled_request_bytes = 0
+        self._sampled_sent_bytes = 0
+
+    def sample(self, compression: grpc.Compression | None) -> bool:
+        """Check whether the compressed size of a request compressed with compression should be measured."""
+        if not self._sample_interval or not is_compressed(compression):
+            return False
+        with self._lock:
+            self._until_sample -= 1
+            if self._until_sample > 0:
+                return False
+            self._until_sample = self._sample_interval
+            return True
+
+    def record(self, request_size: int, sent_size: int | None, compression: grpc.Compression | None):
+        """Record a request of request_size bytes, sent as sent_size bytes, None if its compressed size was not measured."""
+        with self._lock:
+            self._requests += 1
+            self._request_bytes += request_size
+            if not is_compressed(compression):
+                self._uncompressed_bytes += request_size
+                return
+            self._compressed_requests += 1
+            self._compressed_bytes += request_size
+            if sent_size is not None:
+                self._sampled_requests += 1
+                self._sampled_request_bytes += request_size
+                self._sampled_sent_bytes += sent_size
+
+    def snapshot(self) -> dict:
+        """Return the stats as a dict."""
+        with self._lock:
+            sent_bytes = self._uncompressed_bytes
+            if self._sampled_request_bytes:
+                sent_bytes += round(self._compressed_bytes * self._sampled_sent_bytes / self._sampled_request_bytes)
+            elif self._compressed_bytes:
+                sent_bytes = None
+            ratio = 1.0
+            if sent_bytes is None:
+                ratio = None
+            elif self._request_bytes:
+                ratio = sent_bytes / self._request_bytes
+            return {
+                "requests": self._requests,
+                "compressed_requests": self._compressed_requests,
+                "sampled_requests": self._sampled_requests,
+                "request_bytes": self._request_bytes,
+                "sent_bytes": sent_bytes,
+                "ratio": ratio,
+            }
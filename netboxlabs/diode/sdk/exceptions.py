@@ -3,9 +3,7 @@
 """NetBox Labs, Diode - SDK - Exceptions."""
 
 import grpc
-from google.protobuf.json_format import MessageToDict
 from grpc import RpcError
-from grpc_status import rpc_status
 
 
 class BaseError(Exception):
@@ -20,17 +18,45 @@ class DiodeConfigError(BaseError):
     pass
 
 
+class DiodeConnectionError(BaseError):
+    """Diode Connection Error."""
+
+    pass
+
+
+class DiodeBuildError(BaseError):
+    """Diode Build Error, raised from the error building the entities of a chunk."""
+
+    def __init__(self, index: int, chunk):
+        """Initialize DiodeBuildError."""
+        super().__init__(f"building chunk {index} failed")
+        self._index = index
+        self._chunk = chunk
+
+    @property
+    def index(self):
+        """Return the index of the chunk."""
+        return self._index
+
+    @property
+    def chunk(self):
+        """Return the chunk."""
+        return self._chunk
+
+
 class DiodeClientError(RpcError):
     """Diode Client Error."""
 
     _status_code = None
     _details = None
     _grpc_status = None
+    _err = None
 
     def __init__(self, err: RpcError):
         """Initialize DiodeClientError."""
         self._status_code = err.code()
         self._details = err.details()
+        self._err = err
 
     @property
     def status_code(self):
@@ -42,6 +68,36 @@ class DiodeClientError(RpcError):
         """Return error details."""
         return self._details
 
+    @property
+    def grpc_status(self):
+        """Return the rich error status (google.rpc.Status) sent by the server, if any."""
+        if self._grpc_status is None and callable(getattr(self._err, "trailing_metadata", None)):
+            # grpc_status is only imported when rich error details are read
+            from grpc_status import rpc_status
+
+            self._grpc_status = rpc_status.from_call(self._err)
+        return self._grpc_status
+
     def __repr__(self):
         """Return string representation."""
         return f"<DiodeClientError status code: {self._status_code}, details: {self._details}>"
+
+
+class DiodeCircuitOpenError(DiodeClientError):
+    """Diode Circuit Open Error, raised without sending the request while the circuit breaker is open."""
+
+    _status_code = grpc.StatusCode.UNAVAILABLE
+
+    def __init__(self, retry_after: float = 0.0):
+        """Initialize DiodeCircuitOpenError."""
+        self._retry_after = retry_after
+        self._details = f"circuit breaker open, retry after {retry_after:.1f}s"
+
+    @property
+    def retry_after(self):
+        """Return the time in seconds until the circuit breaker lets a probe call through."""
+        return self._retry_after
+
+    def __repr__(self):
+        """Return string representation."""
+        return f"<DiodeCircuitOpenError retry after: {self._retry_after:.1f}s>"
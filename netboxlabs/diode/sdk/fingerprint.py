@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs, Diode - SDK - Fingerprint cache."""
+import collections
+import hashlib
+import logging
+import os
+import struct
+import threading
+from collections.abc import Iterable
+
+from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+
+# Fields identifying an entity of each type, dotted paths into the entity message
+DEFAULT_IDENTITIES = {
+    "site": ("name",),
+    "platform": ("name",),
+    "manufacturer": ("name",),
+    "device": ("name", "site.name"),
+    "device_role": ("name",),
+    "device_type": ("model", "manufacturer.name"),
+    "interface": ("name", "device.name", "device.site.name"),
+    "ip_address": ("address", "interface.name", "interface.device.name"),
+    "prefix": ("prefix", "site.name"),
+    "cluster_group": ("name",),
+    "cluster_type": ("name",),
+    "cluster": ("name", "group.name", "site.name"),
+    "virtual_machine": ("name", "cluster.name"),
+    "vminterface": ("name", "virtual_machine.name"),
+    "virtual_disk": ("name", "virtual_machine.name"),
+}
+
+_DIGEST_SIZE = 16
+_FILE_MAGIC = b"DFPC\x01"
+_FILE_HEADER = struct.Struct(">5sQ")
+_LOGGER = logging.getLogger(__name__)
+
+
+def _field(message, path: str) -> str:
+    for name in path.split("."):
+        message = getattr(message, name)
+    return str(message)
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=_DIGEST_SIZE).digest()
+
+
+class FingerprintCache:
+    """
+    Fingerprint Cache class.
+
+    Remembers a fingerprint, a hash of the deterministic serialization, of the entities sent, keyed by their natural
+    identity, e.g. the name and site of a device, see DEFAULT_IDENTITIES, which identities overrides by entity type.
+    changed() drops the entities whose fingerprint did not change since they were last sent, and the client records
+    the fingerprints of the entities it sent with update() once the server acknowledged them without errors. Entity
+    timestamps are not part of fingerprints.
+
+    The cache keeps the maxsize most recently seen entities. With path, it is loaded from that file and saved to it by
+    save(), called when the client is closed. Collectors call next_cycle() before each collection cycle: with
+    resync_every, every resync_every-th cycle sends all entities, regardless of their fingerprint.
+
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1_000_000,
+        path: str | os.PathLike | None = None,
+        resync_every: int | None = None,
+        identities: dict[str, tuple[str, ...]] | None = None,
+    ):
+        """Initiate a new fingerprint cache."""
+        if maxsize < 1:
+            raise ValueError("maxsize should be at least 1")
+        if resync_every is not None and resync_every < 1:
+            raise ValueError("resync_every should be at least 1")
+
+        self._maxsize = maxsize
+        self._path = os.fspath(path) if path is not None else None
+        self._resync_every = resync_every
+        self._identities = {**DEFAULT_IDENTITIES, **(identities or {})}
+        self._fingerprints = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._cycle = 0
+        self._unchanged = 0
+        self._changed = 0
+        if self._path is not None and os.path.exists(self._path):
+            self._load()
+
+    @property
+    def cycle(self) -> int:
+        """Retrieve the current cycle number."""
+        return self._cycle
+
+    @property
+    def resyncing(self) -> bool:
+        """Retrieve whether the current cycle sends all entities."""
+        return self._resync_every is not None and self._cycle > 0 and self._cycle % self._resync_every == 0
+
+    def __len__(self) -> int:
+        """Return the number of fingerprints."""
+        return len(self._fingerprints)
+
+    def next_cycle(self) -> int:
+        """Start a new collection cycle, returns its number."""
+        with self._lock:
+            self._cycle += 1
+            return self._cycle
+
+    def changed(
+        self, entities: Iterable[ingester_pb2.Entity | None]
+    ) -> tuple[list[ingester_pb2.Entity | None], list[tuple[bytes, bytes]]]:
+        """Return the entities that changed since they were last sent, and their fingerprints to record once sent."""
+        keyed = []
+        for entity in entities:
+            kind = entity.WhichOneof("entity") if entity is not None else None
+            keyed.append((entity, self._fingerprint(kind, getattr(entity, kind)) if kind is not None else None))
+
+        resyncing = self.resyncing
+        changed = []
+        fingerprints = []
+        with self._lock:
+            for entity, key_fingerprint in keyed:
+                if key_fingerprint is None:
+                    changed.append(entity)
+                    continue
+                key, fingerprint = key_fingerprint
+                if not resyncing and self._fingerprints.get(key) == fingerprint:
+                    self._fingerprints.move_to_end(key)
+                    self._unchanged += 1
+                    continue
+                self._changed += 1
+                changed.append(entity)
+                fingerprints.append((key, fingerprint))
+        return changed, fingerprints
+
+    def update(self, fingerprints: Iterable[tuple[bytes, bytes]]):
+        """Record the fingerprints of entities sent."""
+        with self._lock:
+            for key, fingerprint in fingerprints:
+                self._fingerprints[key] = fingerprint
+                self._fingerprints.move_to_end(key)
+            while len(self._fingerprints) > self._maxsize:
+                self._fingerprints.popitem(last=False)
+
+    def save(self):
+        """Save the fingerprints to the cache file, if any."""
+        if self._path is None:
+            return
+        with self._lock:
+            data = b"".join(key + fingerprint for key, fingerprint in self._fingerprints.items())
+            cycle = self._cycle
+        tmp_path = f"{self._path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_FILE_HEADER.pack(_FILE_MAGIC, cycle))
+            f.write(data)
+        os.replace(tmp_path, self._path)
+
+    def snapshot(self) -> dict:
+        """Return the cache stats as a dict."""
+        with self._lock:
+            return {
+                "entries": len(self._fingerprints),
+                "cycle": self._cycle,
+                "unchanged": self._unchanged,
+                "changed": self._changed,
+            }
+
+    def _fingerprint(self, kind: str, message) -> tuple[bytes, bytes]:
+        """Return the identity key and fingerprint of an entity message."""
+        data = message.SerializeToString(deterministic=True)
+        fingerprint = _digest(data)
+        values = [_field(message, path) for path in self._identities.get(kind, ())]
+        if not any(values):
+            # Without an identity, an entity is only known by its content
+            return _digest(kind.encode() + b"\0" + fingerprint), fingerprint
+        return _digest("\0".join([kind, *values]).encode()), fingerprint
+
+    def _load(self):
+        with open(self._path, "rb") as f:
+            data = f.read()
+        if len(data) < _FILE_HEADER.size or data[:len(_FILE_MAGIC)] != _FILE_MAGIC:
+            _LOGGER.warning(f"Ignoring invalid fingerprint cache file {self._path}")
+            return
+        _, self._cycle = _FILE_HEADER.unpack_from(data)
+        record_size = 2 * _DIGEST_SIZE
+        end = len(data) - (len(data) - _FILE_HEADER.size) % record_size
+        for offset in range(_FILE_HEADER.size, end, record_size):
+            self._fingerprints[data[offset:offset + _DIGEST_SIZE]] = data[offset + _DIGEST_SIZE:offset + record_size]
+        while len(self._fingerprints) > self._maxsize:
+            self._fingerprints.popitem(last=False)
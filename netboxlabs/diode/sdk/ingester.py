@@ -1,8 +1,17 @@
 #!/usr/bin/env python
 # Copyright 2024 NetBox Labs Inc
 """NetBox Labs, Diode - SDK - ingester protobuf message wrappers."""
+import collections
+import functools
+import inspect
+import itertools
+import linecache
+import typing
+from collections.abc import Iterable, Iterator, Mapping
 from typing import Any
 
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import message as _message
 from google.protobuf import timestamp_pb2 as _timestamp_pb2
 
 # ruff: noqa: I001
@@ -34,7 +43,411 @@ def convert_to_protobuf(value: Any, protobuf_class, **kwargs):
     return value
 
 
-class Tag:
+# The messages built by wrappers, by full name
+_MESSAGE_CLASSES = {
+    message_class.DESCRIPTOR.full_name: message_class
+    for message_class in (
+        ClusterPb,
+        ClusterGroupPb,
+        ClusterTypePb,
+        DevicePb,
+        DeviceTypePb,
+        EntityPb,
+        IPAddressPb,
+        InterfacePb,
+        ManufacturerPb,
+        PlatformPb,
+        PrefixPb,
+        RolePb,
+        SitePb,
+        TagPb,
+        VirtualDiskPb,
+        VMInterfacePb,
+        VirtualMachinePb,
+    )
+}
+
+
+def _is_repeated(field) -> bool:
+    # Newer protobuf versions replaced FieldDescriptor.label with is_repeated
+    if hasattr(field, "is_repeated"):
+        return field.is_repeated
+    return field.label == field.LABEL_REPEATED
+
+
+def _string_field(message_class) -> str | None:
+    """Return the first string field of a message, set to the string the message is built from by wrappers."""
+    for field in message_class.DESCRIPTOR.fields:
+        if field.type == field.TYPE_STRING and not _is_repeated(field):
+            return field.name
+    return None
+
+
+def _annotated_message_class(annotation) -> type | None:
+    """Return the protobuf message class of a wrapper parameter annotation, if any."""
+    for arg in typing.get_args(annotation):
+        if isinstance(arg, type) and issubclass(arg, _message.Message):
+            return arg
+    return None
+
+
+def _from_string(message_class, value: str, context: dict[str, str]) -> str:
+    """Return the source of the expression building a message from the string value and its context parameters."""
+    args = ", ".join([f"{_string_field(message_class)}={value}", *(f"{field}={param}" for field, param in context.items())])
+    return f"{message_class.__name__}Pb({args})"
+
+
+def _conversion_order(params: list[str], context: dict[str, dict[str, str]]) -> list[str]:
+    """Order parameters so that the parameters in the context of another one come first."""
+    order = []
+
+    def visit(param: str):
+        if param not in order:
+            for source in context.get(param, {}).values():
+                visit(source)
+            order.append(param)
+
+    for param in params:
+        visit(param)
+    return order
+
+
+def _param_message_class(protobuf_class, declared, name: str) -> type | None:
+    """Return the message class of a wrapper parameter, from its field or, for context parameters, its annotation."""
+    field = protobuf_class.DESCRIPTOR.fields_by_name.get(name)
+    if field is not None:
+        return _MESSAGE_CLASSES.get(field.message_type.full_name) if field.message_type is not None else None
+    message_class = _annotated_message_class(declared.__annotations__.get(name))
+    if message_class is None:
+        raise TypeError(f"{name} is neither a {protobuf_class.DESCRIPTOR.name} field nor a message")
+    return message_class
+
+
+def _conversion_source(
+    protobuf_class, declared, name: str, context: dict[str, dict[str, str]], fill_in: tuple[str, ...]
+) -> list[str]:
+    """Return the source lines building the messages of a wrapper parameter given as strings."""
+    message_class = _param_message_class(protobuf_class, declared, name)
+    if message_class is None or _string_field(message_class) is None:
+        return []
+
+    field = protobuf_class.DESCRIPTOR.fields_by_name.get(name)
+    if field is not None and _is_repeated(field):
+        return [
+            f"    if isinstance({name}, list) and all(isinstance(value, str) for value in {name}):",
+            f"        {name} = [{_from_string(message_class, 'value', {})} for value in {name}]",
+        ]
+    lines = [
+        f"    if isinstance({name}, str):",
+        f"        {name} = {_from_string(message_class, name, context.get(name, {}))}",
+    ]
+    if name in fill_in:
+        lines.append(f"    elif isinstance({name}, {message_class.__name__}Pb):")
+        for target, source in context[name].items():
+            lines += [
+                f"        if {source} is not None and not {name}.HasField({target!r}):",
+                f"            {name}.{target}.CopyFrom({source})",
+            ]
+    return lines
+
+
+def _message_wrapper(
+    protobuf_class, context: dict[str, dict[str, str]] | None = None, fill_in: tuple[str, ...] = ()
+):
+    """
+    Generate the __new__ of a message wrapper from its declared signature and the descriptor of protobuf_class.
+
+    The generated __new__ builds the messages given as strings, setting their first string field and the fields in
+    their context, from the parameters named, e.g. the manufacturer of the platform of a device. The parameters in
+    fill_in given as messages get the fields in their context they are missing. The protobuf_class message is then
+    built from the parameters named after its fields, only passing those that are set.
+
+    __new__ is generated on first use, keeping the cost of generating it off the import of the module.
+
+    """
+    context = context or {}
+
+    def decorate(cls):
+        cls._protobuf_class = protobuf_class
+        cls._context = context
+        cls._fill_in = fill_in
+        cls._declared_new = cls.__new__
+        _reset_wrapper(cls)
+        return cls
+
+    return decorate
+
+
+def _reset_wrapper(cls):
+    """Set the __new__ of a wrapper to its declared __new__, generating the actual one on first call."""
+    declared = cls._declared_new
+
+    def __new__(*args, **kwargs):
+        generated = _generate_new(cls)
+        cls.__new__ = staticmethod(generated)
+        return generated(*args, **kwargs)
+
+    cls.__new__ = staticmethod(functools.update_wrapper(__new__, declared))
+
+
+def _generate_new(cls):
+    """Generate the __new__ of a wrapper, see _message_wrapper()."""
+    protobuf_class = cls._protobuf_class
+    declared = cls._declared_new
+    params = list(inspect.signature(declared).parameters)[1:]
+    fields = protobuf_class.DESCRIPTOR.fields_by_name
+    body = []
+    for name in _conversion_order(params, cls._context):
+        body += _conversion_source(protobuf_class, declared, name, cls._context, cls._fill_in)
+    body.append("    fields = {}")
+    for name in params:
+        if name in fields:
+            body += [f"    if {name} is not None:", f"        fields[{name!r}] = {name}"]
+    body.append(f"    return {protobuf_class.__name__}Pb(**fields)")
+
+    signature = ", ".join(["cls", *(f"{name}=None" for name in params)])
+    source = "\n".join([f"def __new__({signature}):", *body]) + "\n"
+    # Tracebacks show the generated source, registered under a name of its own
+    filename = f"<generated {cls.__module__}.{cls.__qualname__}.__new__>"
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+    namespace = {}
+    exec(compile(source, filename, "exec"), globals(), namespace)
+    return functools.update_wrapper(namespace["__new__"], declared)
+
+
+def _batch_size(batch_size: int | None) -> int | None:
+    if batch_size is not None and batch_size < 1:
+        raise ValueError("batch_size should be at least 1")
+    return batch_size
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    items = iter(items)
+    while chunk := list(itertools.islice(items, size)):
+        yield chunk
+
+
+def _column_values(column) -> list:
+    """Return the values of a column as a list, missing values being None."""
+    if hasattr(column, "to_pylist"):
+        # pyarrow arrays, whose nulls are converted to None
+        return column.to_pylist()
+    if hasattr(column, "notna"):
+        # pandas Series, whose missing values are NaN, NaT or NA
+        return column.astype(object).where(column.notna(), None).tolist()
+    if hasattr(column, "tolist"):
+        # NumPy arrays, whose missing values are NaN
+        return [None if isinstance(value, float) and value != value else value for value in column.tolist()]
+    return list(column)
+
+
+_INTEGER_TYPES = (
+    _descriptor.FieldDescriptor.CPPTYPE_INT32,
+    _descriptor.FieldDescriptor.CPPTYPE_INT64,
+    _descriptor.FieldDescriptor.CPPTYPE_UINT32,
+    _descriptor.FieldDescriptor.CPPTYPE_UINT64,
+)
+
+
+def _integer_values(values: list) -> list:
+    """Return the values of an integer column, floats such as the values of columns with missing values made int."""
+    if not any(isinstance(value, float) for value in values):
+        return values
+    # Integer columns with missing values are read as floats, NaN being missing
+    return [
+        (None if value != value else int(value) if value.is_integer() else value) if isinstance(value, float) else value
+        for value in values
+    ]
+
+
+def _columns(data) -> dict[str, list]:
+    """Return the columns of a mapping of sequences, a pandas DataFrame or a pyarrow Table or RecordBatch as lists."""
+    if hasattr(data, "to_pydict"):
+        return data.to_pydict()
+    if hasattr(data, "notna") and hasattr(data, "columns"):
+        return {name: _column_values(data[name]) for name in data.columns}
+    columns = {name: _column_values(column) for name, column in data.items()}
+    if len({len(values) for values in columns.values()}) > 1:
+        raise ValueError("columns should have the same length")
+    return columns
+
+
+class _BulkBuilder:
+    """Builds the messages of a wrapper from columns, building related messages once per distinct value."""
+
+    def __init__(self, wrapper: type, as_entities: bool = False):
+        if as_entities and wrapper._protobuf_class is not EntityPb and wrapper._protobuf_class not in _ENTITY_FIELDS:
+            raise TypeError(f"cannot wrap {wrapper._protobuf_class.__name__} messages in entities")
+        self._as_entities = as_entities and wrapper._protobuf_class is not EntityPb
+        self._wrapper = wrapper
+        self._protobuf_class = wrapper._protobuf_class
+        self._context = wrapper._context
+        self._params = list(inspect.signature(wrapper.__new__).parameters)[1:]
+        self._order = _conversion_order(self._params, self._context)
+        self._caches = collections.defaultdict(dict)
+
+    def check(self, columns: dict[str, list]):
+        """Check that columns are parameters of the wrapper."""
+        unknown = sorted(set(columns) - set(self._params))
+        if unknown:
+            raise TypeError(f"{self._wrapper.__name__} has no parameters {', '.join(map(repr, unknown))}")
+
+    def build(self, columns: dict[str, list], rows: int) -> list[_message.Message]:
+        """Build the messages of the rows of columns, wrapped in Entity messages with as_entities."""
+        self.check(columns)
+        resolved = dict(columns)
+        for name in self._order:
+            if name in columns:
+                resolved[name] = self._resolve(name, columns, resolved)
+
+        fields = self._protobuf_class.DESCRIPTOR.fields_by_name
+        names = [name for name in self._params if name in columns and name in fields]
+        for name in names:
+            if fields[name].cpp_type in _INTEGER_TYPES and not _is_repeated(fields[name]):
+                resolved[name] = _integer_values(resolved[name])
+        rows = zip(*(resolved[name] for name in names)) if names else itertools.repeat((), rows)
+        if self._as_entities:
+            # Entities are built from the fields of the wrapped messages, sparing a copy of each message
+            field = _ENTITY_FIELDS[self._protobuf_class]
+            return [
+                EntityPb(**{field: {name: value for name, value in zip(names, row) if value is not None}})
+                for row in rows
+            ]
+        protobuf_class = self._protobuf_class
+        return [protobuf_class(**{name: value for name, value in zip(names, row) if value is not None}) for row in rows]
+
+    def _dependencies(self, name: str, columns: dict[str, list]) -> list[str]:
+        """Return the columns a related message built from a string depends on, itself included."""
+        dependencies = [name]
+        for source in self._context.get(name, {}).values():
+            if source in columns:
+                for dependency in self._dependencies(source, columns):
+                    if dependency not in dependencies:
+                        dependencies.append(dependency)
+        return dependencies
+
+    def _resolve(self, name: str, columns: dict[str, list], resolved: dict[str, list]) -> list:
+        """Return the values of a column, with the related messages given as strings built."""
+        message_class = _param_message_class(self._protobuf_class, self._wrapper.__new__.__wrapped__, name)
+        if message_class is None or _string_field(message_class) is None:
+            return columns[name]
+        field = self._protobuf_class.DESCRIPTOR.fields_by_name.get(name)
+        if field is not None and _is_repeated(field):
+            return self._resolve_lists(name, message_class, columns[name])
+        return self._resolve_messages(name, message_class, columns, resolved)
+
+    def _resolve_messages(self, name: str, message_class, columns: dict[str, list], resolved: dict[str, list]) -> list:
+        """Return the values of a column of related messages, built once per distinct value and context."""
+        string_field = _string_field(message_class)
+        cache = self._caches[name]
+        context = [(target, source) for target, source in self._context.get(name, {}).items() if source in columns]
+        fill_in = context if name in self._wrapper._fill_in else []
+        keys = zip(*(columns[dependency] for dependency in self._dependencies(name, columns)))
+        sources = zip(*(resolved[source] for _, source in context)) if context else itertools.repeat(())
+        values = []
+        for value, key, source_values in zip(columns[name], keys, sources):
+            if isinstance(value, str):
+                try:
+                    message = cache.get(key)
+                except TypeError:
+                    # Context given as messages, which are not hashable
+                    key, message = None, None
+                if message is None:
+                    kwargs = {target: source for (target, _), source in zip(context, source_values) if source is not None}
+                    message = message_class(**{string_field: value}, **kwargs)
+                    if key is not None:
+                        cache[key] = message
+                value = message
+            elif fill_in and isinstance(value, message_class):
+                for (target, _), source in zip(fill_in, source_values):
+                    if source is not None and not value.HasField(target):
+                        getattr(value, target).CopyFrom(source)
+            values.append(value)
+        return values
+
+    def _resolve_lists(self, name: str, message_class, column: list) -> list:
+        """Return the values of a column of lists, with the lists of strings converted to lists of messages."""
+        string_field = _string_field(message_class)
+        cache = self._caches[name]
+        values = []
+        for value in column:
+            if isinstance(value, list) and all(isinstance(item, str) for item in value):
+                messages = []
+                for item in value:
+                    message = cache.get(item)
+                    if message is None:
+                        message = cache[item] = message_class(**{string_field: item})
+                    messages.append(message)
+                value = messages
+            values.append(value)
+        return values
+
+
+class _MessageWrapper:
+    """Base class of the message wrappers, whose __new__ is generated by _message_wrapper()."""
+
+    _protobuf_class = None
+    _context = {}
+    _fill_in = ()
+
+    @classmethod
+    def from_columns(
+        cls, columns, batch_size: int | None = None, as_entities: bool = False
+    ) -> list[_message.Message] | Iterator[list[_message.Message]]:
+        """
+        Build messages from columns of parameter values.
+
+        columns maps parameter names to sequences of values, such as lists, NumPy arrays or pandas Series, or is a
+        pandas DataFrame or a pyarrow Table or RecordBatch. Missing values (None, NaN, nulls) leave parameters unset.
+        Related messages given as strings, e.g. sites, are built once per distinct value and context. Returns the
+        messages, or with batch_size, an iterator over lists of at most batch_size messages. With as_entities, the
+        messages are wrapped in Entity messages, faster than wrapping them with Entity.wrap_many().
+
+        """
+        batch_size = _batch_size(batch_size)
+        columns = _columns(columns)
+        builder = _BulkBuilder(cls, as_entities)
+        builder.check(columns)
+        rows = len(next(iter(columns.values()), ()))
+        if batch_size is None:
+            return builder.build(columns, rows)
+        return (
+            builder.build(
+                {name: values[start:start + batch_size] for name, values in columns.items()},
+                min(batch_size, rows - start),
+            )
+            for start in range(0, rows, batch_size)
+        )
+
+    @classmethod
+    def from_records(
+        cls, records: Iterable[Mapping[str, Any]], batch_size: int | None = None, as_entities: bool = False
+    ) -> list[_message.Message] | Iterator[list[_message.Message]]:
+        """
+        Build messages from records, mappings of parameter names to values, such as the rows of a csv.DictReader.
+
+        See from_columns(). With batch_size, records are consumed batch_size at a time.
+
+        """
+        batch_size = _batch_size(batch_size)
+        builder = _BulkBuilder(cls, as_entities)
+        if batch_size is None:
+            records = list(records)
+            return builder.build(_record_columns(records), len(records))
+        return (builder.build(_record_columns(chunk), len(chunk)) for chunk in _chunks(records, batch_size))
+
+
+def _record_columns(records: list[Mapping[str, Any]]) -> dict[str, list]:
+    names = dict.fromkeys(name for record in records for name in record)
+    return {name: [record.get(name) for record in records] for name in names}
+
+
+# Wrappers setting the manufacturer given to the platform and device type
+_MANUFACTURER = {"manufacturer": "manufacturer"}
+
+
+@_message_wrapper(TagPb)
+class Tag(_MessageWrapper):
     """Tag message wrapper."""
 
     def __new__(
@@ -44,10 +457,10 @@ class Tag:
         color: str | None = None,
     ) -> TagPb:
         """Create a new Tag protobuf message."""
-        return TagPb(name=name, slug=slug, color=color)
 
 
-class Manufacturer:
+@_message_wrapper(ManufacturerPb)
+class Manufacturer(_MessageWrapper):
     """Manufacturer message wrapper."""
 
     def __new__(
@@ -58,18 +471,10 @@ class Manufacturer:
         tags: list[str | Tag | TagPb] | None = None,
     ) -> ManufacturerPb:
         """Create a new Manufacturer protobuf message."""
-        if isinstance(tags, list) and all(isinstance(t, str) for t in tags):
-            tags = [TagPb(name=tag) for tag in tags]
-
-        return ManufacturerPb(
-            name=name,
-            slug=slug,
-            description=description,
-            tags=tags,
-        )
 
 
-class Platform:
+@_message_wrapper(PlatformPb)
+class Platform(_MessageWrapper):
     """Platform message wrapper."""
 
     def __new__(
@@ -81,23 +486,10 @@ class Platform:
         tags: list[str | Tag | TagPb] | None = None,
     ) -> PlatformPb:
         """Create a new Platform protobuf message."""
-        manufacturer = convert_to_protobuf(
-            manufacturer, ManufacturerPb, name=manufacturer
-        )
 
-        if isinstance(tags, list) and all(isinstance(t, str) for t in tags):
-            tags = [TagPb(name=tag) for tag in tags]
 
-        return PlatformPb(
-            name=name,
-            slug=slug,
-            manufacturer=manufacturer,
-            description=description,
-            tags=tags,
-        )
-
-
-class Role:
+@_message_wrapper(RolePb)
+class Role(_MessageWrapper):
     """Role message wrapper."""
 
     def __new__(
@@ -109,19 +501,10 @@ class Role:
         tags: list[str | Tag | TagPb] | None = None,
     ) -> RolePb:
         """Create a new Role protobuf message."""
-        if isinstance(tags, list) and all(isinstance(t, str) for t in tags):
-            tags = [TagPb(name=tag) for tag in tags]
-
-        return RolePb(
-            name=name,
-            slug=slug,
-            color=color,
-            description=description,
-            tags=tags,
-        )
 
 
-class DeviceType:
+@_message_wrapper(DeviceTypePb)
+class DeviceType(_MessageWrapper):
     """DeviceType message wrapper."""
 
     def __new__(
@@ -135,25 +518,14 @@ class DeviceType:
         tags: list[str | Tag | TagPb] | None = None,
     ) -> DeviceTypePb:
         """Create a new DeviceType protobuf message."""
-        manufacturer = convert_to_protobuf(
-            manufacturer, ManufacturerPb, name=manufacturer
-        )
-
-        if isinstance(tags, list) and all(isinstance(t, str) for t in tags):
-            tags = [TagPb(name=tag) for tag in tags]
-
-        return DeviceTypePb(
-            model=model,
-            slug=slug,
-            manufacturer=manufacturer,
-            description=description,
-            comments=comments,
-            part_number=part_number,
-            tags=tags,
-        )
 
 
-class Device:
+@_message_wrapper(
+    DevicePb,
+    context={"platform": _MANUFACTURER, "device_type": _MANUFACTURER},
+    fill_in=("platform", "device_type"),
+)
+class Device(_MessageWrapper):
     """Device message wrapper."""
 
     def __new__(
@@ -175,59 +547,18 @@ class Device:
         manufacturer: str | Manufacturer | ManufacturerPb | None = None,
     ) -> DevicePb:
         """Create a new Device protobuf message."""
-        manufacturer = convert_to_protobuf(
-            manufacturer, ManufacturerPb, name=manufacturer
-        )
-        platform = convert_to_protobuf(
-            platform, PlatformPb, name=platform, manufacturer=manufacturer
-        )
-
-        if (
-            isinstance(platform, PlatformPb)
-            and not platform.HasField("manufacturer")
-            and manufacturer is not None
-        ):
-            platform.manufacturer.CopyFrom(manufacturer)
-
-        site = convert_to_protobuf(site, SitePb, name=site)
-        device_type = convert_to_protobuf(
-            device_type, DeviceTypePb, model=device_type, manufacturer=manufacturer
-        )
-
-        if (
-            isinstance(device_type, DeviceTypePb)
-            and not device_type.HasField("manufacturer")
-            and manufacturer is not None
-        ):
-            device_type.manufacturer.CopyFrom(manufacturer)
-
-        role = convert_to_protobuf(role, RolePb, name=role)
-
-        if isinstance(tags, list) and all(isinstance(t, str) for t in tags):
-            tags = [TagPb(name=tag) for tag in tags]
-
-        primary_ip4 = convert_to_protobuf(primary_ip4, IPAddressPb, address=primary_ip4)
-        primary_ip6 = convert_to_protobuf(primary_ip6, IPAddressPb, address=primary_ip6)
-
-        return DevicePb(
-            name=name,
-            device_fqdn=device_fqdn,
-            device_type=device_type,
-            role=role,
-            platform=platform,
-            serial=serial,
-            site=site,
-            asset_tag=asset_tag,
-            status=status,
-            description=description,
-            comments=comments,
-            primary_ip4=primary_ip4,
-            primary_ip6=primary_ip6,
-            tags=tags,
-        )
 
 
-class Interface:
+@_message_wrapper(
+    InterfacePb,
+    context={
+        "platform": _MANUFACTURER,
+        "device_type": _MANUFACTURER,
+        "device": {"device_type": "device_type", "platform": "platform", "site": "site", "role": "role"},
+    },
+    fill_in=("platform", "device_type"),
+)
+class Interface(_MessageWrapper):
     """Interface message wrapper."""
 
     def __new__(
@@ -252,67 +583,19 @@ class Interface:
         tags: list[str | Tag | TagPb] | None = None,
     ) -> InterfacePb:
         """Create a new Interface protobuf message."""
-        manufacturer = convert_to_protobuf(
-            manufacturer, ManufacturerPb, name=manufacturer
-        )
-
-        platform = convert_to_protobuf(
-            platform, PlatformPb, name=platform, manufacturer=manufacturer
-        )
-
-        if (
-            isinstance(platform, PlatformPb)
-            and not platform.HasField("manufacturer")
-            and manufacturer is not None
-        ):
-            platform.manufacturer.CopyFrom(manufacturer)
-
-        site = convert_to_protobuf(site, SitePb, name=site)
-
-        device_type = convert_to_protobuf(
-            device_type, DeviceTypePb, model=device_type, manufacturer=manufacturer
-        )
-
-        if (
-            isinstance(device_type, DeviceTypePb)
-            and not device_type.HasField("manufacturer")
-            and manufacturer is not None
-        ):
-            device_type.manufacturer.CopyFrom(manufacturer)
-
-        role = convert_to_protobuf(role, RolePb, name=role)
-
-        device = convert_to_protobuf(
-            device,
-            DevicePb,
-            name=device,
-            device_type=device_type,
-            platform=platform,
-            site=site,
-            role=role,
-        )
-
-        if isinstance(tags, list) and all(isinstance(t, str) for t in tags):
-            tags = [TagPb(name=tag) for tag in tags]
-
-        return InterfacePb(
-            name=name,
-            device=device,
-            type=type,
-            enabled=enabled,
-            mtu=mtu,
-            mac_address=mac_address,
-            speed=speed,
-            wwn=wwn,
-            mgmt_only=mgmt_only,
-            description=description,
-            mark_connected=mark_connected,
-            mode=mode,
-            tags=tags,
-        )
 
 
-class IPAddress:
+@_message_wrapper(
+    IPAddressPb,
+    context={
+        "platform": _MANUFACTURER,
+        "device_type": _MANUFACTURER,
+        "device": {"device_type": "device_type", "platform": "platform", "site": "site", "role": "device_role"},
+        "interface": {"device": "device"},
+    },
+    fill_in=("platform", "device_type"),
+)
+class IPAddress(_MessageWrapper):
     """IPAddress message wrapper."""
 
     def __new__(
@@ -333,69 +616,10 @@ class IPAddress:
         tags: list[str | Tag | TagPb] | None = None,
     ) -> IPAddressPb:
         """Create a new IPAddress protobuf message."""
-        manufacturer = convert_to_protobuf(
-            manufacturer, ManufacturerPb, name=manufacturer
-        )
-
-        platform = convert_to_protobuf(
-            platform, PlatformPb, name=platform, manufacturer=manufacturer
-        )
-
-        if (
-            isinstance(platform, PlatformPb)
-            and not platform.HasField("manufacturer")
-            and manufacturer is not None
-        ):
-            platform.manufacturer.CopyFrom(manufacturer)
 
-        site = convert_to_protobuf(site, SitePb, name=site)
 
-        device_type = convert_to_protobuf(
-            device_type, DeviceTypePb, model=device_type, manufacturer=manufacturer
-        )
-
-        if (
-            isinstance(device_type, DeviceTypePb)
-            and not device_type.HasField("manufacturer")
-            and manufacturer is not None
-        ):
-            device_type.manufacturer.CopyFrom(manufacturer)
-
-        device_role = convert_to_protobuf(device_role, RolePb, name=device_role)
-
-        device = convert_to_protobuf(
-            device,
-            DevicePb,
-            name=device,
-            device_type=device_type,
-            platform=platform,
-            site=site,
-            role=device_role,
-        )
-
-        interface = convert_to_protobuf(
-            interface,
-            InterfacePb,
-            name=interface,
-            device=device,
-        )
-
-        if isinstance(tags, list) and all(isinstance(t, str) for t in tags):
-            tags = [TagPb(name=tag) for tag in tags]
-
-        return IPAddressPb(
-            address=address,
-            interface=interface,
-            status=status,
-            role=role,
-            dns_name=dns_name,
-            description=description,
-            comments=comments,
-            tags=tags,
-        )
-
-
-class Prefix:
+@_message_wrapper(PrefixPb)
+class Prefix(_MessageWrapper):
     """Prefix message wrapper."""
 
     def __new__(
@@ -410,24 +634,10 @@ class Prefix:
         tags: list[str | Tag | TagPb] | None = None,
     ) -> PrefixPb:
         """Create a new Prefix protobuf message."""
-        site = convert_to_protobuf(site, SitePb, name=site)
-
-        if isinstance(tags, list) and all(isinstance(t, str) for t in tags):
-            tags = [TagPb(name=tag) for tag in tags]
-
-        return PrefixPb(
-            prefix=prefix,
-            site=site,
-            status=status,
-            is_pool=is_pool,
-            mark_utilized=mark_utilized,
-            description=description,
-            comments=comments,
-            tags=tags,
-        )
 
 
-class Site:
+@_message_wrapper(SitePb)
+class Site(_MessageWrapper):
     """Site message wrapper."""
 
     def __new__(
@@ -442,22 +652,10 @@ class Site:
         tags: list[str | Tag | TagPb] | None = None,
     ) -> SitePb:
         """Create a new Site protobuf message."""
-        if isinstance(tags, list) and all(isinstance(t, str) for t in tags):
-            tags = [TagPb(name=tag) for tag in tags]
-
-        return SitePb(
-            name=name,
-            slug=slug,
-            status=status,
-            facility=facility,
-            time_zone=time_zone,
-            description=description,
-            comments=comments,
-            tags=tags,
-        )
 
 
-class ClusterGroup:
+@_message_wrapper(ClusterGroupPb)
+class ClusterGroup(_MessageWrapper):
     """ClusterGroup message wrapper."""
 
     def __new__(
@@ -468,18 +666,10 @@ class ClusterGroup:
         tags: list[str | Tag | TagPb] | None = None,
     ) -> ClusterGroupPb:
         """Create a new cluster group protobuf message."""
-        if isinstance(tags, list) and all(isinstance(t, str) for t in tags):
-            tags = [TagPb(name=tag) for tag in tags]
-
-        return ClusterGroupPb(
-            name=name,
-            slug=slug,
-            description=description,
-            tags=tags,
-        )
 
 
-class ClusterType:
+@_message_wrapper(ClusterTypePb)
+class ClusterType(_MessageWrapper):
     """ClusterType message wrapper."""
 
     def __new__(
@@ -490,18 +680,10 @@ class ClusterType:
         tags: list[str | Tag | TagPb] | None = None,
     ) -> ClusterTypePb:
         """Create a new cluster type protobuf message."""
-        if isinstance(tags, list) and all(isinstance(t, str) for t in tags):
-            tags = [TagPb(name=tag) for tag in tags]
-
-        return ClusterTypePb(
-            name=name,
-            slug=slug,
-            description=description,
-            tags=tags,
-        )
 
 
-class Cluster:
+@_message_wrapper(ClusterPb)
+class Cluster(_MessageWrapper):
     """Cluster message wrapper."""
 
     def __new__(
@@ -515,27 +697,14 @@ class Cluster:
         tags: list[str | Tag | TagPb] | None = None,
     ) -> ClusterPb:
         """Create a new cluster protobuf message."""
-        group = convert_to_protobuf(group, ClusterGroupPb, name=group)
 
-        type = convert_to_protobuf(type, ClusterTypePb, name=type)
 
-        site = convert_to_protobuf(site, SitePb, name=site)
-
-        if isinstance(tags, list) and all(isinstance(t, str) for t in tags):
-            tags = [TagPb(name=tag) for tag in tags]
-
-        return ClusterPb(
-            name=name,
-            group=group,
-            type=type,
-            site=site,
-            status=status,
-            description=description,
-            tags=tags,
-        )
-
-
-class VirtualMachine:
+@_message_wrapper(
+    VirtualMachinePb,
+    context={"cluster": {"site": "site"}, "device": {"platform": "platform", "site": "site", "role": "role"}},
+    fill_in=("cluster",),
+)
+class VirtualMachine(_MessageWrapper):
     """VirtualMachine message wrapper."""
 
     def __new__(
@@ -557,51 +726,10 @@ class VirtualMachine:
         tags: list[str | Tag | TagPb] | None = None,
     ) -> VirtualMachinePb:
         """Create a new virtual machine protobuf message."""
-        site = convert_to_protobuf(site, SitePb, name=site)
-
-        cluster = convert_to_protobuf(cluster, ClusterPb, name=cluster, site=site)
-
-        if (
-            isinstance(cluster, ClusterPb)
-            and not cluster.HasField("site")
-            and site is not None
-        ):
-            cluster.site.CopyFrom(site)
 
-        role = convert_to_protobuf(role, RolePb, name=role)
 
-        platform = convert_to_protobuf(platform, PlatformPb, name=platform)
-
-        device = convert_to_protobuf(
-            device, DevicePb, name=device, platform=platform, site=site, role=role
-        )
-
-        primary_ip4 = convert_to_protobuf(primary_ip4, IPAddressPb, address=primary_ip4)
-        primary_ip6 = convert_to_protobuf(primary_ip6, IPAddressPb, address=primary_ip6)
-
-        if isinstance(tags, list) and all(isinstance(t, str) for t in tags):
-            tags = [TagPb(name=tag) for tag in tags]
-
-        return VirtualMachinePb(
-            name=name,
-            status=status,
-            cluster=cluster,
-            site=site,
-            role=role,
-            device=device,
-            platform=platform,
-            primary_ip4=primary_ip4,
-            primary_ip6=primary_ip6,
-            vcpus=vcpus,
-            memory=memory,
-            disk=disk,
-            description=description,
-            comments=comments,
-            tags=tags,
-        )
-
-
-class VirtualDisk:
+@_message_wrapper(VirtualDiskPb)
+class VirtualDisk(_MessageWrapper):
     """VirtualDisk message wrapper."""
 
     def __new__(
@@ -613,23 +741,10 @@ class VirtualDisk:
         tags: list[str | Tag | TagPb] | None = None,
     ) -> VirtualDiskPb:
         """Create a new virtual disk protobuf message."""
-        virtual_machine = convert_to_protobuf(
-            virtual_machine, VirtualMachinePb, name=virtual_machine
-        )
 
-        if isinstance(tags, list) and all(isinstance(t, str) for t in tags):
-            tags = [TagPb(name=tag) for tag in tags]
 
-        return VirtualDiskPb(
-            name=name,
-            virtual_machine=virtual_machine,
-            size=size,
-            description=description,
-            tags=tags,
-        )
-
-
-class VMInterface:
+@_message_wrapper(VMInterfacePb)
+class VMInterface(_MessageWrapper):
     """VMInterface message wrapper."""
 
     def __new__(
@@ -643,25 +758,10 @@ class VMInterface:
         tags: list[str | Tag | TagPb] | None = None,
     ) -> VMInterfacePb:
         """Create a new virtual interface protobuf message."""
-        virtual_machine = convert_to_protobuf(
-            virtual_machine, VirtualMachinePb, name=virtual_machine
-        )
 
-        if isinstance(tags, list) and all(isinstance(t, str) for t in tags):
-            tags = [TagPb(name=tag) for tag in tags]
-
-        return VMInterfacePb(
-            name=name,
-            virtual_machine=virtual_machine,
-            enabled=enabled,
-            mtu=mtu,
-            mac_address=mac_address,
-            description=description,
-            tags=tags,
-        )
 
-
-class Entity:
+@_message_wrapper(EntityPb)
+class Entity(_MessageWrapper):
     """Entity message wrapper."""
 
     def __new__(
@@ -684,47 +784,41 @@ class Entity:
         timestamp: _timestamp_pb2.Timestamp | None = None,
     ):
         """Create a new Entity protobuf message."""
-        site = convert_to_protobuf(site, SitePb, name=site)
-        platform = convert_to_protobuf(platform, PlatformPb, name=platform)
-        manufacturer = convert_to_protobuf(
-            manufacturer, ManufacturerPb, name=manufacturer
-        )
-        device = convert_to_protobuf(device, DevicePb, name=device)
-        device_role = convert_to_protobuf(device_role, RolePb, name=device_role)
-        device_type = convert_to_protobuf(device_type, DeviceTypePb, model=device_type)
-        ip_address = convert_to_protobuf(ip_address, IPAddressPb, address=ip_address)
-        interface = convert_to_protobuf(interface, InterfacePb, name=interface)
-        prefix = convert_to_protobuf(prefix, PrefixPb, prefix=prefix)
-        cluster_group = convert_to_protobuf(
-            cluster_group, ClusterGroupPb, name=cluster_group
-        )
-        cluster_type = convert_to_protobuf(
-            cluster_type, ClusterTypePb, name=cluster_type
-        )
-        cluster = convert_to_protobuf(cluster, ClusterPb, name=cluster)
-        virtual_disk = convert_to_protobuf(
-            virtual_disk, VirtualDiskPb, name=virtual_disk
-        )
-        vminterface = convert_to_protobuf(vminterface, VMInterfacePb, name=vminterface)
-        virtual_machine = convert_to_protobuf(
-            virtual_machine, VirtualMachinePb, name=virtual_machine
-        )
 
-        return EntityPb(
-            site=site,
-            platform=platform,
-            manufacturer=manufacturer,
-            device=device,
-            device_role=device_role,
-            device_type=device_type,
-            interface=interface,
-            ip_address=ip_address,
-            prefix=prefix,
-            cluster_group=cluster_group,
-            cluster_type=cluster_type,
-            cluster=cluster,
-            virtual_disk=virtual_disk,
-            vminterface=vminterface,
-            virtual_machine=virtual_machine,
-            timestamp=timestamp,
-        )
+    @classmethod
+    def wrap_many(
+        cls,
+        messages: Iterable[_message.Message],
+        timestamp: _timestamp_pb2.Timestamp | None = None,
+        batch_size: int | None = None,
+    ) -> list[EntityPb] | Iterator[list[EntityPb]]:
+        """
+        Wrap messages, such as the messages built by from_columns(), in Entity messages.
+
+        Entity messages are passed through. Returns the entities, or with batch_size, an iterator over lists of at most
+        batch_size entities, consuming messages batch_size at a time.
+
+        """
+        batch_size = _batch_size(batch_size)
+        if batch_size is None:
+            return _wrap_entities(messages, timestamp)
+        return (_wrap_entities(chunk, timestamp) for chunk in _chunks(messages, batch_size))
+
+
+# The Entity fields of the messages Entity wraps
+_ENTITY_FIELDS = {
+    _MESSAGE_CLASSES[field.message_type.full_name]: field.name
+    for field in EntityPb.DESCRIPTOR.oneofs_by_name["entity"].fields
+}
+
+
+def _wrap_entities(messages: Iterable[_message.Message], timestamp: _timestamp_pb2.Timestamp | None) -> list[EntityPb]:
+    entities = []
+    for message in messages:
+        if not isinstance(message, EntityPb):
+            field = _ENTITY_FIELDS.get(type(message))
+            if field is None:
+                raise TypeError(f"cannot wrap {type(message).__name__} messages in entities")
+            message = EntityPb(**{field: message}) if timestamp is None else EntityPb(**{field: message}, timestamp=timestamp)
+        entities.append(message)
+    return entities
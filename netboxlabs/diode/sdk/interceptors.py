@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs, Diode - SDK - Interceptors."""
+import contextvars
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+import grpc
+
+from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+
+if TYPE_CHECKING:
+    from netboxlabs.diode.sdk.metrics import ClientMetrics
+
+_INGEST_METHOD = "/diode.v1.IngesterService/Ingest"
+
+# When the client started sending the current call, set before waiting on limits, and the timing of the call,
+# through which the request serializer reports the time spent serializing
+_QUEUED_AT = contextvars.ContextVar("diode_queued_at", default=None)
+_CALL_TIMING = contextvars.ContextVar("diode_call_timing", default=None)
+
+
+class CallTiming:
+    """
+    Call Timing class.
+
+    The timing of a call, in seconds: queueing is the time from the client sending the call, including waits on the
+    concurrency limiter and circuit breaker, to the call reaching the interceptor, serialization the time spent
+    serializing the request, and wire the remaining time until the call completed. code is the status code of the
+    call.
+
+    """
+
+    __slots__ = ("method", "queueing", "serialization", "wire", "code")
+
+    def __init__(self, method: str | bytes, queueing: float = 0.0):
+        """Initiate a new call timing."""
+        self.method = method
+        self.queueing = queueing
+        self.serialization = 0.0
+        self.wire = 0.0
+        self.code = None
+
+    def __repr__(self) -> str:
+        """Return the representation of the call timing."""
+        return (
+            f"CallTiming(method={self.method!r}, queueing={self.queueing}, serialization={self.serialization}, "
+            f"wire={self.wire}, code={self.code})"
+        )
+
+
+def _serialize_request(request: ingester_pb2.IngestRequest) -> bytes:
+    """Serialize a request, adding the time spent to the timing of the current call, if any."""
+    timing = _CALL_TIMING.get()
+    if timing is None:
+        return request.SerializeToString()
+    start = time.perf_counter()
+    data = request.SerializeToString()
+    timing.serialization += time.perf_counter() - start
+    return data
+
+
+class _IngesterServiceStub:
+    """IngesterService stub, serializing requests with _serialize_request."""
+
+    def __init__(self, channel: grpc.Channel | grpc.aio.Channel):
+        self.Ingest = channel.unary_unary(
+            _INGEST_METHOD,
+            request_serializer=_serialize_request,
+            response_deserializer=ingester_pb2.IngestResponse.FromString,
+        )
+
+
+class _BaseTimingInterceptor:
+    """Base class of the timing interceptors."""
+
+    def __init__(
+        self,
+        on_timing: Callable[[CallTiming], None] | None = None,
+        metrics: "ClientMetrics | None" = None,
+    ):
+        """Initiate a new interceptor."""
+        self._on_timing = on_timing
+        self._metrics = metrics
+
+    def _start(self, client_call_details) -> tuple[CallTiming, contextvars.Token, float]:
+        """Start timing a call, returns its timing, the token to reset the current timing and the start time."""
+        start = time.perf_counter()
+        queued_at = _QUEUED_AT.get()
+        timing = CallTiming(client_call_details.method, start - queued_at if queued_at is not None else 0.0)
+        return timing, _CALL_TIMING.set(timing), start
+
+    def _reset(self, timing: CallTiming, token: contextvars.Token):
+        """Reset the current timing, adding the serialization time to the enclosing timing, if any."""
+        _CALL_TIMING.reset(token)
+        outer = _CALL_TIMING.get()
+        if outer is not None:
+            outer.serialization += timing.serialization
+
+    def _finish(self, timing: CallTiming, start: float, code: grpc.StatusCode | None):
+        """Complete the timing of a call and report it."""
+        timing.wire = max(time.perf_counter() - start - timing.serialization, 0.0)
+        timing.code = code
+        if self._metrics is not None:
+            self._metrics.record_timing(timing.queueing, timing.serialization, timing.wire)
+        if self._on_timing is not None:
+            self._on_timing(timing)
+
+
+class TimingInterceptor(_BaseTimingInterceptor, grpc.UnaryUnaryClientInterceptor, grpc.StreamUnaryClientInterceptor):
+    """
+    Timing Interceptor class.
+
+    Times the queueing, serialization and wire time of each call, passing a CallTiming to on_timing once the call
+    completed and recording the times in metrics, if given. on_timing is called from the thread completing the call.
+    Serialization is only timed for calls made by the clients, whose stubs report it; the requests of stream-unary
+    calls are serialized on a gRPC thread and counted as wire time.
+
+    """
+
+    def _intercept_call(self, continuation, client_call_details, request_or_iterator):
+        """Intercept call."""
+        timing, token, start = self._start(client_call_details)
+        try:
+            call = continuation(client_call_details, request_or_iterator)
+        finally:
+            self._reset(timing, token)
+        call.add_done_callback(lambda call: self._finish(timing, start, call.code()))
+        return call
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        """Intercept unary unary."""
+        return self._intercept_call(continuation, client_call_details, request)
+
+    def intercept_stream_unary(self, continuation, client_call_details, request_iterator):
+        """Intercept stream unary."""
+        return self._intercept_call(continuation, client_call_details, request_iterator)
+
+
+class AsyncTimingInterceptor(
+    _BaseTimingInterceptor, grpc.aio.UnaryUnaryClientInterceptor, grpc.aio.StreamUnaryClientInterceptor
+):
+    """
+    Async Timing Interceptor class.
+
+    The grpc.aio counterpart of TimingInterceptor, on_timing being called from the event loop.
+
+    """
+
+    async def _intercept_call(self, continuation, client_call_details, request_or_iterator):
+        """Intercept call."""
+        timing, token, start = self._start(client_call_details)
+        try:
+            call = await continuation(client_call_details, request_or_iterator)
+            await call
+        except grpc.aio.AioRpcError as err:
+            self._finish(timing, start, err.code())
+            raise
+        except BaseException:
+            self._finish(timing, start, grpc.StatusCode.CANCELLED)
+            raise
+        finally:
+            self._reset(timing, token)
+        self._finish(timing, start, grpc.StatusCode.OK)
+        return call
+
+    async def intercept_unary_unary(self, continuation, client_call_details, request):
+        """Intercept unary unary."""
+        return await self._intercept_call(continuation, client_call_details, request)
+
+    async def intercept_stream_unary(self, continuation, client_call_details, request_iterator):
+        """Intercept stream unary."""
+        return await self._intercept_call(continuation, client_call_details, request_iterator)
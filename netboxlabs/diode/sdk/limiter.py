@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs, Diode - SDK - Concurrency limiter."""
+import logging
+import threading
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Adaptive Concurrency Limiter class.
+
+    Limits the number of ingest calls in flight, adjusting the limit with additive increase, multiplicative decrease
+    (AIMD). Each successful call below the latency threshold increases the limit by increase / limit, i.e. by about
+    increase once a full limit of calls completed. A call failing with RESOURCE_EXHAUSTED, or slower than
+    latency_tolerance times the baseline latency, multiplies the limit by backoff_ratio, at most once per baseline
+    latency so that calls in flight during an overload do not cut the limit several times.
+
+    The baseline latency is the lowest latency observed, drifting towards observed latencies by baseline_smoothing so
+    that it follows lasting changes of the server latency.
+
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 256,
+        increase: float = 1.0,
+        backoff_ratio: float = 0.5,
+        latency_tolerance: float = 2.0,
+        baseline_smoothing: float = 0.01,
+    ):
+        """Initiate a new limiter."""
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("limits should satisfy 1 <= min_limit <= initial_limit <= max_limit")
+        if increase <= 0:
+            raise ValueError("increase should be positive")
+        if not 0 < backoff_ratio < 1:
+            raise ValueError("backoff_ratio should be within (0, 1)")
+        if latency_tolerance <= 1:
+            raise ValueError("latency_tolerance should be greater than 1")
+        if not 0 <= baseline_smoothing <= 1:
+            raise ValueError("baseline_smoothing should be within [0, 1]")
+
+        self._limit = float(initial_limit)
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._increase = increase
+        self._backoff_ratio = backoff_ratio
+        self._latency_tolerance = latency_tolerance
+        self._baseline_smoothing = baseline_smoothing
+        self._baseline = None
+        self._last_decrease = None
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+        self._requests = 0
+        self._overloads = 0
+        self._decreases = 0
+        self._queued = 0
+        self._timeouts = 0
+        self._queueing_delay = 0.0
+        self._max_queueing_delay = 0.0
+
+    @property
+    def limit(self) -> int:
+        """Retrieve the current limit of calls in flight."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Retrieve the number of calls in flight."""
+        return self._in_flight
+
+    @property
+    def baseline_latency(self) -> float | None:
+        """Retrieve the baseline latency, in seconds."""
+        return self._baseline
+
+    def acquire(self, timeout: float | None = None) -> float:
+        """
+        Wait until a call can be made under the current limit, returns the time waited in seconds.
+
+        Raises TimeoutError when no call can be made within timeout seconds, waiting without limit by default.
+
+        """
+        start = time.perf_counter()
+        with self._condition:
+            queued = self._in_flight >= int(self._limit)
+            if not self._condition.wait_for(lambda: self._in_flight < int(self._limit), timeout):
+                self._timeouts += 1
+                raise TimeoutError(f"no call slot within {timeout:.3f}s, {self._in_flight} calls in flight")
+            self._in_flight += 1
+            delay = time.perf_counter() - start
+            self._requests += 1
+            if queued:
+                self._queued += 1
+            self._queueing_delay += delay
+            self._max_queueing_delay = max(self._max_queueing_delay, delay)
+        return delay
+
+    def release(self, latency: float | None = None, overloaded: bool = False):
+        """
+        Release a call, adjusting the limit from its outcome.
+
+        latency is the duration of a successful call in seconds, overloaded tells that the server pushed back. Calls
+        failing for other reasons are released with neither and leave the limit unchanged.
+
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if overloaded:
+                self._overloads += 1
+            if overloaded or (latency is not None and self._slow(latency)):
+                self._decrease()
+            elif latency is not None:
+                self._limit = min(self._limit + self._increase / self._limit, float(self._max_limit))
+            if latency is not None:
+                self._update_baseline(latency)
+            self._condition.notify_all()
+
+    def snapshot(self) -> dict:
+        """Return the limiter stats as a dict."""
+        with self._condition:
+            return {
+                "limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "baseline_latency": self._baseline,
+                "requests": self._requests,
+                "overloads": self._overloads,
+                "decreases": self._decreases,
+                "queued_requests": self._queued,
+                "timeouts": self._timeouts,
+                "queueing_delay": self._queueing_delay,
+                "avg_queueing_delay": self._queueing_delay / self._requests if self._requests else 0.0,
+                "max_queueing_delay": self._max_queueing_delay,
+            }
+
+    def _slow(self, latency: float) -> bool:
+        return self._baseline is not None and latency > self._baseline * self._latency_tolerance
+
+    def _decrease(self):
+        """Cut the limit, unless it was already cut within the last baseline latency."""
+        now = time.monotonic()
+        if self._last_decrease is not None and now - self._last_decrease < (self._baseline or 0.0):
+            return
+        self._last_decrease = now
+        self._decreases += 1
+        self._limit = max(self._limit * self._backoff_ratio, float(self._min_limit))
+        _LOGGER.debug(f"Concurrency limit decreased to {int(self._limit)}")
+
+    def _update_baseline(self, latency: float):
+        if self._baseline is None or latency < self._baseline:
+            self._baseline = latency
+        else:
+            self._baseline += self._baseline_smoothing * (latency - self._baseline)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs, Diode - SDK - Metrics."""
+import bisect
+import collections
+import math
+import threading
+from collections.abc import Callable, Iterable
+from typing import TypeVar
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_SIZE_BUCKETS = tuple(4**i * 256 for i in range(8))
+
+T = TypeVar("T")
+
+
+class Histogram:
+    """Histogram class, counting observed values into buckets with the given upper bounds."""
+
+    def __init__(self, buckets: Iterable[float]):
+        """Initiate a new histogram."""
+        self._bounds = sorted(buckets)
+        if not self._bounds:
+            raise ValueError("histogram requires at least one bucket")
+        self._counts = [0] * (len(self._bounds) + 1)
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value: float):
+        """Count a value, the caller holding the lock of the metrics."""
+        self._counts[bisect.bisect_left(self._bounds, value)] += 1
+        self._sum += value
+        self._count += 1
+
+    def snapshot(self) -> dict:
+        """Return cumulative bucket counts by upper bound, sum and count."""
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip([*self._bounds, math.inf], self._counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {"buckets": buckets, "sum": self._sum, "count": self._count}
+
+
+class ClientMetrics:
+    """
+    Client Metrics class.
+
+    Records the performance of a client: histograms of the time spent building requests (build_seconds), of the
+    duration of ingest calls including serialization and network (call_seconds), and of serialized request sizes
+    (request_bytes), along with counts of ingested entities by entity type, of failed calls by gRPC status code, of
+    retries, and the number of calls in flight. With a TimingInterceptor, the queueing, serialization and wire time of
+    calls are recorded as well (queueing_seconds, serialization_seconds and wire_seconds). snapshot() returns them as
+    a dict, and export() passes the snapshot to an exporter, such as PrometheusExporter. The metrics are safe to share
+    across threads and clients.
+
+    """
+
+    def __init__(
+        self,
+        latency_buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS,
+        size_buckets: Iterable[float] = DEFAULT_SIZE_BUCKETS,
+    ):
+        """Initiate new metrics."""
+        latency_buckets = tuple(latency_buckets)
+        self._lock = threading.Lock()
+        self._build_seconds = Histogram(latency_buckets)
+        self._call_seconds = Histogram(latency_buckets)
+        self._request_bytes = Histogram(size_buckets)
+        self._queueing_seconds = Histogram(latency_buckets)
+        self._serialization_seconds = Histogram(latency_buckets)
+        self._wire_seconds = Histogram(latency_buckets)
+        self._entities = collections.Counter()
+        self._errors = collections.Counter()
+        self._calls = 0
+        self._retries = 0
+        self._in_flight = 0
+
+    def record_build(self, elapsed: float, entity_types: Iterable[str]):
+        """Record the time spent building a request and the types of its entities."""
+        entities = collections.Counter(entity_types)
+        with self._lock:
+            self._build_seconds.observe(elapsed)
+            self._entities.update(entities)
+
+    def call_started(self):
+        """Record the start of a call."""
+        with self._lock:
+            self._calls += 1
+            self._in_flight += 1
+
+    def call_finished(self, elapsed: float, request_size: int, status_code: str | None = None):
+        """Record the end of a call, with the name of the status code it failed with, if any."""
+        with self._lock:
+            self._in_flight -= 1
+            self._call_seconds.observe(elapsed)
+            self._request_bytes.observe(request_size)
+            if status_code is not None:
+                self._errors[status_code] += 1
+
+    def record_timing(self, queueing: float, serialization: float, wire: float):
+        """Record the queueing, serialization and wire time of a call."""
+        with self._lock:
+            self._queueing_seconds.observe(queueing)
+            self._serialization_seconds.observe(serialization)
+            self._wire_seconds.observe(wire)
+
+    def record_retry(self):
+        """Record a retry."""
+        with self._lock:
+            self._retries += 1
+
+    @property
+    def in_flight(self) -> int:
+        """Retrieve the number of calls in flight."""
+        return self._in_flight
+
+    def snapshot(self) -> dict:
+        """Return the metrics as a dict."""
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "in_flight": self._in_flight,
+                "retries": self._retries,
+                "errors": dict(self._errors),
+                "entities": dict(self._entities),
+                "build_seconds": self._build_seconds.snapshot(),
+                "call_seconds": self._call_seconds.snapshot(),
+                "request_bytes": self._request_bytes.snapshot(),
+                "queueing_seconds": self._queueing_seconds.snapshot(),
+                "serialization_seconds": self._serialization_seconds.snapshot(),
+                "wire_seconds": self._wire_seconds.snapshot(),
+            }
+
+    def export(self, exporter: Callable[[dict], T]) -> T:
+        """Pass a snapshot of the metrics to an exporter and return its result."""
+        return exporter(self.snapshot())
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class PrometheusExporter:
+    """
+    Prometheus Exporter class.
+
+    Formats a ClientMetrics snapshot in the Prometheus text exposition format, metric names being prefixed with
+    prefix. Constant labels, such as the producer app name, are added to every sample.
+
+    """
+
+    def __init__(self, prefix: str = "diode_sdk", labels: dict[str, str] | None = None):
+        """Initiate a new exporter."""
+        self._prefix = prefix
+        self._labels = dict(labels or {})
+
+    def __call__(self, snapshot: dict) -> str:
+        """Return the snapshot formatted as Prometheus text."""
+        lines = []
+        self._counter(lines, "calls_total", "Ingest calls.", snapshot["calls"])
+        self._counter(lines, "retries_total", "Retried ingest calls.", snapshot["retries"])
+        self._gauge(lines, "in_flight_calls", "Ingest calls in flight.", snapshot["in_flight"])
+        self._labelled_counter(lines, "errors_total", "Failed ingest calls by status code.", "code", snapshot["errors"])
+        self._labelled_counter(lines, "entities_total", "Ingested entities by type.", "type", snapshot["entities"])
+        self._histogram(lines, "build_seconds", "Time spent building ingest requests.", snapshot["build_seconds"])
+        self._histogram(lines, "call_seconds", "Duration of ingest calls.", snapshot["call_seconds"])
+        self._histogram(lines, "request_bytes", "Serialized size of ingest requests.", snapshot["request_bytes"])
+        self._histogram(lines, "queueing_seconds", "Time ingest calls waited before being sent.", snapshot["queueing_seconds"])
+        self._histogram(
+            lines, "serialization_seconds", "Time spent serializing ingest requests.", snapshot["serialization_seconds"]
+        )
+        self._histogram(lines, "wire_seconds", "Time ingest calls spent on the wire.", snapshot["wire_seconds"])
+        return "\n".join(lines) + "\n"
+
+    def _sample(self, name: str, value: float, labels: dict[str, str] | None = None) -> str:
+        labels = {**self._labels, **(labels or {})}
+        label_text = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+        return f"{name}{{{label_text}}} {_format_value(value)}" if label_text else f"{name} {_format_value(value)}"
+
+    def _header(self, lines: list[str], name: str, help_text: str, metric_type: str) -> str:
+        name = f"{self._prefix}_{name}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        return name
+
+    def _counter(self, lines: list[str], name: str, help_text: str, value: float):
+        lines.append(self._sample(self._header(lines, name, help_text, "counter"), value))
+
+    def _gauge(self, lines: list[str], name: str, help_text: str, value: float):
+        lines.append(self._sample(self._header(lines, name, help_text, "gauge"), value))
+
+    def _labelled_counter(self, lines: list[str], name: str, help_text: str, label: str, values: dict):
+        name = self._header(lines, name, help_text, "counter")
+        for key, value in sorted(values.items()):
+            lines.append(self._sample(name, value, {label: key}))
+
+    def _histogram(self, lines: list[str], name: str, help_text: str, histogram: dict):
+        name = self._header(lines, name, help_text, "histogram")
+        for bound, count in histogram["buckets"].items():
+            lines.append(self._sample(f"{name}_bucket", count, {"le": _format_value(bound)}))
+        lines.append(self._sample(f"{name}_sum", histogram["sum"]))
+        lines.append(self._sample(f"{name}_count", histogram["count"]))
+
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs, Diode - SDK - Parallel builder."""
+import collections
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+import grpc
+
+from netboxlabs.diode.sdk.client import _DEFAULT_STREAM, DiodeClient
+from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+from netboxlabs.diode.sdk.exceptions import DiodeBuildError
+from netboxlabs.diode.sdk.ingester import Entity
+from netboxlabs.diode.sdk.wire import serialize_entities
+
+_LOGGER = logging.getLogger(__name__)
+
+# The build function of the worker process, set once by the pool initializer rather than sent with each chunk
+_BUILD = None
+
+
+def _init_worker(build: Callable[[Any], Iterable]):
+    global _BUILD
+    _BUILD = build
+
+
+def _build_chunk(chunk: Any) -> bytes:
+    """Build the entities of a chunk and serialize them, in a worker process."""
+    return serialize_entities(Entity.wrap_many(message for message in _BUILD(chunk) if message is not None))
+
+
+class ParallelBuilder:
+    """
+    Parallel Builder class.
+
+    Builds the entities of chunks of rows and serializes them in a pool of max_workers worker processes (the number of
+    CPUs by default), so that building entities is not bound to a single core. build is called in the workers with
+    each chunk and returns its entities or messages Entity wraps, e.g. functools.partial(Interface.from_records,
+    as_entities=True) for chunks of dicts; build and the chunks are pickled, so build should be a module-level
+    function, a classmethod or a partial of one.
+
+    map() yields the serialized entities of each chunk in chunk order, and ingest() sends them with a client's
+    ingest_serialized() from the calling process. At most max_pending chunks (twice the number of workers by default)
+    are being built or waiting to be sent at a time. Workers are started with mp_context, spawn by default, as forked
+    workers would inherit the threads of the gRPC channels of the parent process in an undefined state.
+
+    """
+
+    def __init__(
+        self,
+        build: Callable[[Any], Iterable],
+        max_workers: int | None = None,
+        max_pending: int | None = None,
+        mp_context: multiprocessing.context.BaseContext | None = None,
+    ):
+        """Initiate a new parallel builder and start its worker processes."""
+        max_workers = max_workers if max_workers is not None else os.cpu_count() or 1
+        if max_workers < 1:
+            raise ValueError("max_workers should be at least 1")
+        max_pending = max_pending if max_pending is not None else 2 * max_workers
+        if max_pending < 1:
+            raise ValueError("max_pending should be at least 1")
+
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=mp_context if mp_context is not None else multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(build,),
+        )
+
+    @property
+    def max_workers(self) -> int:
+        """Retrieve the number of worker processes."""
+        return self._max_workers
+
+    def __enter__(self):
+        """Enters the runtime context related to the builder object."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        """Exits the runtime context related to the builder object."""
+        self.close()
+
+    def close(self):
+        """Stop the worker processes, cancelling the chunks not being built yet."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def map(self, chunks: Iterable[Any]) -> Iterator[tuple[Any, bytes]]:
+        """
+        Build and serialize the entities of chunks in the worker processes, yields each chunk and its entities.
+
+        Chunks are consumed lazily and yielded in order, with their entities serialized as by serialize_entities(). An
+        error building a chunk raises DiodeBuildError, holding the chunk and its index, when the chunk is reached, and
+        cancels the pending chunks.
+
+        """
+        pending = collections.deque()
+        chunks = iter(chunks)
+        try:
+            for index, chunk in enumerate(chunks):
+                pending.append((index, chunk, self._executor.submit(_build_chunk, chunk)))
+                if len(pending) >= self._max_pending:
+                    yield self._result(*pending.popleft())
+            while pending:
+                yield self._result(*pending.popleft())
+        finally:
+            for _, _, future in pending:
+                future.cancel()
+
+    def ingest(
+        self,
+        client: DiodeClient,
+        chunks: Iterable[Any],
+        stream: str | None = _DEFAULT_STREAM,
+        max_request_size: int | None = None,
+        compression: grpc.Compression | None = None,
+    ) -> Iterator[tuple[Any, ingester_pb2.IngestResponse]]:
+        """
+        Build the entities of chunks in the worker processes and ingest them, yields each chunk and its response.
+
+        The entities of each chunk are sent with client.ingest_serialized(), in chunk order, while the next chunks are
+        being built. See DiodeClient.ingest() for max_request_size and compression. An error sending a chunk is raised
+        as is, the chunks yielded before it having been ingested.
+
+        """
+        for chunk, data in self.map(chunks):
+            yield chunk, client.ingest_serialized(data, stream, max_request_size, compression)
+
+    @staticmethod
+    def _result(index: int, chunk: Any, future: concurrent.futures.Future) -> tuple[Any, bytes]:
+        """Return a chunk and its serialized entities once built."""
+        try:
+            return chunk, future.result()
+        except Exception as err:
+            _LOGGER.debug(f"Building chunk {index} failed: {err!r}")
+            raise DiodeBuildError(index, chunk) from err
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs, Diode - SDK - Channel pool."""
+import logging
+import threading
+import time
+from collections.abc import Collection
+
+import grpc
+
+from netboxlabs.diode.sdk.interceptors import _IngesterServiceStub
+
+ROUND_ROBIN = "round_robin"
+LEAST_OUTSTANDING = "least_outstanding"
+EWMA = "ewma"
+_POLICIES = (ROUND_ROBIN, LEAST_OUTSTANDING, EWMA)
+_LOGGER = logging.getLogger(__name__)
+
+
+class TargetHealth:
+    """Health and latency stats of a target, shared by the pooled channels connected to it."""
+
+    __slots__ = (
+        "target",
+        "requests",
+        "failures",
+        "consecutive_failures",
+        "latency",
+        "ejections",
+        "ejection_streak",
+        "ejected_until",
+    )
+
+    def __init__(self, target: str):
+        """Initiate new target health."""
+        self.target = target
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency = None
+        self.ejections = 0
+        self.ejection_streak = 0
+        self.ejected_until = None
+
+    def healthy(self, now: float) -> bool:
+        """Check whether the target is not ejected."""
+        return self.ejected_until is None or now >= self.ejected_until
+
+    def snapshot(self, now: float) -> dict:
+        """Return the target stats as a dict."""
+        return {
+            "healthy": self.healthy(now),
+            "requests": self.requests,
+            "failures": self.failures,
+            "latency": self.latency,
+            "ejections": self.ejections,
+        }
+
+
+class PooledChannel:
+    """A channel of the pool with its stub, number of outstanding RPCs and target health."""
+
+    __slots__ = ("channel", "stub", "outstanding", "target")
+
+    def __init__(
+        self,
+        channel: grpc.Channel,
+        stub: _IngesterServiceStub,
+        target: TargetHealth | None = None,
+    ):
+        """Initiate a new pooled channel."""
+        self.channel = channel
+        self.stub = stub
+        self.outstanding = 0
+        self.target = target if target is not None else TargetHealth("")
+
+
+class ChannelPool:
+    """
+    Channel Pool class.
+
+    Spreads RPCs over several channels, each with its own HTTP/2 connection, to scale past the concurrent streams and
+    flow control limits of a single connection, or connected to different targets. A channel is selected for each RPC
+    in round-robin order, as the channel with the least outstanding RPCs, or as the channel with the lowest latency
+    moving average of its target weighted by its outstanding RPCs ("ewma"). The pool is safe to share across threads.
+
+    Channels may be connected to different targets, named by targets. A target failing max_failures RPCs in a row is
+    ejected: its channels are not selected for ejection_backoff seconds, doubled on each successive ejection up to
+    max_ejection_backoff. Once re-admitted, a single failure ejects it again until an RPC succeeds. When all targets are
+    ejected, channels are selected among all of them.
+
+    """
+
+    def __init__(
+        self,
+        channels: list[tuple[grpc.Channel, _IngesterServiceStub]],
+        policy: str = ROUND_ROBIN,
+        targets: list[str] | None = None,
+        max_failures: int = 3,
+        ejection_backoff: float = 1.0,
+        max_ejection_backoff: float = 60.0,
+        latency_smoothing: float = 0.3,
+    ):
+        """Initiate a new pool from (channel, stub) pairs, connected to the given targets if any."""
+        if not channels:
+            raise ValueError("channel pool requires at least one channel")
+        if policy not in _POLICIES:
+            raise ValueError(f"channel pool policy should be one of: {', '.join(_POLICIES)}")
+        if targets is not None and len(targets) != len(channels):
+            raise ValueError("channel pool targets should name the target of each channel")
+        if max_failures < 1:
+            raise ValueError("max_failures should be at least 1")
+        if not 0 < latency_smoothing <= 1:
+            raise ValueError("latency_smoothing should be within (0, 1]")
+
+        health = {}
+        for target in targets or [""]:
+            health.setdefault(target, TargetHealth(target))
+        self._targets = health
+        self._channels = [
+            PooledChannel(channel, stub, health[targets[i] if targets is not None else ""])
+            for i, (channel, stub) in enumerate(channels)
+        ]
+        self._policy = policy
+        self._max_failures = max_failures
+        self._ejection_backoff = ejection_backoff
+        self._max_ejection_backoff = max_ejection_backoff
+        self._latency_smoothing = latency_smoothing
+        self._lock = threading.Lock()
+        self._next = 0
+
+    @property
+    def policy(self) -> str:
+        """Retrieve the selection policy."""
+        return self._policy
+
+    @property
+    def channels(self) -> list[PooledChannel]:
+        """Retrieve the pooled channels."""
+        return list(self._channels)
+
+    def __len__(self) -> int:
+        """Return the number of channels."""
+        return len(self._channels)
+
+    def acquire(self, exclude: Collection[str] = ()) -> PooledChannel:
+        """
+        Select a channel for an RPC, it must be released once the RPC completes.
+
+        Channels connected to the targets named by exclude, e.g. the targets an RPC already failed on, are only selected
+        when all targets are excluded.
+
+        """
+        now = time.monotonic()
+        with self._lock:
+            count = len(self._channels)
+            start = self._next
+            self._next = (start + 1) % count
+            # Scan from a rotating start so that ties are spread over all channels
+            rotated = [self._channels[(start + i) % count] for i in range(count)]
+            if exclude:
+                rotated = [c for c in rotated if c.target.target not in exclude] or rotated
+            candidates = [c for c in rotated if c.target.healthy(now)] or rotated
+            if self._policy == LEAST_OUTSTANDING:
+                pooled = min(candidates, key=lambda c: c.outstanding)
+            elif self._policy == EWMA:
+                # Targets without latency yet are tried first
+                pooled = min(candidates, key=lambda c: (c.target.latency or 0.0) * (c.outstanding + 1))
+            else:
+                pooled = candidates[0]
+            pooled.outstanding += 1
+            return pooled
+
+    def release(self, pooled: PooledChannel, latency: float | None = None, failed: bool = False):
+        """
+        Release a channel once its RPC completed.
+
+        latency is the duration of a successful RPC in seconds, failed tells that the target could not handle the RPC.
+        RPCs failing for other reasons are released with neither and leave the target health unchanged.
+
+        """
+        with self._lock:
+            pooled.outstanding -= 1
+            target = pooled.target
+            if latency is not None:
+                target.requests += 1
+                target.consecutive_failures = 0
+                target.ejection_streak = 0
+                if target.latency is None:
+                    target.latency = latency
+                else:
+                    target.latency += self._latency_smoothing * (latency - target.latency)
+            elif failed:
+                target.requests += 1
+                target.failures += 1
+                target.consecutive_failures += 1
+                if target.consecutive_failures >= self._max_failures:
+                    self._eject(target)
+
+    def _eject(self, target: TargetHealth):
+        """Eject a target for a backoff doubling on each successive ejection."""
+        now = time.monotonic()
+        if not target.healthy(now):
+            return
+        backoff = min(self._ejection_backoff * 2**target.ejection_streak, self._max_ejection_backoff)
+        target.ejections += 1
+        target.ejection_streak += 1
+        target.ejected_until = now + backoff
+        # A re-admitted target is ejected again on its next failure, until an RPC succeeds
+        target.consecutive_failures = self._max_failures - 1
+        _LOGGER.warning(f"Ejecting target {target.target} for {backoff:.1f}s")
+
+    def target_stats(self) -> dict[str, dict]:
+        """Return the health and latency stats of each target."""
+        now = time.monotonic()
+        with self._lock:
+            return {name: target.snapshot(now) for name, target in self._targets.items()}
+
+    def close(self):
+        """Close all channels."""
+        for pooled in self._channels:
+            pooled.channel.close()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs, Diode - SDK - Channel registry."""
+import logging
+import threading
+from collections.abc import Callable
+
+import grpc
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _SharedChannel:
+    """A registered channel with its number of references."""
+
+    __slots__ = ("channel", "references")
+
+    def __init__(self, channel: grpc.Channel):
+        self.channel = channel
+        self.references = 0
+
+
+class ChannelRegistry:
+    """
+    Channel Registry class.
+
+    Shares gRPC channels, and thus their connections, between clients created with the same target, TLS setting and
+    channel options, and loads TLS credentials once. Channels are reference counted: a client closing releases its
+    references, and a channel is closed once its last reference is released. The registry is safe to share across
+    threads, default() returns a process-wide registry. Channels are registered with tuple keys starting with their
+    target.
+
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self):
+        """Initiate a new registry."""
+        self._lock = threading.Lock()
+        self._channels = {}
+        self._credentials = None
+        self._credentials_lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> "ChannelRegistry":
+        """Return the process-wide registry."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def __len__(self) -> int:
+        """Return the number of registered channels."""
+        with self._lock:
+            return len(self._channels)
+
+    def references(self, key: tuple) -> int:
+        """Return the number of references to the channel registered with key."""
+        with self._lock:
+            shared = self._channels.get(key)
+            return shared.references if shared is not None else 0
+
+    def credentials(self, factory: Callable[[], grpc.ChannelCredentials]) -> grpc.ChannelCredentials:
+        """Return the TLS credentials, created by factory on first use."""
+        with self._credentials_lock:
+            if self._credentials is None:
+                self._credentials = factory()
+            return self._credentials
+
+    def acquire(self, key: tuple, factory: Callable[[], grpc.Channel]) -> grpc.Channel:
+        """Return a reference to the channel registered with key, created by factory if there is none."""
+        with self._lock:
+            shared = self._channels.get(key)
+            if shared is None:
+                _LOGGER.debug(f"Registering shared gRPC channel to {key[0]}")
+                shared = self._channels[key] = _SharedChannel(factory())
+            shared.references += 1
+            return shared.channel
+
+    def release(self, key: tuple):
+        """Release a reference to the channel registered with key, closing it once unreferenced."""
+        with self._lock:
+            shared = self._channels.get(key)
+            if shared is None:
+                return
+            shared.references -= 1
+            if shared.references > 0:
+                return
+            del self._channels[key]
+        _LOGGER.debug(f"Closing shared gRPC channel to {key[0]}")
+        shared.channel.close()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs, Diode - SDK - Retry policy."""
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from typing import TypeVar
+
+import grpc
+
+DEFAULT_RETRIABLE_STATUS_CODES = frozenset(
+    {
+        grpc.StatusCode.UNAVAILABLE,
+        grpc.StatusCode.RESOURCE_EXHAUSTED,
+        grpc.StatusCode.DEADLINE_EXCEEDED,
+    }
+)
+_LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class RetryPolicy:
+    """
+    Retry policy class.
+
+    Attempts failing with a retriable status code are retried, up to max_attempts attempts in total. Before each retry,
+    the policy waits a random backoff between 0 and min(max_backoff, initial_backoff * backoff_multiplier ** n) seconds,
+    n being the number of failed attempts minus one ("full jitter"), so that many clients failing at once do not retry
+    in lockstep.
+
+    Each attempt is limited to attempt_timeout seconds, and all attempts including backoffs to timeout seconds. No
+    retry is made once the overall timeout has passed. Retries resend the same request, with the same request id.
+
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        initial_backoff: float = 0.1,
+        max_backoff: float = 10.0,
+        backoff_multiplier: float = 2.0,
+        attempt_timeout: float | None = None,
+        timeout: float | None = None,
+        retriable_status_codes: Iterable[grpc.StatusCode] = DEFAULT_RETRIABLE_STATUS_CODES,
+    ):
+        """Initiate a new retry policy."""
+        if max_attempts < 1:
+            raise ValueError("max_attempts should be at least 1")
+        if initial_backoff < 0 or max_backoff < 0 or backoff_multiplier < 1:
+            raise ValueError("backoffs should not be negative and backoff_multiplier should be at least 1")
+        if (attempt_timeout is not None and attempt_timeout <= 0) or (timeout is not None and timeout <= 0):
+            raise ValueError("attempt_timeout and timeout should be positive")
+
+        self._max_attempts = max_attempts
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max_backoff
+        self._backoff_multiplier = backoff_multiplier
+        self._attempt_timeout = attempt_timeout
+        self._timeout = timeout
+        self._retriable_status_codes = frozenset(retriable_status_codes)
+
+    @property
+    def max_attempts(self) -> int:
+        """Retrieve the maximum number of attempts."""
+        return self._max_attempts
+
+    @property
+    def retriable_status_codes(self) -> frozenset[grpc.StatusCode]:
+        """Retrieve the retriable status codes."""
+        return self._retriable_status_codes
+
+    def deadline(self) -> float | None:
+        """Return the monotonic deadline of a call starting now, if the policy has an overall timeout."""
+        if self._timeout is None:
+            return None
+        return time.monotonic() + self._timeout
+
+    def attempt_timeout(self, deadline: float | None) -> float | None:
+        """Return the timeout of the next attempt given the call deadline."""
+        if deadline is None:
+            return self._attempt_timeout
+        remaining = max(deadline - time.monotonic(), 0.0)
+        if self._attempt_timeout is None:
+            return remaining
+        return min(self._attempt_timeout, remaining)
+
+    def backoff(self, attempt: int) -> float:
+        """Return a randomized backoff before retrying the given failed attempt, numbered from 1."""
+        ceiling = min(self._max_backoff, self._initial_backoff * self._backoff_multiplier ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+    def is_retriable(self, err: grpc.RpcError) -> bool:
+        """Check whether an error has a retriable status code."""
+        code = err.code() if callable(getattr(err, "code", None)) else None
+        return code in self._retriable_status_codes
+
+    def retry_delay(self, err: grpc.RpcError, attempt: int, deadline: float | None) -> float | None:
+        """Return the delay before retrying a failed attempt, or None if it should not be retried."""
+        if attempt >= self._max_attempts or not self.is_retriable(err):
+            return None
+        delay = self.backoff(attempt)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+        _LOGGER.debug(f"Retrying attempt {attempt} failed with {err.code()} in {delay:.3f}s")
+        return delay
+
+    def call(self, fn: Callable[[float | None], T]) -> T:
+        """Call fn with the attempt timeout, retrying on retriable errors."""
+        deadline = self.deadline()
+        attempt = 1
+        while True:
+            try:
+                return fn(self.attempt_timeout(deadline))
+            except grpc.RpcError as err:
+                delay = self.retry_delay(err, attempt, deadline)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    async def call_async(self, fn: Callable[[float | None], Awaitable[T]]) -> T:
+        """Await fn with the attempt timeout, retrying on retriable errors."""
+        import asyncio
+
+        deadline = self.deadline()
+        attempt = 1
+        while True:
+            try:
+                return await fn(self.attempt_timeout(deadline))
+            except grpc.RpcError as err:
+                delay = self.retry_delay(err, attempt, deadline)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
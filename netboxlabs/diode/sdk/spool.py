@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs, Diode - SDK - Spool."""
+import collections
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterator
+
+from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+
+_SEGMENT_SUFFIX = ".seg"
+_ACK_SUFFIX = ".ack"
+_DEFAULT_MAX_SEGMENT_BYTES = 16 * 1024 * 1024
+_DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+_LOGGER = logging.getLogger(__name__)
+
+SpoolRecord = collections.namedtuple("SpoolRecord", ("segment", "index"))
+
+
+def _encode_varint(value: int) -> bytes:
+    """Encode value as a protobuf varint."""
+    encoded = bytearray()
+    while value > 0x7F:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _read_varints(data: bytes) -> Iterator[tuple[int, int]]:
+    """Yield (value, end offset) of consecutive varints, stopping at a truncated one."""
+    value = shift = 0
+    for offset, byte in enumerate(data):
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            yield value, offset + 1
+            value = shift = 0
+
+
+def _read_records(data: bytes) -> Iterator[bytes]:
+    """Yield length-delimited records, ignoring a truncated last record."""
+    offset = 0
+    while offset < len(data):
+        length = end = None
+        for length, end in _read_varints(data[offset : offset + 10]):
+            break
+        if end is None or offset + end + length > len(data):
+            _LOGGER.warning("Ignoring truncated spool record")
+            return
+        yield data[offset + end : offset + end + length]
+        offset += end + length
+
+
+class _Segment:
+    """Spool segment file, with its acknowledged record indexes."""
+
+    __slots__ = ("seq", "path", "size", "records", "acked", "created")
+
+    def __init__(self, seq: int, path: str, created: float):
+        self.seq = seq
+        self.path = path
+        self.size = 0
+        self.records = 0
+        self.acked = set()
+        self.created = created
+
+    @property
+    def ack_path(self) -> str:
+        return self.path[: -len(_SEGMENT_SUFFIX)] + _ACK_SUFFIX
+
+    def fully_acked(self) -> bool:
+        return len(self.acked) == self.records
+
+
+class Spool:
+    """
+    Spool class.
+
+    Write-ahead spool of ingest requests for store-and-forward ingestion. Serialized requests are appended to
+    length-delimited segment files in directory before they are sent, and acknowledged once the server responded.
+    Acknowledgements are appended to a sidecar file of each segment, and a segment is deleted once all its requests
+    are acknowledged. Pending requests survive restarts and are returned in order by pending().
+
+    A new segment is started once the current one reaches max_segment_bytes. When the spool exceeds max_bytes, or
+    segments are older than max_age seconds, the oldest segments are dropped, except those holding requests being sent,
+    see hold(). Segments are numbered in increasing order, never reusing the number of a deleted segment, so that the
+    late acknowledgement of a request of a dropped segment is ignored.
+
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        max_segment_bytes: int = _DEFAULT_MAX_SEGMENT_BYTES,
+        max_bytes: int = _DEFAULT_MAX_BYTES,
+        max_age: float | None = None,
+        fsync: bool = False,
+    ):
+        """Initiate a new spool, loading segments left in directory."""
+        if max_segment_bytes <= 0 or max_bytes <= 0:
+            raise ValueError("max_segment_bytes and max_bytes should be a positive number of bytes")
+
+        self._directory = os.fspath(directory)
+        self._max_segment_bytes = max_segment_bytes
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        self._fsync = fsync
+        self._lock = threading.RLock()
+        self._segments = collections.OrderedDict()
+        self._next_seq = 0
+        self._held = set()
+        self._active = None
+        self._file = None
+
+        os.makedirs(self._directory, exist_ok=True)
+        self._load()
+
+    @property
+    def directory(self) -> str:
+        """Retrieve the spool directory."""
+        return self._directory
+
+    @property
+    def size(self) -> int:
+        """Retrieve the size of all segments, in bytes."""
+        with self._lock:
+            return sum(segment.size for segment in self._segments.values())
+
+    @property
+    def held(self) -> int:
+        """Retrieve the number of requests being sent."""
+        return len(self._held)
+
+    def __len__(self) -> int:
+        """Return the number of pending requests."""
+        with self._lock:
+            return sum(segment.records - len(segment.acked) for segment in self._segments.values())
+
+    def hold(self, record: SpoolRecord):
+        """Mark a request as being sent, its segment is not dropped until the request is released."""
+        with self._lock:
+            self._held.add(record)
+
+    def release(self, record: SpoolRecord):
+        """Mark a request as not being sent anymore."""
+        with self._lock:
+            self._held.discard(record)
+
+    def is_held(self, record: SpoolRecord) -> bool:
+        """Check whether a request is being sent."""
+        return record in self._held
+
+    def append(self, request: ingester_pb2.IngestRequest, hold: bool = False) -> SpoolRecord:
+        """Append a request to the spool, marking it as being sent with hold, see hold()."""
+        data = request.SerializeToString()
+        frame = _encode_varint(len(data)) + data
+        with self._lock:
+            segment = self._active
+            if segment is None or (segment.records and segment.size + len(frame) > self._max_segment_bytes):
+                segment = self._rotate()
+            self._file.write(frame)
+            self._file.flush()
+            if self._fsync:
+                os.fsync(self._file.fileno())
+            segment.size += len(frame)
+            segment.records += 1
+            record = SpoolRecord(segment.seq, segment.records - 1)
+            if hold:
+                self._held.add(record)
+            self._enforce_limits()
+            return record
+
+    def ack(self, record: SpoolRecord):
+        """Acknowledge a request, deleting its segment once all of its requests are acknowledged."""
+        with self._lock:
+            segment = self._segments.get(record.segment)
+            if segment is None or record.index in segment.acked:
+                return
+            segment.acked.add(record.index)
+            if segment.fully_acked():
+                if segment is self._active:
+                    self._close_active()
+                self._delete(segment)
+                return
+            with open(segment.ack_path, "ab") as f:
+                f.write(_encode_varint(record.index))
+
+    def pending(self) -> Iterator[tuple[SpoolRecord, ingester_pb2.IngestRequest]]:
+        """Yield pending requests in order, reading them from the segment files."""
+        with self._lock:
+            segments = [(segment, set(segment.acked), segment.records) for segment in self._segments.values()]
+        for segment, acked, records in segments:
+            try:
+                with open(segment.path, "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            for index, record in enumerate(_read_records(data)):
+                if index >= records:
+                    break
+                if index not in acked:
+                    yield SpoolRecord(segment.seq, index), ingester_pb2.IngestRequest.FromString(record)
+
+    def close(self):
+        """Close the active segment file."""
+        with self._lock:
+            self._close_active()
+
+    def _load(self):
+        """Load segments and acknowledgements left in the directory."""
+        seqs = sorted(
+            int(name[: -len(_SEGMENT_SUFFIX)])
+            for name in os.listdir(self._directory)
+            if name.endswith(_SEGMENT_SUFFIX) and name[: -len(_SEGMENT_SUFFIX)].isdigit()
+        )
+        self._next_seq = seqs[-1] + 1 if seqs else 0
+        for seq in seqs:
+            path = self._segment_path(seq)
+            segment = _Segment(seq, path, os.path.getmtime(path))
+            with open(path, "rb") as f:
+                data = f.read()
+            for record in _read_records(data):
+                segment.size += len(_encode_varint(len(record))) + len(record)
+                segment.records += 1
+            if os.path.exists(segment.ack_path):
+                with open(segment.ack_path, "rb") as f:
+                    segment.acked = {index for index, _ in _read_varints(f.read()) if index < segment.records}
+            if segment.fully_acked():
+                self._delete(segment)
+                continue
+            self._segments[seq] = segment
+        if self._segments:
+            _LOGGER.info(f"Loaded {len(self)} pending requests from spool {self._directory}")
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self._directory, f"{seq:020d}{_SEGMENT_SUFFIX}")
+
+    def _rotate(self) -> _Segment:
+        """Start a new active segment."""
+        self._close_active()
+        seq = self._next_seq
+        self._next_seq += 1
+        segment = _Segment(seq, self._segment_path(seq), time.time())
+        self._file = open(segment.path, "ab")
+        self._segments[seq] = segment
+        self._active = segment
+        return segment
+
+    def _close_active(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._active = None
+
+    def _delete(self, segment: _Segment):
+        self._segments.pop(segment.seq, None)
+        for path in (segment.path, segment.ack_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _enforce_limits(self):
+        """Drop the oldest segments exceeding the size or age limits, but the active one and those being sent."""
+        now = time.time()
+        held = {record.segment for record in self._held}
+        for segment in list(self._segments.values())[:-1]:
+            too_big = self.size > self._max_bytes
+            too_old = self._max_age is not None and now - segment.created > self._max_age
+            if not (too_big or too_old):
+                break
+            if segment.seq in held:
+                continue
+            _LOGGER.warning(
+                f"Dropping spool segment {segment.path} with {segment.records - len(segment.acked)} pending requests"
+            )
+            self._delete(segment)
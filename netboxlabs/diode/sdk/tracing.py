@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs, Diode - SDK - Tracing."""
+import contextlib
+import contextvars
+import logging
+import random
+import threading
+import time
+from collections.abc import Iterator
+
+import grpc
+
+from netboxlabs.diode.sdk.interceptors import _CALL_TIMING
+
+_LOGGER = logging.getLogger(__name__)
+
+# The trace of the ingest running in the current thread or task
+_CURRENT_TRACE = contextvars.ContextVar("diode_ingest_trace", default=None)
+
+# Sentry span statuses of the gRPC status codes whose lowercase name differs
+_SPAN_STATUSES = {
+    grpc.StatusCode.INTERNAL: "internal_error",
+}
+
+
+class TraceSampler:
+    """
+    Trace Sampler class.
+
+    Decides which ingests are traced once they completed, so that the decision can take their outcome into account:
+    failed ingests and ingests slower than latency_threshold seconds are always candidates, other ingests are
+    candidates with probability sample_rate. Candidates are traced at most max_traces_per_second times per second on
+    average, with bursts of up to max_traces_per_second traces.
+
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 0.01,
+        max_traces_per_second: float = 1.0,
+        latency_threshold: float | None = 1.0,
+    ):
+        """Initiate a new sampler."""
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate should be within [0, 1]")
+        if max_traces_per_second < 0:
+            raise ValueError("max_traces_per_second should not be negative")
+        if latency_threshold is not None and latency_threshold < 0:
+            raise ValueError("latency_threshold should not be negative")
+
+        self._sample_rate = sample_rate
+        self._rate = max_traces_per_second
+        self._burst = max(max_traces_per_second, 1.0) if max_traces_per_second > 0 else 0.0
+        self._latency_threshold = latency_threshold
+        self._tokens = self._burst
+        self._refilled_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self._sampled = 0
+        self._rate_limited = 0
+
+    def sample(self, duration: float, failed: bool = False) -> bool:
+        """Decide whether to trace an ingest that took duration seconds and failed or not."""
+        slow = self._latency_threshold is not None and duration >= self._latency_threshold
+        if not (failed or slow or self._random.random() < self._sample_rate):
+            return False
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._tokens + (now - self._refilled_at) * self._rate, self._burst)
+            self._refilled_at = now
+            if self._tokens < 1:
+                self._rate_limited += 1
+                return False
+            self._tokens -= 1
+            self._sampled += 1
+            return True
+
+    def snapshot(self) -> dict:
+        """Return the sampler stats as a dict."""
+        with self._lock:
+            return {"sampled": self._sampled, "rate_limited": self._rate_limited}
+
+
+class _IngestTrace:
+    """Timings of the spans of an ingest, recorded with time.perf_counter() until the ingest is sampled."""
+
+    __slots__ = ("name", "wall_start", "start", "spans", "serialization")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        self.spans = []
+        self.serialization = 0.0
+
+    def span(self, op: str, start: float, end: float, status: str | None = None, parent: int | None = None) -> int:
+        """Record a span, returns its index to record child spans."""
+        self.spans.append((op, start, end, status, parent))
+        return len(self.spans) - 1
+
+    def rpc(self, start: float, end: float, err: BaseException | None):
+        """Record an RPC span, with a child span for the serialization of its request."""
+        index = self.span("diode.rpc", start, end, _span_status(err))
+        if self.serialization:
+            self.span("diode.serialize", start, start + self.serialization, parent=index)
+        self.serialization = 0.0
+
+
+def _span_status(err: BaseException | None) -> str:
+    if err is None:
+        return "ok"
+    code = getattr(err, "status_code", None)
+    if code is None and callable(getattr(err, "code", None)):
+        code = err.code()
+    if not isinstance(code, grpc.StatusCode):
+        return "unknown_error"
+    return _SPAN_STATUSES.get(code, code.name.lower())
+
+
+class _IngestTracer:
+    """Traces ingests, sending the spans of sampled ingests to Sentry."""
+
+    def __init__(self, sampler: TraceSampler):
+        self.sampler = sampler
+
+    @contextlib.contextmanager
+    def trace(self, name: str) -> Iterator[_IngestTrace]:
+        """Trace an ingest, deciding whether to send it to Sentry once it completed."""
+        trace = _IngestTrace(name)
+        trace_token = _CURRENT_TRACE.set(trace)
+        timing_token = _CALL_TIMING.set(trace)
+        err = None
+        try:
+            yield trace
+        except BaseException as exc:
+            err = exc
+            raise
+        finally:
+            _CALL_TIMING.reset(timing_token)
+            _CURRENT_TRACE.reset(trace_token)
+            self._finish(trace, time.perf_counter(), err)
+
+    @staticmethod
+    def current() -> _IngestTrace | None:
+        """Return the trace of the current ingest, if any."""
+        return _CURRENT_TRACE.get()
+
+    def call_started(self):
+        """Start timing the serialization of an RPC of the current ingest."""
+        trace = _CURRENT_TRACE.get()
+        if trace is not None:
+            trace.serialization = 0.0
+
+    def call_finished(self, elapsed: float, err: BaseException | None = None):
+        """Record an RPC of the current ingest, which took elapsed seconds."""
+        trace = _CURRENT_TRACE.get()
+        if trace is not None:
+            end = time.perf_counter()
+            trace.rpc(end - elapsed, end, err)
+
+    def _finish(self, trace: _IngestTrace, end: float, err: BaseException | None):
+        if not self.sampler.sample(end - trace.start, failed=err is not None):
+            return
+        try:
+            _send_trace(trace, end, err)
+        except Exception as exc:
+            _LOGGER.debug(f"Failed to send ingest trace: {exc}")
+
+
+def _send_trace(trace: _IngestTrace, end: float, err: BaseException | None):
+    """Send the trace of an ingest to Sentry as a transaction with a child span per recorded span."""
+    import sentry_sdk
+
+    def timestamp(counter: float) -> float:
+        return trace.wall_start + (counter - trace.start)
+
+    transaction = sentry_sdk.start_transaction(
+        op="diode.ingest", name=trace.name, start_timestamp=trace.wall_start, sampled=True
+    )
+    spans = []
+    for op, start, span_end, status, parent in trace.spans:
+        parent_span = spans[parent] if parent is not None else transaction
+        span = parent_span.start_child(op=op, start_timestamp=timestamp(start))
+        if status is not None:
+            span.set_status(status)
+        span.finish(end_timestamp=timestamp(span_end))
+        spans.append(span)
+    transaction.set_status(_span_status(err))
+    transaction.finish(end_timestamp=timestamp(end))
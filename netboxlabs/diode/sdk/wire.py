@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs, Diode - SDK - Wire format."""
+import collections
+import hashlib
+import uuid
+from collections.abc import Iterable, Iterator
+
+from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+from netboxlabs.diode.sdk.spool import _encode_varint
+
+BytesLike = bytes | bytearray | memoryview
+
+# Tag of the entities field of IngestRequest, field 2 with the length-delimited wire type
+_ENTITIES_TAG = 0x12
+
+# Entity types by field number of the entity oneof
+_ENTITY_TYPES = {field.number: field.name for field in ingester_pb2.Entity.DESCRIPTOR.oneofs_by_name["entity"].fields}
+
+
+def serialize_entities(entities: Iterable[ingester_pb2.Entity | None]) -> bytes:
+    """
+    Serialize entities as the entities field of an ingest request, to be sent with ingest_serialized().
+
+    Serialized entities can be concatenated, e.g. to send the entities serialized by several processes in one request.
+
+    """
+    return ingester_pb2.IngestRequest(entities=[entity for entity in entities if entity is not None]).SerializeToString()
+
+
+def _decode_varint(data: memoryview, offset: int) -> tuple[int, int]:
+    """Decode the varint at offset, returns its value and end offset."""
+    value = shift = 0
+    while offset < len(data):
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+    raise ValueError("truncated varint in serialized entities")
+
+
+def _frame_ends(data: memoryview) -> Iterator[int]:
+    """Yield the end offset of each entity frame of serialized entities, checking that they are well-formed."""
+    offset = 0
+    while offset < len(data):
+        if data[offset] != _ENTITIES_TAG:
+            raise ValueError(f"serialized entities should only hold entities, found tag {data[offset]} at {offset}")
+        size, offset = _decode_varint(data, offset + 1)
+        offset += size
+        if offset > len(data):
+            raise ValueError("truncated entity in serialized entities")
+        yield offset
+
+
+def _entity_frames(entities: BytesLike | Iterable[BytesLike], split: bool = False) -> list[BytesLike]:
+    """
+    Return the entity frames of the entities field of ingest requests, from serialized entities.
+
+    entities are either entities serialized by serialize_entities(), which are checked, and returned whole unless
+    split, or an iterable of serialized Entity messages, which are framed.
+
+    """
+    if isinstance(entities, BytesLike):
+        data = memoryview(entities).cast("B")
+        if not split:
+            collections.deque(_frame_ends(data), maxlen=0)
+            return [data] if data else []
+        frames = []
+        start = 0
+        for end in _frame_ends(data):
+            frames.append(data[start:end])
+            start = end
+        return frames
+    frames = []
+    for entity in entities:
+        entity = memoryview(entity).cast("B")
+        frames.append(bytes([_ENTITIES_TAG]) + _encode_varint(len(entity)) + entity)
+    return frames
+
+
+def _entity_types(frames: Iterable[BytesLike]) -> Iterator[str]:
+    """Yield the type of the entities of entity frames, read from the tag of their first field."""
+    for frame in frames:
+        data = memoryview(frame).cast("B")
+        start = 0
+        for end in _frame_ends(data):
+            _, offset = _decode_varint(data, start + 1)
+            if offset < end:
+                tag, _ = _decode_varint(data, offset)
+                entity_type = _ENTITY_TYPES.get(tag >> 3)
+                if entity_type is not None:
+                    yield entity_type
+            start = end
+
+
+def _request_id(namespace: uuid.UUID, chunks: Iterable[BytesLike]) -> str:
+    """Derive a request id from the serialization of a request without id, as a version 5 UUID."""
+    digest = hashlib.sha1(namespace.bytes)
+    for chunk in chunks:
+        digest.update(chunk)
+    return str(uuid.UUID(bytes=digest.digest()[:16], version=5))
+
+
+class _SerializedRequest:
+    """
+    Ingest request assembled from entity frames.
+
+    The fields of the request are serialized around the frames in field number order, as protobuf serializes them, so
+    that the request serializes to the same bytes as the equivalent IngestRequest. It is sent as is by the stubs, which
+    serialize requests with SerializeToString().
+
+    """
+
+    __slots__ = ("id", "stream", "_data")
+
+    def __init__(self, stream: str | None, frames: list[BytesLike], trailer: ingester_pb2.IngestRequest, request_id):
+        """
+        Assemble a request from entity frames and the trailer holding the fields following the entities, but its id.
+
+        request_id is the id of the request, or a callable returning it from the serialization of the request without
+        id.
+
+        """
+        header = ingester_pb2.IngestRequest(stream=stream).SerializeToString()
+        trailer = trailer.SerializeToString()
+        if callable(request_id):
+            request_id = request_id([header, *frames, trailer])
+        self.id = request_id
+        self.stream = stream or ""
+        self._data = b"".join([header, *frames, ingester_pb2.IngestRequest(id=request_id).SerializeToString(), trailer])
+
+    def ByteSize(self) -> int:
+        """Return the serialized size of the request."""
+        return len(self._data)
+
+    def SerializeToString(self, deterministic: bool = False) -> bytes:
+        """Return the serialized request."""
+        return self._data
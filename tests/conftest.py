@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs - Tests."""
+import threading
+from concurrent import futures
+
+import grpc
+import pytest
+
+from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+
+
+class IngestServer:
+    """In-process Diode ingester server recording received requests."""
+
+    def __init__(self, port: int = 0):
+        """Initiate a new server listening on the given local port, or a free one."""
+        self.requests = []
+        self.metadata = []
+        self.handler = None
+        self._lock = threading.Lock()
+        self._server = grpc.server(futures.ThreadPoolExecutor(max_workers=16))
+        rpc_handler = grpc.unary_unary_rpc_method_handler(
+            self._ingest,
+            request_deserializer=ingester_pb2.IngestRequest.FromString,
+            response_serializer=ingester_pb2.IngestResponse.SerializeToString,
+        )
+        self._server.add_generic_rpc_handlers(
+            (grpc.method_handlers_generic_handler("diode.v1.IngesterService", {"Ingest": rpc_handler}),)
+        )
+        self.port = self._server.add_insecure_port(f"127.0.0.1:{port}")
+        self.target = f"grpc://127.0.0.1:{self.port}"
+
+    def _ingest(self, request, context):
+        with self._lock:
+            self.requests.append(request)
+            self.metadata.append(dict(context.invocation_metadata()))
+        if self.handler is not None:
+            return self.handler(request, context)
+        return ingester_pb2.IngestResponse()
+
+    def start(self):
+        """Start the server."""
+        self._server.start()
+
+    def stop(self):
+        """Stop the server."""
+        self._server.stop(None)
+
+
+@pytest.fixture
+def ingest_server():
+    """Start an in-process ingester server, set its handler to customize responses."""
+    server = IngestServer()
+    server.start()
+    yield server
+    server.stop()
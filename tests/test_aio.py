@@ -0,0 +1,384 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs - Tests."""
+import asyncio
+from unittest import mock
+
+import grpc
+import pytest
+
+from netboxlabs.diode.sdk.aio import AsyncDiodeClient, DiodeMethodAsyncClientInterceptor
+from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+from netboxlabs.diode.sdk.exceptions import DiodeClientError, DiodeConfigError, DiodeConnectionError
+from netboxlabs.diode.sdk.ingester import Entity
+from netboxlabs.diode.sdk.interceptors import AsyncTimingInterceptor
+from netboxlabs.diode.sdk.retry import RetryPolicy
+from netboxlabs.diode.sdk.wire import serialize_entities
+
+
+class _Servicer:
+    """Ingester servicer recording received requests."""
+
+    def __init__(self):
+        self.requests = []
+
+    async def ingest(self, request, context):
+        self.requests.append(request)
+        return ingester_pb2.IngestResponse(errors=[f"{len(request.entities)} entities"])
+
+
+async def _start_server(servicer, path=""):
+    """Start an in-process aio server serving Ingest under the given path."""
+    server = grpc.aio.server()
+    handler = grpc.unary_unary_rpc_method_handler(
+        servicer.ingest,
+        request_deserializer=ingester_pb2.IngestRequest.FromString,
+        response_serializer=ingester_pb2.IngestResponse.SerializeToString,
+    )
+    service = f"{path.lstrip('/')}/diode.v1.IngesterService" if path else "diode.v1.IngesterService"
+    server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler(service, {"Ingest": handler}),))
+    port = server.add_insecure_port("127.0.0.1:0")
+    await server.start()
+    return server, port
+
+
+def test_async_client_init():
+    """Check we can initiate an async client configuration."""
+
+    async def run():
+        async with AsyncDiodeClient(
+            target="grpc://localhost:8081/my/path",
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+        ) as client:
+            assert client.target == "localhost:8081"
+            assert client.path == "/my/path"
+            assert client.tls_verify is False
+            assert client.app_name == "my-producer"
+            assert client.app_version == "0.0.1"
+            assert isinstance(client.channel, grpc.aio.Channel)
+
+    asyncio.run(run())
+
+
+def test_async_client_config_error():
+    """Check the async client requires an api key."""
+    with mock.patch.dict("os.environ", {}, clear=True), pytest.raises(DiodeConfigError):
+        AsyncDiodeClient(target="grpc://localhost:8081", app_name="my-producer", app_version="0.0.1")
+
+
+def test_async_client_sets_up_secure_channel_with_interceptor():
+    """Check that AsyncDiodeClient sets up a secure aio channel with the client TLS credentials and path interceptor."""
+    with mock.patch("grpc.aio.secure_channel") as mock_secure_channel, mock.patch(
+        "netboxlabs.diode.sdk.aio._ssl_channel_credentials"
+    ) as mock_credentials:
+        AsyncDiodeClient(
+            target="grpcs://localhost:8081/my/path",
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+        )
+        mock_secure_channel.assert_called_once()
+        args, kwargs = mock_secure_channel.call_args
+        assert args[1] is mock_credentials.return_value
+        (interceptor,) = kwargs["interceptors"]
+        assert isinstance(interceptor, DiodeMethodAsyncClientInterceptor)
+        assert interceptor._subpath == "/my/path"
+
+
+def test_async_client_ingest():
+    """Check that AsyncDiodeClient.ingest() sends entities with metadata through the path interceptor."""
+    servicer = _Servicer()
+
+    async def run():
+        server, port = await _start_server(servicer, path="/my/path")
+        try:
+            async with AsyncDiodeClient(
+                target=f"grpc://127.0.0.1:{port}/my/path",
+                app_name="my-producer",
+                app_version="0.0.1",
+                api_key="abcde",
+            ) as client:
+                return await client.ingest([Entity(site="Site A"), Entity(site="Site B")])
+        finally:
+            await server.stop(None)
+
+    response = asyncio.run(run())
+    assert list(response.errors) == ["2 entities"]
+    (request,) = servicer.requests
+    assert request.producer_app_name == "my-producer"
+    assert [e.site.name for e in request.entities] == ["Site A", "Site B"]
+
+
+def test_async_client_ingest_serialized():
+    """Check that AsyncDiodeClient.ingest_serialized() sends serialized entities, split within max_request_size."""
+    servicer = _Servicer()
+    entities = [Entity(site=f"Site {i}") for i in range(20)]
+
+    async def run():
+        server, port = await _start_server(servicer)
+        try:
+            async with AsyncDiodeClient(
+                target=f"grpc://127.0.0.1:{port}",
+                app_name="my-producer",
+                app_version="0.0.1",
+                api_key="abcde",
+            ) as client:
+                return (
+                    await client.ingest_serialized(serialize_entities(entities)),
+                    await client.ingest_serialized(serialize_entities(entities), max_request_size=256),
+                )
+        finally:
+            await server.stop(None)
+
+    whole, split = asyncio.run(run())
+    assert list(whole.errors) == ["20 entities"]
+    assert len(split.errors) == len(servicer.requests) - 1 > 1
+    assert all(request.entities == entities for request in servicer.requests[:1])
+    assert [e for request in servicer.requests[1:] for e in request.entities] == entities
+    assert all(request.producer_app_name == "my-producer" for request in servicer.requests)
+
+def test_async_client_ingest_stream():
+    """Check that AsyncDiodeClient.ingest_stream() sends entities of async and sync iterables in requests, in order."""
+    servicer = _Servicer()
+
+    async def entities(n):
+        for i in range(n):
+            yield Entity(site=f"Site {i}") if i % 5 else None
+
+    async def run():
+        server, port = await _start_server(servicer)
+        try:
+            async with AsyncDiodeClient(
+                target=f"grpc://127.0.0.1:{port}",
+                app_name="my-producer",
+                app_version="0.0.1",
+                api_key="abcde",
+            ) as client:
+                streamed = await client.ingest_stream(entities(50), max_request_entities=8, max_pending=2)
+                with pytest.raises(ValueError, match="max_pending"):
+                    await client.ingest_stream(entities(50), max_pending=0)
+                return streamed, await client.ingest_stream([Entity(site="Site A")] * 3, max_request_entities=2)
+        finally:
+            await server.stop(None)
+
+    streamed, listed = asyncio.run(run())
+    assert list(streamed.errors) == ["8 entities"] * 5
+    assert list(listed.errors) == ["2 entities", "1 entities"]
+    sites = [e.site.name for request in servicer.requests[:5] for e in request.entities]
+    assert sorted(sites, key=lambda name: int(name.split()[1])) == [f"Site {i}" for i in range(50) if i % 5]
+
+def test_async_client_ingest_accepts_async_iterables_and_concurrent_calls():
+    """Check that AsyncDiodeClient.ingest() accepts async iterables and runs concurrently."""
+    servicer = _Servicer()
+
+    async def entities(n):
+        for i in range(n):
+            yield Entity(site=f"Site {i}")
+
+    async def run():
+        server, port = await _start_server(servicer)
+        try:
+            async with AsyncDiodeClient(
+                target=f"grpc://127.0.0.1:{port}",
+                app_name="my-producer",
+                app_version="0.0.1",
+                api_key="abcde",
+            ) as client:
+                return await asyncio.gather(*(client.ingest(entities(n)) for n in range(1, 11)))
+        finally:
+            await server.stop(None)
+
+    responses = asyncio.run(run())
+    assert [list(r.errors) for r in responses] == [[f"{n} entities"] for n in range(1, 11)]
+    assert len({r.id for r in servicer.requests}) == 10
+
+
+def test_async_timing_interceptor_times_calls():
+    """Check that AsyncDiodeClient chains interceptors and AsyncTimingInterceptor times calls."""
+    servicer = _Servicer()
+    timings = []
+
+    async def run():
+        server, port = await _start_server(servicer, path="/my/path")
+        try:
+            async with AsyncDiodeClient(
+                target=f"grpc://127.0.0.1:{port}/my/path",
+                app_name="my-producer",
+                app_version="0.0.1",
+                api_key="abcde",
+                interceptors=[AsyncTimingInterceptor(on_timing=timings.append)],
+            ) as client:
+                await client.ingest([Entity(site="Site A")])
+            async with AsyncDiodeClient(
+                target="grpc://127.0.0.1:1",
+                app_name="my-producer",
+                app_version="0.0.1",
+                api_key="abcde",
+                interceptors=[AsyncTimingInterceptor(on_timing=timings.append)],
+            ) as client:
+                with pytest.raises(DiodeClientError):
+                    await client.ingest([Entity(site="Site B")])
+        finally:
+            await server.stop(None)
+
+    asyncio.run(run())
+    assert len(servicer.requests) == 1
+    assert [timing.code for timing in timings] == [grpc.StatusCode.OK, grpc.StatusCode.UNAVAILABLE]
+    assert timings[0].method in ("/diode.v1.IngesterService/Ingest", b"/diode.v1.IngesterService/Ingest")
+    assert timings[0].serialization > 0
+    assert timings[0].wire > 0
+    assert timings[0].queueing >= 0
+
+
+def test_async_client_ingest_chunks_entities():
+    """Check that AsyncDiodeClient.ingest() splits entities with max_request_size."""
+    servicer = _Servicer()
+
+    async def run():
+        server, port = await _start_server(servicer)
+        try:
+            async with AsyncDiodeClient(
+                target=f"grpc://127.0.0.1:{port}",
+                app_name="my-producer",
+                app_version="0.0.1",
+                api_key="abcde",
+            ) as client:
+                return await client.ingest([Entity(site=f"Site {i}") for i in range(3)], max_request_size=1)
+        finally:
+            await server.stop(None)
+
+    response = asyncio.run(run())
+    assert list(response.errors) == ["1 entities"] * 3
+    assert len(servicer.requests) == 3
+
+
+def test_async_client_error():
+    """Check that AsyncDiodeClient.ingest() raises DiodeClientError."""
+
+    async def run():
+        async with AsyncDiodeClient(
+            target="grpc://invalid:8081",
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+        ) as client:
+            await client.ingest(entities=[])
+
+    with pytest.raises(DiodeClientError) as err:
+        asyncio.run(run())
+    assert err.value.status_code == grpc.StatusCode.UNAVAILABLE
+
+
+def test_async_interceptor_prefixes_bytes_and_str_methods():
+    """Check that DiodeMethodAsyncClientInterceptor prefixes bytes and str methods."""
+    interceptor = DiodeMethodAsyncClientInterceptor("/my/path")
+
+    async def continuation(client_call_details, _):
+        return client_call_details.method
+
+    async def run(method):
+        client_call_details = grpc.aio.ClientCallDetails(method, None, None, None, None)
+        unary = await interceptor.intercept_unary_unary(continuation, client_call_details, None)
+        stream = await interceptor.intercept_stream_unary(continuation, client_call_details, None)
+        return unary, stream
+
+    assert asyncio.run(run(b"/diode.v1.IngesterService/Ingest")) == (b"/my/path/diode.v1.IngesterService/Ingest",) * 2
+    assert asyncio.run(run("/diode.v1.IngesterService/Ingest")) == ("/my/path/diode.v1.IngesterService/Ingest",) * 2
+
+
+def test_async_client_ingest_retries_with_same_request_id():
+    """Check that AsyncDiodeClient.ingest() retries retriable errors, resending the same request id."""
+    servicer = _Servicer()
+    ingest = servicer.ingest
+
+    async def flaky_ingest(request, context):
+        if not servicer.requests:
+            servicer.requests.append(request)
+            await context.abort(grpc.StatusCode.UNAVAILABLE, "try again")
+        return await ingest(request, context)
+
+    servicer.ingest = flaky_ingest
+
+    async def run():
+        server, port = await _start_server(servicer)
+        try:
+            async with AsyncDiodeClient(
+                target=f"grpc://127.0.0.1:{port}",
+                app_name="my-producer",
+                app_version="0.0.1",
+                api_key="abcde",
+                retry_policy=RetryPolicy(max_attempts=2, initial_backoff=0.01),
+            ) as client:
+                return await client.ingest([Entity(site="Site ABC")])
+        finally:
+            await server.stop(None)
+
+    response = asyncio.run(run())
+    assert list(response.errors) == ["1 entities"]
+    assert len(servicer.requests) == 2
+    assert servicer.requests[0].id == servicer.requests[1].id
+
+
+def test_async_client_warm_up_connects_on_enter():
+    """Check that AsyncDiodeClient connects when entering its context with warm_up."""
+    servicer = _Servicer()
+
+    async def run():
+        server, port = await _start_server(servicer)
+        try:
+            async with AsyncDiodeClient(
+                target=f"grpc://127.0.0.1:{port}",
+                app_name="my-producer",
+                app_version="0.0.1",
+                api_key="abcde",
+                warm_up=True,
+                connect_timeout=5,
+            ) as client:
+                return client.connect_time
+        finally:
+            await server.stop(None)
+
+    assert asyncio.run(run()) > 0
+
+
+def test_async_client_connect_raises_connection_error_on_timeout():
+    """Check that AsyncDiodeClient.connect() raises DiodeConnectionError when not ready in time."""
+
+    async def run():
+        async with AsyncDiodeClient(
+            target="grpc://127.0.0.1:1",
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+        ) as client:
+            await client.connect(timeout=0.1)
+
+    with pytest.raises(DiodeConnectionError):
+        asyncio.run(run())
+
+
+def test_async_client_warm_up_failure_closes_client():
+    """Check that AsyncDiodeClient closes its channel when the warm-up connection fails on enter."""
+    closed = []
+
+    async def run():
+        client = AsyncDiodeClient(
+            target="grpc://127.0.0.1:1",
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+            warm_up=True,
+            connect_timeout=0.1,
+        )
+        with mock.patch.object(client._channel, "close", wraps=client._channel.close) as mock_close:
+            try:
+                async with client:
+                    pass
+            finally:
+                closed.append(mock_close.await_count)
+
+    with pytest.raises(DiodeConnectionError):
+        asyncio.run(run())
+    assert closed == [1]
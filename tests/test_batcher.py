@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs - Tests."""
+import queue
+import threading
+from unittest import mock
+
+import grpc
+import pytest
+
+from netboxlabs.diode.sdk.batcher import DiodeBatcher
+from netboxlabs.diode.sdk.client import DiodeClient, _entity_field_size
+from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+from netboxlabs.diode.sdk.exceptions import DiodeClientError
+from netboxlabs.diode.sdk.ingester import Entity
+
+
+@pytest.fixture
+def client():
+    """Client with a mocked Ingest RPC."""
+    client = DiodeClient(
+        target="grpc://localhost:8081",
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+    )
+    with mock.patch.object(client, "_stub") as mock_stub:
+        mock_stub.Ingest = mock.Mock(return_value=ingester_pb2.IngestResponse())
+        yield client
+
+
+def _sent_batches(client):
+    """Return entities of each request sent through the mocked Ingest RPC."""
+    return [list(call.args[0].entities) for call in client._stub.Ingest.call_args_list]
+
+
+def test_client_batcher_returns_batcher_bound_to_client(client):
+    """Check that DiodeClient.batcher() returns a batcher bound to the client."""
+    with client.batcher(max_linger=60) as batcher:
+        assert isinstance(batcher, DiodeBatcher)
+        assert batcher._client is client
+
+
+def test_batcher_flushes_when_max_batch_size_is_reached(client):
+    """Check that the batcher sends a batch once max_batch_size entities are queued."""
+    entities = [Entity(site=f"Site {i}") for i in range(5)]
+    with DiodeBatcher(client, max_batch_size=5, max_linger=60) as batcher:
+        for entity in entities:
+            batcher.put(entity)
+        assert batcher.flush(timeout=5)
+    assert _sent_batches(client) == [entities]
+
+
+def test_batcher_splits_batches_by_max_batch_size(client):
+    """Check that the batcher never sends more than max_batch_size entities per request."""
+    entities = [Entity(site=f"Site {i}") for i in range(25)]
+    with DiodeBatcher(client, max_batch_size=10, max_linger=60) as batcher:
+        for entity in entities:
+            batcher.put(entity)
+    batches = _sent_batches(client)
+    assert all(len(batch) <= 10 for batch in batches)
+    assert [e for batch in batches for e in batch] == entities
+
+
+def test_batcher_splits_batches_by_max_batch_bytes(client):
+    """Check that the batcher keeps batches within max_batch_bytes."""
+    entities = [Entity(site=f"Site {i:03}") for i in range(100)]
+    entity_size = _entity_field_size(entities[0].ByteSize())
+    with DiodeBatcher(client, max_batch_bytes=entity_size * 7, max_linger=60) as batcher:
+        for entity in entities:
+            batcher.put(entity)
+    batches = _sent_batches(client)
+    assert all(len(batch) <= 7 for batch in batches)
+    assert [e for batch in batches for e in batch] == entities
+
+
+def test_batcher_flushes_after_max_linger(client):
+    """Check that the batcher sends a partial batch once max_linger has passed."""
+    sent = threading.Event()
+    client._stub.Ingest.side_effect = lambda *args, **kwargs: sent.set() or ingester_pb2.IngestResponse()
+    with DiodeBatcher(client, max_batch_size=100, max_linger=0.05) as batcher:
+        batcher.put(Entity(site="Site ABC"))
+        assert sent.wait(timeout=5)
+    assert _sent_batches(client) == [[Entity(site="Site ABC")]]
+
+
+def test_batcher_close_flushes_queued_entities(client):
+    """Check that DiodeBatcher.close() sends queued entities."""
+    batcher = DiodeBatcher(client, max_batch_size=100, max_linger=60)
+    batcher.put(Entity(site="Site ABC"))
+    batcher.close()
+    assert batcher.closed
+    assert _sent_batches(client) == [[Entity(site="Site ABC")]]
+
+
+def test_batcher_put_raises_after_close(client):
+    """Check that DiodeBatcher.put() raises once the batcher is closed."""
+    batcher = DiodeBatcher(client)
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.put(Entity(site="Site ABC"))
+
+
+def test_batcher_put_raises_full_when_queue_bytes_exceeded(client):
+    """Check that DiodeBatcher.put() raises queue.Full when max_queue_bytes would be exceeded."""
+    release = threading.Event()
+    client._stub.Ingest.side_effect = lambda *args, **kwargs: release.wait() and ingester_pb2.IngestResponse()
+    entity = Entity(site="Site ABC")
+    entity_size = _entity_field_size(entity.ByteSize())
+    batcher = DiodeBatcher(client, max_batch_size=1, max_linger=60, max_queue_bytes=entity_size * 2)
+    try:
+        batcher.put(entity)
+        batcher.put(entity)
+        with pytest.raises(queue.Full):
+            batcher.put(entity, block=False)
+        with pytest.raises(queue.Full):
+            batcher.put(entity, timeout=0.01)
+        assert batcher.pending_bytes == entity_size * 2
+    finally:
+        release.set()
+        batcher.close()
+    assert batcher.pending_bytes == 0
+
+
+def test_batcher_put_rejects_entity_larger_than_queue(client):
+    """Check that DiodeBatcher.put() rejects an entity which can never fit into the queue."""
+    with DiodeBatcher(client, max_queue_bytes=1) as batcher, pytest.raises(ValueError):
+        batcher.put(Entity(site="Site ABC"))
+
+
+def test_batcher_reports_errors_to_on_error(client):
+    """Check that the batcher reports ingest errors to on_error and keeps running."""
+    grpc_error = grpc.RpcError()
+    grpc_error.code = lambda: grpc.StatusCode.UNAVAILABLE
+    grpc_error.details = lambda: "unavailable"
+    client._stub.Ingest.side_effect = [grpc_error, ingester_pb2.IngestResponse()]
+    on_error = mock.Mock()
+    on_response = mock.Mock()
+    with DiodeBatcher(client, max_batch_size=1, on_error=on_error, on_response=on_response) as batcher:
+        batcher.put(Entity(site="Site A"))
+        batcher.put(Entity(site="Site B"))
+
+    on_error.assert_called_once()
+    batch, err = on_error.call_args.args
+    assert batch == [Entity(site="Site A")]
+    assert isinstance(err, DiodeClientError)
+    assert err.status_code == grpc.StatusCode.UNAVAILABLE
+    on_response.assert_called_once_with([Entity(site="Site B")], ingester_pb2.IngestResponse())
+
+
+def test_batcher_rejects_invalid_limits(client):
+    """Check that DiodeBatcher rejects non-positive limits."""
+    with pytest.raises(ValueError):
+        DiodeBatcher(client, max_batch_size=0)
+    with pytest.raises(ValueError):
+        DiodeBatcher(client, max_queue_bytes=0)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs - Tests."""
+from unittest import mock
+
+import grpc
+import pytest
+
+from netboxlabs.diode.sdk.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from netboxlabs.diode.sdk.exceptions import DiodeCircuitOpenError
+
+
+class _RpcError(grpc.RpcError):
+    def __init__(self, code):
+        self._code = code
+
+    def code(self):
+        return self._code
+
+
+UNAVAILABLE = _RpcError(grpc.StatusCode.UNAVAILABLE)
+
+
+def _open_breaker(**kwargs):
+    breaker = CircuitBreaker(minimum_calls=2, window_size=4, **kwargs)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record(UNAVAILABLE)
+    return breaker
+
+
+def test_breaker_opens_once_failure_rate_reaches_threshold():
+    """Check that the breaker opens once the failure rate of the rolling window reaches the threshold."""
+    breaker = CircuitBreaker(failure_rate_threshold=0.5, minimum_calls=4, window_size=4)
+    for err in (None, None, UNAVAILABLE):
+        assert breaker.allow()
+        breaker.record(err)
+    assert breaker.state == CLOSED
+    breaker.record(UNAVAILABLE)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.snapshot() == {"state": OPEN, "calls": 4, "failures": 2, "failure_rate": 0.5, "rejected": 1}
+
+
+def test_breaker_rolls_failures_out_of_window():
+    """Check that only the last window_size calls count towards the failure rate."""
+    breaker = CircuitBreaker(failure_rate_threshold=0.5, minimum_calls=2, window_size=2)
+    breaker.record(UNAVAILABLE)
+    breaker.record(None)
+    assert breaker.state == OPEN
+
+    breaker = CircuitBreaker(failure_rate_threshold=0.6, minimum_calls=3, window_size=3)
+    for err in (UNAVAILABLE, None, None, UNAVAILABLE, None):
+        breaker.record(err)
+    assert breaker.state == CLOSED
+    assert breaker.failure_rate == pytest.approx(1 / 3)
+
+
+def test_breaker_ignores_errors_from_a_reachable_server():
+    """Check that errors with other status codes count as successes."""
+    breaker = CircuitBreaker(minimum_calls=2, window_size=2)
+    for _ in range(4):
+        breaker.record(_RpcError(grpc.StatusCode.INVALID_ARGUMENT))
+    assert breaker.state == CLOSED
+    assert breaker.failure_rate == 0.0
+
+
+def test_breaker_half_open_probe_closes_on_success():
+    """Check that the breaker lets a probe through after open_duration and closes when it succeeds."""
+    transitions = []
+    with mock.patch("time.monotonic", return_value=100.0):
+        breaker = _open_breaker(open_duration=10, on_state_change=lambda *t: transitions.append(t))
+        assert breaker.retry_after() == 10
+    with mock.patch("time.monotonic", return_value=110.0):
+        assert breaker.state == HALF_OPEN
+        permit = breaker.allow()
+        assert permit.probe
+        assert not breaker.allow()
+        breaker.record(None, permit)
+    assert breaker.state == CLOSED
+    assert breaker.failure_rate == 0.0
+    assert transitions == [(CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)]
+
+
+def test_breaker_half_open_probe_reopens_on_failure():
+    """Check that a failed probe opens the breaker again."""
+    with mock.patch("time.monotonic", return_value=100.0):
+        breaker = _open_breaker(open_duration=10)
+    with mock.patch("time.monotonic", return_value=110.0):
+        assert breaker.allow()
+        breaker.record(UNAVAILABLE)
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+        assert breaker.retry_after() == 10
+
+
+def test_breaker_ignores_calls_allowed_before_half_open():
+    """Check that a call allowed while closed and completing once half-open is not counted as a probe."""
+    with mock.patch("time.monotonic", return_value=100.0):
+        breaker = CircuitBreaker(minimum_calls=2, window_size=4, open_duration=10)
+        slow = breaker.allow()
+        for _ in range(2):
+            breaker.record(UNAVAILABLE, breaker.allow())
+        assert breaker.state == OPEN
+    with mock.patch("time.monotonic", return_value=110.0):
+        probe = breaker.allow()
+        assert probe.probe
+        assert not slow.probe
+        breaker.record(None, slow)
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow()
+        breaker.record(None, probe)
+    assert breaker.state == CLOSED
+    breaker.record(UNAVAILABLE, slow)
+    assert breaker.snapshot()["calls"] == 0
+
+
+def test_breaker_rejects_invalid_arguments():
+    """Check that the breaker rejects invalid arguments."""
+    with pytest.raises(ValueError):
+        CircuitBreaker(failure_rate_threshold=0)
+    with pytest.raises(ValueError):
+        CircuitBreaker(minimum_calls=20, window_size=10)
+    with pytest.raises(ValueError):
+        CircuitBreaker(half_open_max_calls=0)
+
+
+def test_circuit_open_error_is_an_unavailable_client_error():
+    """Check that DiodeCircuitOpenError is a DiodeClientError with status code UNAVAILABLE."""
+    err = DiodeCircuitOpenError(retry_after=3.0)
+    assert err.status_code == grpc.StatusCode.UNAVAILABLE
+    assert err.retry_after == 3.0
+    assert "circuit breaker open" in err.details
+    assert repr(err) == "<DiodeCircuitOpenError retry after: 3.0s>"
@@ -1,24 +1,47 @@
 #!/usr/bin/env python
 # Copyright 2024 NetBox Labs Inc
 """NetBox Labs - Tests."""
+import concurrent.futures
 import os
+import threading
+import time
+import uuid
 from unittest import mock
 
 import grpc
 import pytest
+from conftest import IngestServer
 
+from netboxlabs.diode.sdk.breaker import CircuitBreaker
 from netboxlabs.diode.sdk.client import (
     _DIODE_API_KEY_ENVVAR_NAME,
     _DIODE_SENTRY_DSN_ENVVAR_NAME,
     DiodeClient,
     DiodeMethodClientInterceptor,
+    _AckedRequests,
     _ClientCallDetails,
+    _entity_field_size,
     _get_api_key,
     _get_sentry_dsn,
     _load_certs,
     parse_target,
 )
-from netboxlabs.diode.sdk.exceptions import DiodeClientError, DiodeConfigError
+from netboxlabs.diode.sdk.compression import AdaptiveCompression
+from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+from netboxlabs.diode.sdk.exceptions import (
+    DiodeCircuitOpenError,
+    DiodeClientError,
+    DiodeConfigError,
+    DiodeConnectionError,
+)
+from netboxlabs.diode.sdk.fingerprint import FingerprintCache
+from netboxlabs.diode.sdk.ingester import Device, Entity
+from netboxlabs.diode.sdk.limiter import AdaptiveConcurrencyLimiter
+from netboxlabs.diode.sdk.metrics import ClientMetrics
+from netboxlabs.diode.sdk.registry import ChannelRegistry
+from netboxlabs.diode.sdk.retry import RetryPolicy
+from netboxlabs.diode.sdk.spool import Spool
+from netboxlabs.diode.sdk.wire import serialize_entities
 
 
 def test_init():
@@ -339,7 +362,7 @@ def test_client_setup_sentry_called_when_sentry_dsn_exists():
             sentry_dsn="https://user@password.mock.dsn/123456",
         )
         mock_setup_sentry.assert_called_once_with(
-            "https://user@password.mock.dsn/123456", 1.0, 1.0
+            "https://user@password.mock.dsn/123456", 0.01, 0.0
         )
 
 
@@ -485,3 +508,1274 @@ def test_interceptor_intercepts_stream_unary_calls():
         )
         == "/my/path/diode.v1.IngesterService/Ingest"
     )
+
+
+def _mock_ingest_response(errors=None):
+    """Build a mock Ingest RPC returning a response with the given errors."""
+    return mock.Mock(return_value=ingester_pb2.IngestResponse(errors=errors or []))
+
+
+def test_ingest_sends_single_request_without_max_request_size():
+    """Check that DiodeClient.ingest() sends all entities in a single request by default."""
+    client = DiodeClient(
+        target="grpc://localhost:8081",
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+    )
+    entities = [Entity(site=f"Site {i}") for i in range(100)]
+    with mock.patch.object(client, "_stub") as mock_stub:
+        mock_stub.Ingest = _mock_ingest_response()
+        client.ingest(entities=entities)
+
+        mock_stub.Ingest.assert_called_once()
+        request = mock_stub.Ingest.call_args.args[0]
+        assert len(request.entities) == 100
+
+
+def test_ingest_splits_entities_into_requests_within_max_request_size():
+    """Check that DiodeClient.ingest() splits entities into requests within max_request_size."""
+    client = DiodeClient(
+        target="grpc://localhost:8081",
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+    )
+    entities = [
+        Entity(device=Device(name=f"Device {i}", site="Site ABC", role="Role ABC"))
+        for i in range(1000)
+    ]
+    with mock.patch.object(client, "_stub") as mock_stub:
+        mock_stub.Ingest = _mock_ingest_response()
+        client.ingest(entities=iter(entities), max_request_size=4096)
+
+        requests = [call.args[0] for call in mock_stub.Ingest.call_args_list]
+        assert len(requests) > 1
+        assert all(request.ByteSize() <= 4096 for request in requests)
+        assert len({request.id for request in requests}) == len(requests)
+        assert [e for request in requests for e in request.entities] == entities
+
+
+def test_ingest_fills_requests_up_to_max_request_size():
+    """Check that DiodeClient.ingest() does not leave room for another entity in a chunk."""
+    client = DiodeClient(
+        target="grpc://localhost:8081",
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+    )
+    entities = [Entity(site=f"Site {i:04}") for i in range(1000)]
+    entity_size = ingester_pb2.IngestRequest(entities=entities[:1]).ByteSize()
+    with mock.patch.object(client, "_stub") as mock_stub:
+        mock_stub.Ingest = _mock_ingest_response()
+        client.ingest(entities=entities, max_request_size=8192)
+
+        requests = [call.args[0] for call in mock_stub.Ingest.call_args_list]
+        for request in requests[:-1]:
+            assert 8192 - entity_size < request.ByteSize() <= 8192
+
+
+def test_ingest_merges_errors_of_chunked_responses():
+    """Check that DiodeClient.ingest() merges errors of all chunked responses."""
+    client = DiodeClient(
+        target="grpc://localhost:8081",
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+    )
+    entities = [Entity(site=f"Site {i}") for i in range(3)]
+    with mock.patch.object(client, "_stub") as mock_stub:
+        mock_stub.Ingest = mock.Mock(
+            side_effect=[
+                ingester_pb2.IngestResponse(errors=[f"error {i}"]) for i in range(3)
+            ]
+        )
+        response = client.ingest(entities=entities, max_request_size=1)
+
+        assert mock_stub.Ingest.call_count == 3
+        assert list(response.errors) == ["error 0", "error 1", "error 2"]
+
+
+def test_ingest_raises_value_error_for_non_positive_max_request_size():
+    """Check that DiodeClient.ingest() rejects a non-positive max_request_size."""
+    client = DiodeClient(
+        target="grpc://localhost:8081",
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+    )
+    with pytest.raises(ValueError):
+        client.ingest(entities=[Entity(site="Site ABC")], max_request_size=0)
+
+
+def test_entity_field_size_matches_serialized_request_size():
+    """Check that _entity_field_size() matches the size an entity adds to a request."""
+    for name in ["a", "b" * 200, "c" * 20000]:
+        entity = Entity(site=name)
+        request = ingester_pb2.IngestRequest(entities=[entity])
+        assert _entity_field_size(entity.ByteSize()) == request.ByteSize()
+
+
+def test_client_without_pool_uses_single_channel():
+    """Check that DiodeClient does not set up a channel pool by default."""
+    with mock.patch("grpc.insecure_channel") as mock_insecure_channel:
+        client = DiodeClient(
+            target="grpc://localhost:8081",
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+        )
+        mock_insecure_channel.assert_called_once()
+        assert client.pool is None
+
+
+def test_client_sets_up_channel_pool():
+    """Check that DiodeClient sets up a pool of channels with their own connections and interceptors."""
+    with (
+        mock.patch("grpc.insecure_channel") as mock_insecure_channel,
+        mock.patch("grpc.intercept_channel") as mock_intercept_channel,
+    ):
+        client = DiodeClient(
+            target="grpc://localhost:8081/my-path",
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+            channel_pool_size=3,
+            channel_pool_policy="least_outstanding",
+        )
+        assert mock_insecure_channel.call_count == 3
+        assert mock_intercept_channel.call_count == 3
+        _, kwargs = mock_insecure_channel.call_args
+        assert ("grpc.use_local_subchannel_pool", 1) in kwargs["options"]
+        assert len(client.pool) == 3
+        assert client.pool.policy == "least_outstanding"
+        assert client.channel is client.pool.channels[0].channel
+
+
+def test_client_rejects_invalid_channel_pool_size():
+    """Check that DiodeClient rejects a channel pool size lower than 1."""
+    with pytest.raises(ValueError):
+        DiodeClient(
+            target="grpc://localhost:8081",
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+            channel_pool_size=0,
+        )
+
+
+def test_client_ingest_spreads_requests_over_channel_pool():
+    """Check that DiodeClient.ingest() spreads requests over the channels of the pool."""
+    client = DiodeClient(
+        target="grpc://localhost:8081",
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        channel_pool_size=2,
+    )
+    stubs = [mock.Mock(), mock.Mock()]
+    for pooled, stub in zip(client.pool.channels, stubs):
+        stub.Ingest = _mock_ingest_response()
+        pooled.stub = stub
+
+    for _ in range(4):
+        client.ingest(entities=[Entity(site="Site ABC")])
+
+    assert [stub.Ingest.call_count for stub in stubs] == [2, 2]
+    assert [pooled.outstanding for pooled in client.pool.channels] == [0, 0]
+
+
+def test_client_close_closes_all_pooled_channels():
+    """Check that DiodeClient.close() closes every channel of the pool."""
+    client = DiodeClient(
+        target="grpc://localhost:8081",
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        channel_pool_size=2,
+    )
+    with (
+        mock.patch.object(client.pool.channels[0].channel, "close") as mock_close_0,
+        mock.patch.object(client.pool.channels[1].channel, "close") as mock_close_1,
+    ):
+        client.close()
+        mock_close_0.assert_called_once()
+        mock_close_1.assert_called_once()
+
+
+def test_ingest_future_resolves_to_response(ingest_server):
+    """Check that DiodeClient.ingest_future() returns a future resolving to the response."""
+    ingest_server.handler = lambda request, context: ingester_pb2.IngestResponse(errors=[request.id])
+    callback = mock.Mock()
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+    ) as client:
+        future = client.ingest_future([Entity(site="Site ABC")], callback=callback)
+        response = future.result(timeout=5)
+
+    assert isinstance(future, concurrent.futures.Future)
+    (request,) = ingest_server.requests
+    assert list(response.errors) == [request.id]
+    assert ingest_server.metadata[0]["diode-api-key"] == "abcde"
+    callback.assert_called_once_with(future)
+
+
+def test_ingest_future_raises_client_error():
+    """Check that DiodeClient.ingest_future() returns a future raising DiodeClientError."""
+    with DiodeClient(
+        target="grpc://invalid:8081",
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+    ) as client:
+        future = client.ingest_future([])
+        with pytest.raises(DiodeClientError) as err:
+            future.result(timeout=30)
+    assert err.value.status_code == grpc.StatusCode.UNAVAILABLE
+
+
+def test_ingest_many_keeps_requests_in_flight(ingest_server):
+    """Check that DiodeClient.ingest_many() sends batches concurrently and returns futures in order."""
+    barrier = threading.Barrier(5, timeout=5)
+
+    def handler(request, context):
+        barrier.wait()
+        return ingester_pb2.IngestResponse(errors=[request.entities[0].site.name])
+
+    ingest_server.handler = handler
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+    ) as client:
+        futures = client.ingest_many([[Entity(site=f"Site {i}")] for i in range(5)])
+        responses = [future.result(timeout=10) for future in futures]
+
+    assert [list(response.errors) for response in responses] == [[f"Site {i}"] for i in range(5)]
+
+
+def test_ingest_many_caps_requests_in_flight(ingest_server):
+    """Check that DiodeClient.ingest_many() keeps at most max_in_flight requests in flight."""
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+
+    def handler(request, context):
+        with lock:
+            in_flight.append(request.id)
+            peak.append(len(in_flight))
+        time.sleep(0.02)
+        with lock:
+            in_flight.remove(request.id)
+        return ingester_pb2.IngestResponse()
+
+    ingest_server.handler = handler
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        max_in_flight=2,
+    ) as client:
+        futures = client.ingest_many([[Entity(site=f"Site {i}")] for i in range(10)])
+        concurrent.futures.wait(futures, timeout=10)
+
+    assert len(ingest_server.requests) == 10
+    assert max(peak) <= 2
+
+
+def test_ingest_future_releases_pooled_channel(ingest_server):
+    """Check that DiodeClient.ingest_future() releases the pooled channel once done."""
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        channel_pool_size=2,
+    ) as client:
+        futures = client.ingest_many([[Entity(site="Site ABC")]] * 4)
+        concurrent.futures.wait(futures, timeout=10)
+        assert [pooled.outstanding for pooled in client.pool.channels] == [0, 0]
+
+
+def test_client_rejects_invalid_max_in_flight():
+    """Check that DiodeClient rejects max_in_flight lower than 1."""
+    with pytest.raises(ValueError):
+        DiodeClient(
+            target="grpc://localhost:8081",
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+            max_in_flight=0,
+        )
+
+
+def _fail_first(attempts, code=grpc.StatusCode.UNAVAILABLE):
+    """Build a server handler failing the first attempts with the given status code."""
+    calls = []
+
+    def handler(request, context):
+        calls.append(request.id)
+        if len(calls) <= attempts:
+            context.abort(code, "try again")
+        return ingester_pb2.IngestResponse(errors=[f"attempt {len(calls)}"])
+
+    return handler
+
+
+def test_ingest_retries_with_same_request_id(ingest_server):
+    """Check that DiodeClient.ingest() retries retriable errors, resending the same request id."""
+    ingest_server.handler = _fail_first(2)
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        retry_policy=RetryPolicy(max_attempts=3, initial_backoff=0.01),
+    ) as client:
+        response = client.ingest([Entity(site="Site ABC")])
+
+    assert list(response.errors) == ["attempt 3"]
+    assert len(ingest_server.requests) == 3
+    assert len({request.id for request in ingest_server.requests}) == 1
+
+
+def test_ingest_raises_client_error_when_retries_exhausted(ingest_server):
+    """Check that DiodeClient.ingest() raises DiodeClientError once retries are exhausted."""
+    ingest_server.handler = _fail_first(5, code=grpc.StatusCode.RESOURCE_EXHAUSTED)
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        retry_policy=RetryPolicy(max_attempts=2, initial_backoff=0.01),
+    ) as client, pytest.raises(DiodeClientError) as err:
+        client.ingest([Entity(site="Site ABC")])
+
+    assert err.value.status_code == grpc.StatusCode.RESOURCE_EXHAUSTED
+    assert len(ingest_server.requests) == 2
+
+
+def test_ingest_does_not_retry_non_retriable_errors(ingest_server):
+    """Check that DiodeClient.ingest() does not retry non-retriable errors."""
+    ingest_server.handler = _fail_first(1, code=grpc.StatusCode.INVALID_ARGUMENT)
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        retry_policy=RetryPolicy(initial_backoff=0.01),
+    ) as client, pytest.raises(DiodeClientError) as err:
+        client.ingest([Entity(site="Site ABC")])
+
+    assert err.value.status_code == grpc.StatusCode.INVALID_ARGUMENT
+    assert len(ingest_server.requests) == 1
+
+
+def test_ingest_applies_attempt_timeout(ingest_server):
+    """Check that DiodeClient.ingest() limits each attempt to the attempt timeout."""
+
+    def handler(request, context):
+        time.sleep(0.5)
+        return ingester_pb2.IngestResponse()
+
+    ingest_server.handler = handler
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        retry_policy=RetryPolicy(max_attempts=2, initial_backoff=0.01, attempt_timeout=0.05),
+    ) as client, pytest.raises(DiodeClientError) as err:
+        client.ingest([Entity(site="Site ABC")])
+
+    assert err.value.status_code == grpc.StatusCode.DEADLINE_EXCEEDED
+
+
+def test_ingest_future_retries_with_same_request_id(ingest_server):
+    """Check that DiodeClient.ingest_future() retries retriable errors, resending the same request id."""
+    ingest_server.handler = _fail_first(2)
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        max_in_flight=1,
+        retry_policy=RetryPolicy(max_attempts=3, initial_backoff=0.01),
+    ) as client:
+        response = client.ingest_future([Entity(site="Site ABC")]).result(timeout=10)
+        # The in-flight slot is released once the future is resolved
+        assert client._in_flight.acquire(timeout=1)
+
+    assert list(response.errors) == ["attempt 3"]
+    assert len({request.id for request in ingest_server.requests}) == 1
+
+
+def test_ingest_future_reports_spool_errors_through_future(ingest_server, tmp_path):
+    """Check that DiodeClient.ingest_future() fails its future and releases its in-flight slot when spooling fails."""
+    callback = mock.Mock()
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        max_in_flight=1,
+        spool=tmp_path,
+    ) as client:
+        with mock.patch.object(client.spool, "append", side_effect=OSError("disk full")):
+            futures = [client.ingest_future([Entity(site="Site ABC")], callback=callback) for _ in range(2)]
+        for future in futures:
+            with pytest.raises(OSError, match="disk full"):
+                future.result(timeout=0)
+        assert callback.call_count == 2
+        client.ingest_future([Entity(site="Site DEF")]).result(timeout=5)
+
+    assert [request.entities[0].site.name for request in ingest_server.requests] == ["Site DEF"]
+
+
+def test_client_sets_channel_compression():
+    """Check that DiodeClient sets a grpc.Compression algorithm on the channel."""
+    with mock.patch("grpc.insecure_channel") as mock_insecure_channel:
+        DiodeClient(
+            target="grpc://localhost:8081",
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+            compression=grpc.Compression.Gzip,
+        )
+        _, kwargs = mock_insecure_channel.call_args
+        assert kwargs["compression"] == grpc.Compression.Gzip
+
+
+def test_client_does_not_set_channel_compression_for_adaptive_compression():
+    """Check that DiodeClient selects adaptive compression per call rather than on the channel."""
+    with mock.patch("grpc.insecure_channel") as mock_insecure_channel:
+        DiodeClient(
+            target="grpc://localhost:8081",
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+            compression=AdaptiveCompression(),
+        )
+        _, kwargs = mock_insecure_channel.call_args
+        assert kwargs["compression"] is None
+
+
+def test_ingest_compresses_per_call_and_reports_sizes(ingest_server):
+    """Check that DiodeClient.ingest() applies per-call compression and reports sizes before and after."""
+    entities = [Entity(device=Device(name=f"Device {i}", site="Site ABC", manufacturer="Cisco")) for i in range(200)]
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        compression_sample_interval=1,
+    ) as client:
+        client.ingest(entities, compression=grpc.Compression.Gzip)
+        client.ingest(entities)
+        stats = client.compression_stats
+
+    assert len(ingest_server.requests) == 2
+    assert list(ingest_server.requests[0].entities) == entities
+    request_size = ingest_server.requests[0].ByteSize()
+    assert stats["requests"] == 2
+    assert stats["compressed_requests"] == 1
+    assert stats["request_bytes"] == request_size + ingest_server.requests[1].ByteSize()
+    assert stats["sent_bytes"] < stats["request_bytes"]
+
+
+def test_ingest_does_not_measure_compressed_size_by_default(ingest_server):
+    """Check that DiodeClient.ingest() only compresses requests again to measure their size when sampling is enabled."""
+    entities = [Entity(site=f"Site {i}") for i in range(100)]
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        compression=grpc.Compression.Gzip,
+    ) as client, mock.patch("netboxlabs.diode.sdk.compression.compressed_size") as mock_compressed_size:
+        client.ingest(entities)
+        client.ingest(entities)
+        stats = client.compression_stats
+
+    mock_compressed_size.assert_not_called()
+    assert stats["compressed_requests"] == 2
+    assert stats["sampled_requests"] == 0
+    assert stats["sent_bytes"] is None
+
+
+def test_ingest_samples_compressed_size(ingest_server):
+    """Check that DiodeClient.ingest() measures the compressed size of one in compression_sample_interval requests."""
+    entities = [Entity(site=f"Site {i}") for i in range(100)]
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        compression=grpc.Compression.Gzip,
+        compression_sample_interval=2,
+    ) as client:
+        for _ in range(4):
+            client.ingest(entities)
+        stats = client.compression_stats
+
+    assert stats["compressed_requests"] == 4
+    assert stats["sampled_requests"] == 2
+    assert stats["sent_bytes"] < stats["request_bytes"]
+
+
+def test_ingest_selects_adaptive_compression_by_size():
+    """Check that DiodeClient.ingest() passes the adaptive compression selected for each request."""
+    client = DiodeClient(
+        target="grpc://localhost:8081",
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        compression=AdaptiveCompression(algorithm=grpc.Compression.Deflate, min_size=1024),
+    )
+    with mock.patch.object(client, "_stub") as mock_stub:
+        mock_stub.Ingest = _mock_ingest_response()
+        client.ingest([Entity(site="Site ABC")])
+        client.ingest([Entity(site=f"Site {i}") for i in range(200)])
+
+        compressions = [call.kwargs["compression"] for call in mock_stub.Ingest.call_args_list]
+        assert compressions == [grpc.Compression.NoCompression, grpc.Compression.Deflate]
+    assert client.compression_stats["compressed_requests"] == 1
+
+
+def test_ingest_future_compresses_per_call(ingest_server):
+    """Check that DiodeClient.ingest_future() applies per-call compression and reports sizes."""
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        compression_sample_interval=1,
+    ) as client:
+        future = client.ingest_future([Entity(site="Site ABC")] * 100, compression=grpc.Compression.Deflate)
+        future.result(timeout=5)
+        # The sizes are recorded by a callback of the underlying call
+        deadline = time.monotonic() + 5
+        while client.compression_stats["requests"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stats = client.compression_stats
+
+    assert stats["compressed_requests"] == 1
+    assert stats["sent_bytes"] < stats["request_bytes"]
+
+
+def test_client_connect_reports_connect_time(ingest_server):
+    """Check that DiodeClient.connect() establishes the connection and reports its setup time."""
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        channel_pool_size=2,
+    ) as client:
+        assert client.connect_time is None
+        connect_time = client.connect(timeout=5)
+        assert connect_time > 0
+        assert client.connect_time == connect_time
+
+
+def test_client_warm_up_connects_during_construction(ingest_server):
+    """Check that DiodeClient connects during construction with warm_up."""
+    with mock.patch("grpc.channel_ready_future", wraps=grpc.channel_ready_future) as mock_ready_future:
+        with DiodeClient(
+            target=ingest_server.target,
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+            warm_up=True,
+            connect_timeout=5,
+        ) as client:
+            assert client.connect_time is not None
+        mock_ready_future.assert_called_once_with(client.channel)
+
+
+def test_client_connect_raises_connection_error_on_timeout():
+    """Check that DiodeClient.connect() raises DiodeConnectionError when not ready in time."""
+    with DiodeClient(
+        target="grpc://127.0.0.1:1",
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+    ) as client:
+        with pytest.raises(DiodeConnectionError):
+            client.connect(timeout=0.1)
+        assert client.connect_time is None
+
+
+def test_client_warm_up_failure_closes_client(tmp_path):
+    """Check that DiodeClient releases its channels and spool when the warm-up connection fails."""
+    registry = ChannelRegistry()
+    with pytest.raises(DiodeConnectionError):
+        DiodeClient(
+            target="grpc://127.0.0.1:1",
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+            channel_pool_size=2,
+            channel_registry=registry,
+            warm_up=True,
+            connect_timeout=0.1,
+            spool=tmp_path,
+        )
+    assert len(registry) == 0
+
+    with mock.patch.object(DiodeClient, "close", autospec=True) as mock_close, pytest.raises(DiodeConnectionError):
+        DiodeClient(
+            target="grpc://127.0.0.1:1",
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+            warm_up=True,
+            connect_timeout=0.1,
+        )
+    mock_close.assert_called_once()
+
+
+def test_ingest_passes_wait_for_ready():
+    """Check that DiodeClient.ingest() passes wait_for_ready to the call."""
+    client = DiodeClient(
+        target="grpc://localhost:8081",
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        wait_for_ready=True,
+    )
+    with mock.patch.object(client, "_stub") as mock_stub:
+        mock_stub.Ingest = _mock_ingest_response()
+        client.ingest([Entity(site="Site ABC")])
+        assert mock_stub.Ingest.call_args.kwargs["wait_for_ready"] is True
+
+
+def test_ingest_with_wait_for_ready_waits_for_connection(ingest_server):
+    """Check that DiodeClient.ingest() with wait_for_ready waits for the server rather than failing fast."""
+    port = ingest_server.port
+    ingest_server.stop()
+    late_server = IngestServer(port=port)
+    timer = threading.Timer(0.3, late_server.start)
+    timer.start()
+    try:
+        with DiodeClient(
+            target=f"grpc://127.0.0.1:{port}",
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+            wait_for_ready=True,
+            retry_policy=RetryPolicy(max_attempts=1, attempt_timeout=10),
+        ) as client:
+            client.ingest([Entity(site="Site ABC")])
+    finally:
+        timer.join()
+        late_server.stop()
+    assert len(late_server.requests) == 1
+
+
+def test_ingest_with_spool_removes_sent_requests(ingest_server, tmp_path):
+    """Check that DiodeClient.ingest() removes requests from the spool once sent."""
+    with DiodeClient(
+        target=ingest_server.target, app_name="my-producer", app_version="0.0.1", api_key="abcde", spool=tmp_path
+    ) as client:
+        client.ingest([Entity(site="Site ABC")])
+        client.ingest_future([Entity(site="Site DEF")]).result(timeout=5)
+        assert len(client.spool) == 0
+    assert len(ingest_server.requests) == 2
+
+
+def test_ingest_with_spool_replays_unsent_requests_in_order(ingest_server, tmp_path):
+    """Check that requests failing while unreachable stay spooled and are sent in order before the next ingest."""
+    with DiodeClient(
+        target="grpc://127.0.0.1:1", app_name="my-producer", app_version="0.0.1", api_key="abcde", spool=tmp_path
+    ) as client:
+        for name in ("Site A", "Site B"):
+            with pytest.raises(DiodeClientError) as err:
+                client.ingest([Entity(site=name)])
+            assert err.value.status_code == grpc.StatusCode.UNAVAILABLE
+        assert len(client.spool) == 2
+        spooled_ids = [request.id for _, request in client.spool.pending()]
+
+    with DiodeClient(
+        target=ingest_server.target, app_name="my-producer", app_version="0.0.1", api_key="abcde", spool=tmp_path
+    ) as client:
+        client.ingest([Entity(site="Site C")])
+        assert len(client.spool) == 0
+
+    assert [r.entities[0].site.name for r in ingest_server.requests] == ["Site A", "Site B", "Site C"]
+    assert [r.id for r in ingest_server.requests[:2]] == spooled_ids
+
+
+def test_ingest_with_spool_drops_requests_failing_with_non_retriable_error(ingest_server, tmp_path):
+    """Check that requests failing with a non-retriable status code are not kept in the spool."""
+    ingest_server.handler = _fail_first(1, grpc.StatusCode.INVALID_ARGUMENT)
+    with DiodeClient(
+        target=ingest_server.target, app_name="my-producer", app_version="0.0.1", api_key="abcde", spool=tmp_path
+    ) as client:
+        with pytest.raises(DiodeClientError):
+            client.ingest([Entity(site="Site ABC")])
+        assert len(client.spool) == 0
+
+
+def test_client_replays_spool_once_connected(ingest_server, tmp_path):
+    """Check that DiodeClient replays requests left in the spool once the channel is connected."""
+    spool = Spool(tmp_path)
+    spool.append(ingester_pb2.IngestRequest(id="left-over"))
+    spool.close()
+
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        spool=tmp_path,
+        warm_up=True,
+    ) as client:
+        deadline = time.monotonic() + 5
+        while len(client.spool) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(client.spool) == 0
+    assert [r.id for r in ingest_server.requests] == ["left-over"]
+    assert client.replay_spool() == 0
+
+
+def test_client_replays_spool_left_over_by_previous_client(ingest_server, tmp_path):
+    """Check that a DiodeClient restarted over a spool directory replays its pending requests without an ingest."""
+    with DiodeClient(
+        target="grpc://127.0.0.1:1", app_name="my-producer", app_version="0.0.1", api_key="abcde", spool=tmp_path
+    ) as client:
+        with pytest.raises(DiodeClientError):
+            client.ingest([Entity(site="Site A")])
+        assert len(client.spool) == 1
+
+    with DiodeClient(
+        target=ingest_server.target, app_name="my-producer", app_version="0.0.1", api_key="abcde", spool=tmp_path
+    ) as client:
+        deadline = time.monotonic() + 5
+        while len(client.spool) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(client.spool) == 0
+    assert [r.entities[0].site.name for r in ingest_server.requests] == ["Site A"]
+
+
+def test_ingest_releases_concurrency_limiter_and_backs_off_on_resource_exhausted(ingest_server):
+    """Check that DiodeClient.ingest() goes through the concurrency limiter, backing off on RESOURCE_EXHAUSTED."""
+    ingest_server.handler = _fail_first(1, grpc.StatusCode.RESOURCE_EXHAUSTED)
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, latency_tolerance=1000)
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        retry_policy=RetryPolicy(max_attempts=2, initial_backoff=0.01),
+        concurrency_limiter=limiter,
+    ) as client:
+        client.ingest([Entity(site="Site ABC")])
+        client.ingest_future([Entity(site="Site DEF")]).result(timeout=5)
+        assert client.concurrency_limiter is limiter
+    stats = limiter.snapshot()
+    assert stats["limit"] == 4
+    assert stats["requests"] == 3
+    assert stats["overloads"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_ingest_fails_when_concurrency_limiter_waits_past_deadline(ingest_server):
+    """Check that DiodeClient fails with DEADLINE_EXCEEDED when the concurrency limiter waits past the deadline."""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+    breaker = CircuitBreaker(minimum_calls=1, window_size=1)
+    limiter.acquire()
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        retry_policy=RetryPolicy(timeout=0.1),
+        concurrency_limiter=limiter,
+        circuit_breaker=breaker,
+    ) as client:
+        with pytest.raises(DiodeClientError) as err:
+            client.ingest([Entity(site="Site ABC")])
+        assert err.value.status_code == grpc.StatusCode.DEADLINE_EXCEEDED
+        with pytest.raises(DiodeClientError) as err:
+            client.ingest_future([Entity(site="Site DEF")]).result(timeout=5)
+        assert err.value.status_code == grpc.StatusCode.DEADLINE_EXCEEDED
+    assert ingest_server.requests == []
+    assert limiter.snapshot()["timeouts"] == 2
+    assert limiter.in_flight == 1
+    assert breaker.snapshot()["calls"] == 0
+
+
+def test_client_records_metrics(ingest_server):
+    """Check that DiodeClient records builds, calls, errors and retries in its metrics."""
+    ingest_server.handler = _fail_first(1)
+    metrics = ClientMetrics()
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        retry_policy=RetryPolicy(max_attempts=2, initial_backoff=0.01),
+        metrics=metrics,
+    ) as client:
+        assert client.metrics is metrics
+        client.ingest([Entity(site="Site A"), Entity(device="Device A")])
+        client.ingest_future([Entity(site="Site B")]).result(timeout=5)
+    snapshot = metrics.snapshot()
+    assert snapshot["calls"] == 3
+    assert snapshot["in_flight"] == 0
+    assert snapshot["retries"] == 1
+    assert snapshot["errors"] == {"UNAVAILABLE": 1}
+    assert snapshot["entities"] == {"site": 2, "device": 1}
+    assert snapshot["build_seconds"]["count"] == 2
+    assert snapshot["call_seconds"]["count"] == 3
+    assert snapshot["request_bytes"]["sum"] > 0
+
+
+def test_deterministic_request_ids_are_derived_from_content():
+    """Check that deterministic request ids are version 5 UUIDs derived from the stream and entities."""
+    client = DiodeClient(
+        target="grpc://localhost:8081",
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        deterministic_request_ids=True,
+    )
+    request = client._build_request([Entity(site="Site A")], "latest")
+    assert uuid.UUID(request.id).version == 5
+    assert client._build_request([Entity(site="Site A")], "latest").id == request.id
+    assert client._build_request([Entity(site="Site B")], "latest").id != request.id
+    assert client._build_request([Entity(site="Site A")], "other").id != request.id
+
+
+def test_client_skips_acknowledged_requests(ingest_server):
+    """Check that DiodeClient does not resend requests with a recently acknowledged deterministic id."""
+    ingest_server.handler = lambda request, context: ingester_pb2.IngestResponse(errors=["recorded"])
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        deterministic_request_ids=True,
+    ) as client:
+        first = client.ingest([Entity(site="Site A")])
+        second = client.ingest([Entity(site="Site A")])
+        third = client.ingest_future([Entity(site="Site A")]).result(timeout=5)
+        client.ingest_future([Entity(site="Site B")]).result(timeout=5)
+        client.ingest([Entity(site="Site B")])
+    assert list(first.errors) == list(second.errors) == list(third.errors) == ["recorded"]
+    assert [request.entities[0].site.name for request in ingest_server.requests] == ["Site A", "Site B"]
+
+
+def test_client_resends_requests_without_acked_request_cache(ingest_server):
+    """Check that DiodeClient resends requests with the same deterministic id when the cache is disabled."""
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        deterministic_request_ids=True,
+        acked_request_cache_size=0,
+    ) as client:
+        client.ingest([Entity(site="Site A")])
+        client.ingest([Entity(site="Site A")])
+    assert len(ingest_server.requests) == 2
+    assert ingest_server.requests[0].id == ingest_server.requests[1].id
+
+
+def test_client_resends_requests_acknowledged_before_ttl(ingest_server):
+    """Check that DiodeClient sends a request with a deterministic id again once acked_request_ttl elapsed."""
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        deterministic_request_ids=True,
+        acked_request_ttl=0.2,
+    ) as client:
+        for _ in range(3):
+            client.ingest([Entity(site="Site A")])
+            client.ingest([Entity(site="Site A")])
+            time.sleep(0.25)
+    assert len(ingest_server.requests) == 3
+    assert len({request.id for request in ingest_server.requests}) == 1
+
+
+def test_client_rejects_negative_acked_request_ttl():
+    """Check that DiodeClient rejects a negative acked_request_ttl."""
+    with pytest.raises(ValueError):
+        DiodeClient(
+            target="grpc://localhost:8081",
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+            acked_request_ttl=-1,
+        )
+
+
+def test_acked_requests_evicts_least_recently_used():
+    """Check that _AckedRequests evicts the least recently used responses beyond its size."""
+    acked = _AckedRequests(2, 60)
+    responses = [ingester_pb2.IngestResponse(errors=[str(i)]) for i in range(3)]
+    acked.put("a", responses[0])
+    acked.put("b", responses[1])
+    assert acked.get("a") is responses[0]
+    acked.put("c", responses[2])
+    assert acked.get("b") is None
+    assert acked.get("a") is responses[0]
+    assert len(acked) == 2
+
+
+def test_ingest_serialized_sends_same_request_as_ingest(ingest_server):
+    """Check that DiodeClient.ingest_serialized() sends the request ingest() sends for the same entities."""
+    entities = [Entity(site="Site A"), Entity(device=Device(name="Device A", site="Site A"))]
+    metrics = ClientMetrics()
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        deterministic_request_ids=True,
+        acked_request_cache_size=0,
+        metrics=metrics,
+    ) as client:
+        client.ingest(entities, stream="latest")
+        client.ingest_serialized(serialize_entities(entities[:1]) + serialize_entities(entities[1:]), stream="latest")
+        client.ingest_serialized((entity.SerializeToString() for entity in entities), stream="latest")
+    first, *others = ingest_server.requests
+    assert [request.SerializeToString() for request in others] == [first.SerializeToString()] * 2
+    assert metrics.snapshot()["entities"] == {"site": 3, "device": 3}
+
+
+def test_ingest_serialized_splits_entities_into_requests_within_max_request_size(ingest_server):
+    """Check that DiodeClient.ingest_serialized() splits entities into requests within max_request_size."""
+    entities = [Entity(device=Device(name=f"Device {i}", site="Site ABC", role="Role ABC")) for i in range(100)]
+    ingest_server.handler = lambda request, context: ingester_pb2.IngestResponse(errors=[request.id])
+    with DiodeClient(
+        target=ingest_server.target, app_name="my-producer", app_version="0.0.1", api_key="abcde"
+    ) as client:
+        response = client.ingest_serialized(serialize_entities(entities), max_request_size=1024)
+        with pytest.raises(ValueError, match="max_request_size"):
+            client.ingest_serialized(serialize_entities(entities), max_request_size=0)
+    requests = ingest_server.requests
+    assert len(requests) > 1
+    assert all(request.ByteSize() <= 1024 for request in requests)
+    assert list(response.errors) == [request.id for request in requests]
+    assert [e for request in requests for e in request.entities] == entities
+
+
+def test_ingest_serialized_skips_acknowledged_requests_and_spools(ingest_server, tmp_path):
+    """Check that DiodeClient.ingest_serialized() shares request ids and the spool with ingest()."""
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        deterministic_request_ids=True,
+        spool=tmp_path,
+    ) as client:
+        client.ingest([Entity(site="Site A")])
+        client.ingest_serialized(serialize_entities([Entity(site="Site A")]))
+        client.ingest_serialized(serialize_entities([Entity(site="Site B")]))
+        assert len(client.spool) == 0
+    assert [request.entities[0].site.name for request in ingest_server.requests] == ["Site A", "Site B"]
+
+
+def test_ingest_serialized_rejects_malformed_entities():
+    """Check that DiodeClient.ingest_serialized() raises ValueError for malformed serialized entities."""
+    client = DiodeClient(target="grpc://localhost:8081", app_name="my-producer", app_version="0.0.1", api_key="abcde")
+    with mock.patch.object(client, "_stub") as mock_stub, pytest.raises(ValueError, match="truncated entity"):
+        client.ingest_serialized(serialize_entities([Entity(site="Site A")])[:-1])
+    mock_stub.Ingest.assert_not_called()
+
+
+def test_ingest_stream_pulls_entities_lazily(ingest_server):
+    """Check that DiodeClient.ingest_stream() sends each request before pulling the entities of the next one."""
+    pulled = []
+
+    def entities():
+        for i in range(95):
+            pulled.append(i)
+            yield Entity(site=f"Site {i}") if i % 7 else None
+
+    def handler(request, context):
+        return ingester_pb2.IngestResponse(errors=[f"{len(request.entities)} entities after {len(pulled)} pulled"])
+
+    ingest_server.handler = handler
+    with DiodeClient(
+        target=ingest_server.target, app_name="my-producer", app_version="0.0.1", api_key="abcde"
+    ) as client:
+        response = client.ingest_stream(entities(), max_request_entities=10)
+    assert [len(request.entities) for request in ingest_server.requests] == [10] * 8 + [1]
+    assert [e.site.name for request in ingest_server.requests for e in request.entities] == [
+        f"Site {i}" for i in range(95) if i % 7
+    ]
+    # Each request is sent once the first entity of the next one was pulled
+    sent = [i for i in range(95) if i % 7]
+    assert list(response.errors) == [f"10 entities after {sent[n] + 1} pulled" for n in range(10, 90, 10)] + [
+        "1 entities after 95 pulled"
+    ]
+
+
+def test_ingest_stream_caps_pending_requests(ingest_server):
+    """Check that DiodeClient.ingest_stream() keeps at most max_pending requests awaiting a response, in order."""
+    lock = threading.Lock()
+    calls = {"active": 0, "max_active": 0}
+
+    def handler(request, context):
+        with lock:
+            calls["active"] += 1
+            calls["max_active"] = max(calls["max_active"], calls["active"])
+        time.sleep(0.02)
+        with lock:
+            calls["active"] -= 1
+        return ingester_pb2.IngestResponse(errors=[request.entities[0].site.name])
+
+    ingest_server.handler = handler
+    entities = (Entity(site=f"Site {i}") for i in range(500))
+    with DiodeClient(
+        target=ingest_server.target, app_name="my-producer", app_version="0.0.1", api_key="abcde"
+    ) as client:
+        response = client.ingest_stream(entities, max_request_size=512, max_pending=3)
+    requests = ingest_server.requests
+    assert len(requests) > 3
+    assert all(request.ByteSize() <= 512 for request in requests)
+    assert 1 < calls["max_active"] <= 3
+    assert list(response.errors) == sorted(response.errors, key=lambda name: int(name.split()[1]))
+    assert len(response.errors) == len(requests)
+
+
+def test_ingest_stream_drops_unchanged_entities_per_request(ingest_server):
+    """Check that DiodeClient.ingest_stream() drops unchanged entities from each request with a fingerprint cache."""
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        fingerprint_cache=FingerprintCache(),
+    ) as client:
+        client.ingest_stream((Entity(site=f"Site {i}") for i in range(20)), max_request_entities=10)
+        client.ingest_stream((Entity(site=f"Site {i}") for i in range(15, 25)), max_request_entities=10, max_pending=2)
+    assert [len(request.entities) for request in ingest_server.requests] == [10, 10, 5]
+
+
+def test_ingest_stream_rejects_invalid_limits():
+    """Check that DiodeClient.ingest_stream() rejects invalid max_pending, max_request_size and max_request_entities."""
+    client = DiodeClient(target="grpc://localhost:8081", app_name="my-producer", app_version="0.0.1", api_key="abcde")
+    with pytest.raises(ValueError, match="max_pending"):
+        client.ingest_stream([Entity(site="Site A")], max_pending=0)
+    with pytest.raises(ValueError, match="max_request_size"):
+        client.ingest_stream([Entity(site="Site A")], max_request_size=0)
+    with pytest.raises(ValueError, match="max_request_entities"):
+        client.ingest_stream([Entity(site="Site A")], max_request_entities=0)
+
+
+def test_ingest_fails_fast_while_circuit_breaker_is_open(tmp_path):
+    """Check that DiodeClient.ingest() raises DiodeCircuitOpenError without sending while the breaker is open."""
+    breaker = CircuitBreaker(minimum_calls=2, window_size=2, open_duration=60)
+    with DiodeClient(
+        target="grpc://127.0.0.1:1",
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        retry_policy=RetryPolicy(max_attempts=2, initial_backoff=0.01),
+        circuit_breaker=breaker,
+        spool=tmp_path,
+    ) as client:
+        with pytest.raises(DiodeClientError) as err:
+            client.ingest([Entity(site="Site A")])
+        assert not isinstance(err.value, DiodeCircuitOpenError)
+        assert client.circuit_breaker.state == "open"
+
+        with mock.patch.object(client, "_stub") as mock_stub, pytest.raises(DiodeCircuitOpenError):
+            client.ingest([Entity(site="Site B")])
+        mock_stub.Ingest.assert_not_called()
+        future = client.ingest_future([Entity(site="Site C")])
+        with pytest.raises(DiodeCircuitOpenError):
+            future.result(timeout=0)
+        assert len(client.spool) == 3
+
+
+def test_client_fails_over_from_unavailable_target(ingest_server):
+    """Check that DiodeClient with several targets fails over from an unavailable target and ejects it."""
+    with DiodeClient(
+        target=["grpc://127.0.0.1:1", ingest_server.target],
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+    ) as client:
+        assert client.targets == ["grpc://127.0.0.1:1", ingest_server.target]
+        assert client.target == "127.0.0.1:1"
+        for i in range(6):
+            client.ingest([Entity(site=f"Site {i}")])
+        client.ingest_future([Entity(site="Site 6")]).result(timeout=5)
+        stats = client.target_stats
+    assert len(ingest_server.requests) == 7
+    assert stats["grpc://127.0.0.1:1"]["healthy"] is False
+    assert stats["grpc://127.0.0.1:1"]["ejections"] == 1
+    assert stats[ingest_server.target]["requests"] == 7
+    assert stats[ingest_server.target]["latency"] > 0
+
+
+@pytest.mark.parametrize("policy", ["round_robin", "least_outstanding", "ewma"])
+def test_client_fails_over_to_another_target(ingest_server, policy):
+    """Check that DiodeClient fails over to a target the request was not sent to yet, with any pool policy."""
+    unavailable = IngestServer()
+    unavailable.handler = lambda request, context: context.abort(grpc.StatusCode.UNAVAILABLE, "unavailable")
+    unavailable.start()
+    try:
+        with DiodeClient(
+            target=[unavailable.target, ingest_server.target],
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+            channel_pool_size=2,
+            channel_pool_policy=policy,
+        ) as client:
+            for i in range(8):
+                client.ingest([Entity(site=f"Site {i}")])
+    finally:
+        unavailable.stop()
+    assert [request.entities[0].site.name for request in ingest_server.requests] == [f"Site {i}" for i in range(8)]
+    assert 0 < len(unavailable.requests) <= 8
+
+
+def test_ingest_future_fails_over_to_another_target(ingest_server):
+    """Check that DiodeClient.ingest_future() fails over to a target the request was not sent to yet."""
+    unavailable = IngestServer()
+    unavailable.handler = lambda request, context: context.abort(grpc.StatusCode.UNAVAILABLE, "unavailable")
+    unavailable.start()
+    try:
+        with DiodeClient(
+            target=[unavailable.target, ingest_server.target],
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+            channel_pool_size=2,
+        ) as client:
+            futures = [client.ingest_future([Entity(site=f"Site {i}")]) for i in range(8)]
+            for future in futures:
+                future.result(timeout=5)
+    finally:
+        unavailable.stop()
+    assert sorted(request.entities[0].site.name for request in ingest_server.requests) == [f"Site {i}" for i in range(8)]
+    assert 0 < len(unavailable.requests) <= 8
+
+
+def test_ingest_future_fails_when_all_targets_fail():
+    """Check that DiodeClient.ingest_future() sends a request once to each target before failing its future."""
+    servers = [IngestServer(), IngestServer()]
+    for server in servers:
+        server.handler = lambda request, context: context.abort(grpc.StatusCode.UNAVAILABLE, "unavailable")
+        server.start()
+    try:
+        with DiodeClient(
+            target=[server.target for server in servers],
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+        ) as client:
+            with pytest.raises(DiodeClientError) as err:
+                client.ingest_future([Entity(site="Site A")]).result(timeout=5)
+    finally:
+        for server in servers:
+            server.stop()
+    assert err.value.status_code == grpc.StatusCode.UNAVAILABLE
+    assert [len(server.requests) for server in servers] == [1, 1]
+
+
+def test_client_sets_up_channels_to_each_target_with_its_path():
+    """Check that DiodeClient connects channel_pool_size channels to each target, with its own TLS and path."""
+    with mock.patch("grpc.secure_channel") as mock_secure_channel, mock.patch(
+        "grpc.insecure_channel"
+    ) as mock_insecure_channel, mock.patch("grpc.intercept_channel") as mock_intercept_channel:
+        client = DiodeClient(
+            target=["grpcs://diode-a:443/a", "grpc://diode-b:8081"],
+            app_name="my-producer",
+            app_version="0.0.1",
+            api_key="abcde",
+            channel_pool_size=2,
+        )
+    assert [c.args[0] for c in mock_secure_channel.call_args_list] == ["diode-a:443"] * 2
+    assert [c.kwargs["target"] for c in mock_insecure_channel.call_args_list] == ["diode-b:8081"] * 2
+    assert [c.args[1]._subpath for c in mock_intercept_channel.call_args_list] == ["/a"] * 2
+    assert len(client.pool) == 4
+    assert list(client.target_stats) == ["grpcs://diode-a:443/a", "grpc://diode-b:8081"]
+
+
+def test_client_rejects_empty_targets():
+    """Check that DiodeClient requires at least one target."""
+    with pytest.raises(ValueError):
+        DiodeClient(target=[], app_name="my-producer", app_version="0.0.1", api_key="abcde")
+
+
+def test_clients_share_channels_through_registry(ingest_server):
+    """Check that clients with the same registry and target share their channel, released on close."""
+    registry = ChannelRegistry()
+    kwargs = {
+        "target": ingest_server.target,
+        "app_name": "my-producer",
+        "app_version": "0.0.1",
+        "api_key": "abcde",
+        "channel_registry": registry,
+    }
+    first = DiodeClient(**kwargs)
+    second = DiodeClient(**kwargs)
+    assert first.channel is second.channel
+    assert len(registry) == 1
+
+    first.close()
+    second.ingest([Entity(site="Site ABC")])
+    assert len(ingest_server.requests) == 1
+    second.close()
+    assert len(registry) == 0
+    with pytest.raises(ValueError):
+        second.ingest([Entity(site="Site ABC")])
+
+
+def test_clients_share_pooled_channels_and_credentials_through_registry():
+    """Check that pooled channels are shared index by index and TLS credentials are loaded once."""
+    registry = ChannelRegistry()
+    with mock.patch("netboxlabs.diode.sdk.client._load_certs", return_value=b"certs") as mock_load_certs, mock.patch(
+        "grpc.secure_channel"
+    ) as mock_secure_channel:
+        clients = [
+            DiodeClient(
+                target="grpcs://localhost:8081",
+                app_name="my-producer",
+                app_version="0.0.1",
+                api_key="abcde",
+                channel_pool_size=2,
+                channel_registry=registry,
+            )
+            for _ in range(3)
+        ]
+    mock_load_certs.assert_called_once()
+    assert mock_secure_channel.call_count == 2
+    assert len(registry) == 2
+    assert [pooled.channel for pooled in clients[0].pool.channels] == [
+        pooled.channel for pooled in clients[2].pool.channels
+    ]
+    for client in clients:
+        client.close()
+    assert len(registry) == 0
+
+
+def test_client_error_reads_rich_error_status_lazily():
+    """Check that DiodeClientError.grpc_status is read from the error trailing metadata on first access."""
+    err = mock.Mock(spec=grpc.Call)
+    err.code.return_value = grpc.StatusCode.INVALID_ARGUMENT
+    err.details.return_value = "invalid entity"
+    status = mock.Mock()
+    with mock.patch("grpc_status.rpc_status.from_call", return_value=status) as mock_from_call:
+        client_error = DiodeClientError(err)
+        mock_from_call.assert_not_called()
+        assert client_error.grpc_status is status
+        assert client_error.grpc_status is status
+    mock_from_call.assert_called_once_with(err)
+    assert DiodeCircuitOpenError().grpc_status is None
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs - Tests."""
+import gzip
+import zlib
+
+import grpc
+import pytest
+
+from netboxlabs.diode.sdk.compression import (
+    AdaptiveCompression,
+    CompressionStats,
+    compressed_size,
+    is_compressed,
+)
+
+
+def test_is_compressed():
+    """Check is_compressed() for all compression values."""
+    assert is_compressed(grpc.Compression.Gzip)
+    assert is_compressed(grpc.Compression.Deflate)
+    assert not is_compressed(grpc.Compression.NoCompression)
+    assert not is_compressed(None)
+
+
+def test_compressed_size_matches_gzip_and_deflate():
+    """Check that compressed_size() returns the size of gzip and deflate compressed data."""
+    data = b"Device A, Site ABC, Manufacturer A; " * 1000
+    assert compressed_size(data, grpc.Compression.Gzip) == len(gzip.compress(data, mtime=0))
+    assert compressed_size(data, grpc.Compression.Deflate) == len(zlib.compress(data))
+    assert compressed_size(data, grpc.Compression.NoCompression) == len(data)
+    assert compressed_size(data, None) == len(data)
+
+
+def test_adaptive_compression_rejects_invalid_values():
+    """Check that AdaptiveCompression rejects invalid values."""
+    with pytest.raises(ValueError):
+        AdaptiveCompression(algorithm=grpc.Compression.NoCompression)
+    with pytest.raises(ValueError):
+        AdaptiveCompression(min_size=-1)
+    with pytest.raises(ValueError):
+        AdaptiveCompression(smoothing=0)
+    with pytest.raises(ValueError):
+        AdaptiveCompression(probe_interval=0)
+
+
+def test_adaptive_compression_compresses_above_min_size():
+    """Check that AdaptiveCompression compresses only requests of at least min_size bytes."""
+    compression = AdaptiveCompression(algorithm=grpc.Compression.Deflate, min_size=1024)
+    assert compression.select(1023) == grpc.Compression.NoCompression
+    assert compression.select(1024) == grpc.Compression.Deflate
+
+
+def test_adaptive_compression_compresses_when_throughput_is_low():
+    """Check that AdaptiveCompression compresses only while uncompressed throughput is below the threshold."""
+    compression = AdaptiveCompression(min_size=0, throughput_threshold=1000, smoothing=1.0)
+    assert compression.select(4096) == grpc.Compression.NoCompression
+
+    compression.observe(4096, grpc.Compression.NoCompression, 1.0)
+    assert compression.throughput == 4096
+    assert compression.select(4096) == grpc.Compression.NoCompression
+
+    compression.observe(500, grpc.Compression.NoCompression, 1.0)
+    assert compression.select(4096) == grpc.Compression.Gzip
+
+    # Compressed requests do not update the measured throughput
+    compression.observe(100000, grpc.Compression.Gzip, 1.0)
+    assert compression.throughput == 500
+
+
+def test_adaptive_compression_probes_uncompressed_throughput():
+    """Check that AdaptiveCompression periodically sends uncompressed requests while compressing."""
+    compression = AdaptiveCompression(min_size=0, throughput_threshold=1000, probe_interval=4)
+    compression.observe(100, None, 1.0)
+    selected = [compression.select(4096) for _ in range(8)]
+    assert selected.count(grpc.Compression.NoCompression) == 2
+
+
+def test_adaptive_compression_smooths_throughput():
+    """Check that AdaptiveCompression smooths the measured throughput."""
+    compression = AdaptiveCompression(min_size=0, smoothing=0.5)
+    compression.observe(1000, None, 1.0)
+    compression.observe(2000, None, 1.0)
+    assert compression.throughput == 1500
+
+
+def test_compression_stats_snapshot():
+    """Check that CompressionStats accumulates request sizes."""
+    stats = CompressionStats()
+    assert stats.snapshot()["ratio"] == 1.0
+    stats.record(1000, 1000, None)
+    stats.record(1000, 200, grpc.Compression.Gzip)
+    assert stats.snapshot() == {
+        "requests": 2,
+        "compressed_requests": 1,
+        "sampled_requests": 1,
+        "request_bytes": 2000,
+        "sent_bytes": 1200,
+        "ratio": 0.6,
+    }
+
+
+def test_compression_stats_estimates_unmeasured_requests():
+    """Check that CompressionStats estimates the compressed size of unmeasured requests from the measured ones."""
+    stats = CompressionStats()
+    stats.record(1000, None, grpc.Compression.Gzip)
+    assert stats.snapshot()["sent_bytes"] is None
+    assert stats.snapshot()["ratio"] is None
+    stats.record(2000, 500, grpc.Compression.Gzip)
+    stats.record(1000, 1000, grpc.Compression.NoCompression)
+    assert stats.snapshot() == {
+        "requests": 3,
+        "compressed_requests": 2,
+        "sampled_requests": 1,
+        "request_bytes": 4000,
+        "sent_bytes": 1750,
+        "ratio": 0.4375,
+    }
+
+
+def test_compression_stats_samples_compressed_requests():
+    """Check that CompressionStats samples one in sample_interval compressed requests, none by default."""
+    assert not any(CompressionStats().sample(grpc.Compression.Gzip) for _ in range(10))
+    stats = CompressionStats(sample_interval=3)
+    assert not stats.sample(None)
+    assert not stats.sample(grpc.Compression.NoCompression)
+    assert [stats.sample(grpc.Compression.Gzip) for _ in range(7)] == [True, False, False, True, False, False, True]
+    with pytest.raises(ValueError):
+        CompressionStats(sample_interval=-1)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs - Tests."""
+import pytest
+from google.protobuf import timestamp_pb2
+
+from netboxlabs.diode.sdk.client import DiodeClient
+from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+from netboxlabs.diode.sdk.fingerprint import FingerprintCache
+from netboxlabs.diode.sdk.ingester import Device, Entity, Interface
+
+
+def _inventory(serial="ABC"):
+    return [
+        Entity(device=Device(name="Device A", site="Site A", serial=serial)),
+        Entity(device=Device(name="Device A", site="Site B")),
+        Entity(interface=Interface(name="eth0", device="Device A", site="Site A")),
+    ]
+
+
+def test_cache_drops_unchanged_entities():
+    """Check that FingerprintCache.changed() drops entities recorded with the same fingerprint."""
+    cache = FingerprintCache()
+    changed, fingerprints = cache.changed(_inventory())
+    assert len(changed) == 3
+    assert len(fingerprints) == 3
+    cache.update(fingerprints)
+    assert len(cache) == 3
+
+    changed, fingerprints = cache.changed(_inventory(serial="DEF"))
+    assert [entity.device.serial for entity in changed] == ["DEF"]
+    cache.update(fingerprints)
+    assert cache.changed(_inventory(serial="DEF")) == ([], [])
+    assert cache.snapshot() == {"entries": 3, "cycle": 0, "unchanged": 5, "changed": 4}
+
+
+def test_cache_ignores_timestamps_and_passes_through_unknown_entities():
+    """Check that FingerprintCache ignores entity timestamps and keeps entities without a type."""
+    cache = FingerprintCache()
+    _, fingerprints = cache.changed([Entity(site="Site A", timestamp=timestamp_pb2.Timestamp(seconds=1))])
+    cache.update(fingerprints)
+    changed, _ = cache.changed([Entity(site="Site A", timestamp=timestamp_pb2.Timestamp(seconds=2)), None])
+    assert changed == [None]
+    changed, _ = cache.changed([ingester_pb2.Entity()])
+    assert changed == [ingester_pb2.Entity()]
+
+
+def test_cache_identities_override():
+    """Check that FingerprintCache keys entities by the identity fields of their type."""
+    cache = FingerprintCache(identities={"device": ("name",)})
+    _, fingerprints = cache.changed(_inventory())
+    assert len(fingerprints) == 3
+    cache.update(fingerprints)
+    assert len(cache) == 2
+
+
+def test_cache_evicts_least_recently_used():
+    """Check that FingerprintCache keeps at most maxsize fingerprints, evicting the least recently used."""
+    cache = FingerprintCache(maxsize=2)
+    for site in ("Site A", "Site B", "Site C"):
+        cache.update(cache.changed([Entity(site=site)])[1])
+    assert len(cache) == 2
+    assert cache.changed([Entity(site="Site A")])[0] == [Entity(site="Site A")]
+    assert cache.changed([Entity(site="Site C")])[0] == []
+
+
+def test_cache_resyncs_every_n_cycles():
+    """Check that FingerprintCache returns all entities every resync_every cycles."""
+    cache = FingerprintCache(resync_every=3)
+    cache.update(cache.changed(_inventory())[1])
+    unchanged = []
+    for _ in range(6):
+        cycle = cache.next_cycle()
+        changed, fingerprints = cache.changed(_inventory())
+        cache.update(fingerprints)
+        unchanged.append((cycle, cache.resyncing, len(changed)))
+    assert unchanged == [(1, False, 0), (2, False, 0), (3, True, 3), (4, False, 0), (5, False, 0), (6, True, 3)]
+
+
+def test_cache_persists_to_file(tmp_path):
+    """Check that FingerprintCache saves its fingerprints and cycle to path, and loads them back."""
+    path = tmp_path / "fingerprints"
+    cache = FingerprintCache(path=path)
+    cache.update(cache.changed(_inventory())[1])
+    cache.next_cycle()
+    cache.save()
+
+    loaded = FingerprintCache(path=path)
+    assert len(loaded) == 3
+    assert loaded.cycle == 1
+    assert loaded.changed(_inventory()) == ([], [])
+
+    path.write_bytes(b"garbage")
+    assert len(FingerprintCache(path=path)) == 0
+
+
+@pytest.mark.parametrize("kwargs", [{"maxsize": 0}, {"resync_every": 0}])
+def test_cache_rejects_invalid_arguments(kwargs):
+    """Check that FingerprintCache rejects invalid arguments."""
+    with pytest.raises(ValueError):
+        FingerprintCache(**kwargs)
+
+
+def test_client_sends_changed_entities_only(ingest_server, tmp_path):
+    """Check that DiodeClient sends only changed entities, and records fingerprints once acknowledged."""
+    path = tmp_path / "fingerprints"
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        fingerprint_cache=FingerprintCache(path=path),
+    ) as client:
+        client.ingest(_inventory())
+        client.ingest(_inventory(serial="DEF"))
+        assert list(client.ingest(_inventory(serial="DEF")).errors) == []
+        client.ingest_future(_inventory(serial="GHI")).result(timeout=5)
+        assert client.ingest_future(_inventory(serial="GHI")).result(timeout=5) == ingester_pb2.IngestResponse()
+    assert [len(request.entities) for request in ingest_server.requests] == [3, 1, 1]
+
+    ingest_server.handler = lambda request, context: ingester_pb2.IngestResponse(errors=["invalid"])
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        fingerprint_cache=FingerprintCache(path=path),
+    ) as client:
+        client.ingest(_inventory(serial="GHI"))
+        client.ingest(_inventory(serial="JKL"))
+        client.ingest(_inventory(serial="JKL"))
+    assert [len(request.entities) for request in ingest_server.requests] == [3, 1, 1, 1, 1]
@@ -3,6 +3,13 @@
 """NetBox Labs - Tests."""
 
 # ruff: noqa: I001
+import array
+import inspect
+import traceback
+
+import pytest
+from google.protobuf import timestamp_pb2 as _timestamp_pb2
+
 from netboxlabs.diode.sdk.diode.v1.ingester_pb2 import (
     Cluster as ClusterPb,
     ClusterGroup as ClusterGroupPb,
@@ -41,6 +48,7 @@ from netboxlabs.diode.sdk.ingester import (
     VMInterface,
     VirtualMachine,
     convert_to_protobuf,
+    _reset_wrapper,
 )
 
 
@@ -806,3 +814,188 @@ def test_entity_instantiation_with_vminterface():
     assert isinstance(entity, EntityPb)
     assert isinstance(entity.vminterface, VMInterfacePb)
     assert entity.vminterface.name == "VMInterface1"
+
+
+def test_wrappers_keep_declared_signature():
+    """Check that generated wrappers keep the signature and docstring they are declared with."""
+    signature = inspect.signature(Device)
+    assert list(signature.parameters)[:3] == ["name", "device_type", "device_fqdn"]
+    assert signature.parameters["manufacturer"].default is None
+    assert signature.return_annotation is DevicePb
+    assert Device.__new__.__doc__ == "Create a new Device protobuf message."
+
+
+def test_wrappers_generate_constructor_on_first_use():
+    """Check that wrappers generate their constructor on first use, with its source shown in tracebacks."""
+    _reset_wrapper(Site)
+    assert inspect.signature(Site.__new__) == inspect.signature(Site._declared_new)
+    stub = Site.__new__
+    assert Site(name="Site A") == SitePb(name="Site A")
+    assert Site.__new__ is not stub
+    assert Site.__new__.__wrapped__ is Site._declared_new
+    assert Site(name="Site B") == SitePb(name="Site B")
+    with pytest.raises(TypeError) as exc_info:
+        Interface(name="eth0", mtu="1500")
+    assert "return InterfacePb(**fields)" in "".join(traceback.format_tb(exc_info.tb))
+
+
+def test_wrappers_accept_positional_arguments():
+    """Check that generated wrappers accept their parameters positionally."""
+    assert Device("Device A", "Device Type A") == DevicePb(name="Device A", device_type=DeviceTypePb(model="Device Type A"))
+    assert Prefix("192.168.0.0/24", "Site ABC") == PrefixPb(prefix="192.168.0.0/24", site=SitePb(name="Site ABC"))
+
+
+def test_wrappers_leave_unset_fields_unset():
+    """Check that generated wrappers only set the fields given."""
+    device = Device(name="Device A")
+    assert device.ListFields() == [(DevicePb.DESCRIPTOR.fields_by_name["name"], "Device A")]
+    assert not Interface(name="Interface A", enabled=False, mtu=0).HasField("device")
+    assert Interface(enabled=False, mtu=0).HasField("enabled")
+
+
+def test_wrappers_fill_in_context_of_messages():
+    """Check that wrappers complete the messages given with the context fields they miss."""
+    platform = PlatformPb(name="ios")
+    cluster = ClusterPb(name="Cluster A")
+    device = Device(platform=platform, manufacturer="Cisco")
+    vm = VirtualMachine(cluster=cluster, site="Site ABC")
+    assert device.platform.manufacturer.name == "Cisco"
+    assert platform.manufacturer.name == "Cisco"
+    assert vm.cluster.site.name == "Site ABC"
+    juniper = Device(platform=PlatformPb(name="junos", manufacturer=ManufacturerPb(name="Juniper")), manufacturer="Cisco")
+    assert juniper.platform.manufacturer.name == "Juniper"
+
+
+_INTERFACE_COLUMNS = {
+    "name": ["eth0", "eth1", "eth0", "eth1"],
+    "device": ["Device A", "Device A", "Device B", "Device B"],
+    "platform": ["ios", "ios", "ios", "junos"],
+    "manufacturer": ["Cisco", "Cisco", "Juniper", "Juniper"],
+    "site": ["Site ABC", "Site ABC", None, "Site B"],
+    "mtu": [1500, None, 9000, 1500],
+    "tags": [["tag 1"], None, ["tag 1", "tag 2"], []],
+}
+
+
+def _rows(columns):
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+
+def test_from_columns_builds_same_messages_as_wrappers():
+    """Check that from_columns builds the messages wrappers build from each row."""
+    interfaces = Interface.from_columns(_INTERFACE_COLUMNS)
+    assert interfaces == [Interface(**row) for row in _rows(_INTERFACE_COLUMNS)]
+    # The platform is built once per manufacturer
+    assert [interface.device.platform.manufacturer.name for interface in interfaces] == [
+        "Cisco", "Cisco", "Juniper", "Juniper"
+    ]
+    assert not interfaces[1].HasField("mtu")
+
+
+def test_from_columns_fills_in_context_of_messages():
+    """Check that from_columns completes the messages given with the context fields they miss."""
+    cluster = ClusterPb(name="Cluster A")
+    vms = VirtualMachine.from_columns({"name": ["VM 1"], "cluster": [cluster], "site": ["Site ABC"]})
+    assert vms == [VirtualMachinePb(name="VM 1", cluster=ClusterPb(name="Cluster A", site=SitePb(name="Site ABC")),
+                                    site=SitePb(name="Site ABC"))]
+
+
+def test_from_columns_batches():
+    """Check that from_columns yields batches of messages with batch_size."""
+    batches = list(Interface.from_columns(_INTERFACE_COLUMNS, batch_size=3))
+    assert [len(batch) for batch in batches] == [3, 1]
+    assert [interface for batch in batches for interface in batch] == Interface.from_columns(_INTERFACE_COLUMNS)
+
+
+def test_from_columns_missing_values():
+    """Check that from_columns leaves the parameters with missing values unset."""
+    devices = Device.from_columns({"name": ("Device A", "Device B"), "serial": array.array("d", [float("nan")] * 2)})
+    assert devices == [DevicePb(name="Device A"), DevicePb(name="Device B")]
+
+
+def test_from_columns_integer_columns_with_missing_values():
+    """Check that from_columns sets integer fields from integral floats, as read from columns with missing values."""
+    interfaces = Interface.from_columns({"name": ["eth0", "eth1", "eth2"], "mtu": array.array("d", [1500, float("nan"), 9000])})
+    assert interfaces == [Interface(name="eth0", mtu=1500), Interface(name="eth1"), Interface(name="eth2", mtu=9000)]
+    with pytest.raises(TypeError):
+        Interface.from_columns({"name": ["eth0"], "mtu": [1500.5]})
+
+
+def test_from_columns_numpy():
+    """Check that from_columns accepts NumPy arrays, NaN leaving parameters unset."""
+    np = pytest.importorskip("numpy")
+    interfaces = Interface.from_columns({"name": np.array(["eth0", "eth1"]), "mtu": np.array([1500, np.nan])})
+    assert interfaces == [Interface(name="eth0", mtu=1500), Interface(name="eth1")]
+
+
+def test_from_columns_invalid_columns():
+    """Check that from_columns rejects unknown and uneven columns and invalid batch sizes."""
+    with pytest.raises(TypeError, match="'model'"):
+        Device.from_columns({"name": ["Device A"], "model": ["Model A"]})
+    with pytest.raises(TypeError, match="'model'"):
+        Device.from_columns({"model": ["Model A"]}, batch_size=1)
+    with pytest.raises(ValueError, match="same length"):
+        Device.from_columns({"name": ["Device A"], "site": []})
+    with pytest.raises(ValueError, match="batch_size"):
+        Device.from_columns({"name": ["Device A"]}, batch_size=0)
+    with pytest.raises(TypeError, match="Tag"):
+        Tag.from_columns({"name": ["tag 1"]}, as_entities=True)
+
+
+def test_from_columns_as_entities():
+    """Check that from_columns wraps the messages in entities with as_entities."""
+    entities = Interface.from_columns(_INTERFACE_COLUMNS, as_entities=True)
+    assert entities == [Entity(interface=Interface(**row)) for row in _rows(_INTERFACE_COLUMNS)]
+    assert Device.from_columns({"site": [None]}, as_entities=True) == [EntityPb(device=DevicePb())]
+    assert Entity.from_columns({"site": ["Site ABC"]}, as_entities=True) == [Entity(site="Site ABC")]
+
+
+def test_from_records():
+    """Check that from_records builds the messages wrappers build from each record."""
+    records = [{"name": "Device A", "site": "Site ABC"}, {"name": "Device B", "role": "Role ABC"}, {}]
+    expected = [Device(**record) for record in records]
+    assert Device.from_records(records) == expected
+    batches = Device.from_records(iter(records), batch_size=2)
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert Device.from_records([]) == []
+
+
+def test_from_columns_pandas():
+    """Check that from_columns accepts pandas DataFrames, missing values leaving parameters unset."""
+    pd = pytest.importorskip("pandas")
+    df = pd.DataFrame({"name": ["eth0", "eth1"], "device": ["Device A", None], "mtu": [1500, None]})
+    assert Interface.from_columns(df) == [
+        Interface(name="eth0", device="Device A", mtu=1500),
+        Interface(name="eth1"),
+    ]
+    df["mtu"] = df["mtu"].astype("Int64")
+    assert Interface.from_columns(df) == [
+        Interface(name="eth0", device="Device A", mtu=1500),
+        Interface(name="eth1"),
+    ]
+
+
+def test_from_columns_pyarrow():
+    """Check that from_columns accepts pyarrow tables, nulls leaving parameters unset."""
+    pa = pytest.importorskip("pyarrow")
+    table = pa.table({"name": ["eth0", "eth1"], "device": ["Device A", None], "mtu": [1500, None]})
+    assert Interface.from_columns(table) == [
+        Interface(name="eth0", device="Device A", mtu=1500),
+        Interface(name="eth1"),
+    ]
+
+
+def test_entity_wrap_many():
+    """Check that Entity.wrap_many wraps messages of any entity type in entities."""
+    timestamp = _timestamp_pb2.Timestamp(seconds=1)
+    messages = [Device(name="Device A"), Role(name="Role ABC"), Entity(site="Site ABC")]
+    assert Entity.wrap_many(messages) == [
+        EntityPb(device=DevicePb(name="Device A")),
+        EntityPb(device_role=RolePb(name="Role ABC")),
+        EntityPb(site=SitePb(name="Site ABC")),
+    ]
+    assert Entity.wrap_many(messages[:1], timestamp=timestamp) == [Entity(device="Device A", timestamp=timestamp)]
+    batches = Entity.wrap_many(iter(messages), batch_size=2)
+    assert [len(batch) for batch in batches] == [2, 1]
+    with pytest.raises(TypeError, match="Tag"):
+        Entity.wrap_many([TagPb(name="tag 1")])
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs - Tests."""
+import grpc
+import pytest
+
+from netboxlabs.diode.sdk.client import DiodeClient
+from netboxlabs.diode.sdk.exceptions import DiodeClientError
+from netboxlabs.diode.sdk.ingester import Entity
+from netboxlabs.diode.sdk.interceptors import _QUEUED_AT, CallTiming, TimingInterceptor
+from netboxlabs.diode.sdk.metrics import ClientMetrics
+
+
+class _RecordingInterceptor(grpc.UnaryUnaryClientInterceptor):
+    """Interceptor recording the methods of the calls it sees."""
+
+    def __init__(self, name, calls):
+        self._name = name
+        self._calls = calls
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        self._calls.append((self._name, client_call_details.method))
+        return continuation(client_call_details, request)
+
+
+def test_client_chains_interceptors_ahead_of_path_interceptor(ingest_server):
+    """Check that DiodeClient chains the given interceptors in order, ahead of the path interceptor."""
+    calls = []
+    target = f"{ingest_server.target}/my/path"
+    with DiodeClient(
+        target=target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        interceptors=[_RecordingInterceptor("first", calls), _RecordingInterceptor("second", calls)],
+    ) as client:
+        with pytest.raises(DiodeClientError) as err:
+            client.ingest([Entity(site="Site A")])
+    assert err.value.status_code == grpc.StatusCode.UNIMPLEMENTED
+    assert calls == [
+        ("first", "/diode.v1.IngesterService/Ingest"),
+        ("second", "/diode.v1.IngesterService/Ingest"),
+    ]
+
+
+def test_timing_interceptor_times_calls(ingest_server):
+    """Check that TimingInterceptor reports the queueing, serialization and wire time of each call."""
+    timings = []
+    metrics = ClientMetrics()
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        interceptors=[TimingInterceptor(on_timing=timings.append, metrics=metrics)],
+    ) as client:
+        client.ingest([Entity(site=f"Site {i}") for i in range(100)])
+        client.ingest_future([Entity(site="Site B")]).result(timeout=5)
+    assert len(timings) == 2
+    for timing in timings:
+        assert isinstance(timing, CallTiming)
+        assert timing.method == "/diode.v1.IngesterService/Ingest"
+        assert timing.code == grpc.StatusCode.OK
+        assert timing.queueing >= 0
+        assert timing.serialization > 0
+        assert timing.wire > 0
+    snapshot = metrics.snapshot()
+    assert snapshot["serialization_seconds"]["count"] == 2
+    assert snapshot["wire_seconds"]["count"] == 2
+    assert snapshot["queueing_seconds"]["count"] == 2
+
+
+def test_timing_interceptor_reports_failed_calls():
+    """Check that TimingInterceptor reports the status code of failed calls."""
+    timings = []
+    with DiodeClient(
+        target="grpc://127.0.0.1:1",
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        interceptors=[TimingInterceptor(on_timing=timings.append)],
+    ) as client:
+        with pytest.raises(DiodeClientError):
+            client.ingest([Entity(site="Site A")])
+    assert [timing.code for timing in timings] == [grpc.StatusCode.UNAVAILABLE]
+
+
+def test_timing_interceptor_without_client_queue_time():
+    """Check that TimingInterceptor reports no queueing time for calls not sent by a client."""
+    timings = []
+    interceptor = TimingInterceptor(on_timing=timings.append)
+
+    class _Call:
+        def add_done_callback(self, fn):
+            fn(self)
+
+        def code(self):
+            return grpc.StatusCode.OK
+
+    class _Details:
+        method = "/diode.v1.IngesterService/Ingest"
+
+    token = _QUEUED_AT.set(None)
+    try:
+        interceptor.intercept_unary_unary(lambda details, request: _Call(), _Details(), None)
+    finally:
+        _QUEUED_AT.reset(token)
+    assert timings[0].queueing == 0.0
+    assert timings[0].serialization == 0.0
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs - Tests."""
+import threading
+import time
+
+import pytest
+
+from netboxlabs.diode.sdk.limiter import AdaptiveConcurrencyLimiter
+
+
+def test_limiter_increases_limit_additively():
+    """Check that successful calls near the baseline latency increase the limit by about one per limit of calls."""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+    for _ in range(4):
+        limiter.acquire()
+        limiter.release(latency=0.01)
+    assert limiter.limit == 4
+    for _ in range(5):
+        limiter.acquire()
+        limiter.release(latency=0.01)
+    assert limiter.limit == 5
+    assert limiter.baseline_latency == 0.01
+
+
+def test_limiter_decreases_limit_multiplicatively_on_overload():
+    """Check that an overload halves the limit, down to min_limit."""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, min_limit=2)
+    limiter.acquire()
+    limiter.release(overloaded=True)
+    assert limiter.limit == 8
+    for _ in range(3):
+        limiter._last_decrease = None
+        limiter.acquire()
+        limiter.release(overloaded=True)
+    assert limiter.limit == 2
+    assert limiter.snapshot()["overloads"] == 4
+
+
+def test_limiter_decreases_limit_on_high_latency():
+    """Check that calls slower than latency_tolerance times the baseline decrease the limit."""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10, latency_tolerance=2.0)
+    limiter.acquire()
+    limiter.release(latency=0.01)
+    limiter.acquire()
+    limiter.release(latency=0.015)
+    assert limiter.limit == 10
+    limiter.acquire()
+    limiter.release(latency=0.1)
+    assert limiter.limit == 5
+    assert limiter.snapshot()["decreases"] == 1
+
+
+def test_limiter_decreases_once_per_baseline_latency():
+    """Check that overloads reported together only cut the limit once."""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16)
+    limiter.acquire()
+    limiter.release(latency=60.0)
+    for _ in range(3):
+        limiter.acquire()
+        limiter.release(overloaded=True)
+    assert limiter.limit == 8
+    assert limiter.snapshot()["overloads"] == 3
+
+
+def test_limiter_ignores_other_failures():
+    """Check that calls released without latency nor overload leave the limit unchanged."""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=3)
+    limiter.acquire()
+    limiter.release()
+    assert limiter.limit == 3
+    assert limiter.in_flight == 0
+
+
+def test_limiter_queues_calls_above_limit():
+    """Check that acquire() waits while the limit is reached and records the queueing delay."""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+    limiter.acquire()
+    delays = []
+    thread = threading.Thread(target=lambda: delays.append(limiter.acquire()))
+    thread.start()
+    time.sleep(0.05)
+    assert limiter.in_flight == 1
+    limiter.release(latency=0.05)
+    thread.join(timeout=5)
+    assert delays[0] >= 0.04
+    stats = limiter.snapshot()
+    assert stats["requests"] == 2
+    assert stats["queued_requests"] == 1
+    assert stats["max_queueing_delay"] == delays[0]
+    assert stats["limit"] == 1
+
+
+def test_limiter_times_out_waiting_for_a_call_slot():
+    """Check that acquire() raises TimeoutError when no call slot frees up within timeout."""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+    assert limiter.acquire(timeout=0) >= 0
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        limiter.acquire(timeout=0.05)
+    assert time.perf_counter() - start >= 0.04
+    assert limiter.in_flight == 1
+    stats = limiter.snapshot()
+    assert stats["requests"] == 1
+    assert stats["timeouts"] == 1
+
+
+def test_limiter_rejects_invalid_arguments():
+    """Check that the limiter rejects invalid arguments."""
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimiter(initial_limit=0)
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimiter(initial_limit=10, max_limit=5)
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimiter(backoff_ratio=1)
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimiter(latency_tolerance=1)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs - Tests."""
+import math
+import threading
+
+import pytest
+
+from netboxlabs.diode.sdk.metrics import ClientMetrics, Histogram, PrometheusExporter
+
+
+def test_histogram_counts_values_cumulatively():
+    """Check that Histogram.snapshot() returns cumulative counts by upper bound, sum and count."""
+    histogram = Histogram([1.0, 0.1])
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    assert histogram.snapshot() == {"buckets": {0.1: 2, 1.0: 3, math.inf: 4}, "sum": 2.65, "count": 4}
+
+
+def test_histogram_requires_buckets():
+    """Check that Histogram requires at least one bucket."""
+    with pytest.raises(ValueError):
+        Histogram([])
+
+
+def test_metrics_snapshot():
+    """Check that ClientMetrics.snapshot() returns the recorded builds, calls, errors and retries."""
+    metrics = ClientMetrics(latency_buckets=[0.1, 1.0], size_buckets=[1024])
+    metrics.record_build(0.01, ["site", "device", "device"])
+    metrics.call_started()
+    metrics.call_started()
+    assert metrics.in_flight == 2
+    metrics.call_finished(0.05, 100)
+    metrics.call_finished(0.5, 2048, "UNAVAILABLE")
+    metrics.record_retry()
+    snapshot = metrics.snapshot()
+    assert snapshot["calls"] == 2
+    assert snapshot["in_flight"] == 0
+    assert snapshot["retries"] == 1
+    assert snapshot["errors"] == {"UNAVAILABLE": 1}
+    assert snapshot["entities"] == {"site": 1, "device": 2}
+    assert snapshot["build_seconds"]["count"] == 1
+    assert snapshot["call_seconds"]["buckets"] == {0.1: 1, 1.0: 2, math.inf: 2}
+    assert snapshot["request_bytes"]["buckets"] == {1024: 1, math.inf: 2}
+
+
+def test_metrics_are_thread_safe():
+    """Check that ClientMetrics counts calls recorded from several threads."""
+    metrics = ClientMetrics()
+
+    def record():
+        for _ in range(1000):
+            metrics.call_started()
+            metrics.call_finished(0.001, 10)
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    snapshot = metrics.snapshot()
+    assert snapshot["calls"] == 4000
+    assert snapshot["call_seconds"]["count"] == 4000
+    assert snapshot["in_flight"] == 0
+
+
+def test_prometheus_exporter():
+    """Check that PrometheusExporter formats a snapshot in the Prometheus text format."""
+    metrics = ClientMetrics(latency_buckets=[0.1], size_buckets=[1024])
+    metrics.record_build(0.01, ["site"])
+    metrics.call_started()
+    metrics.call_finished(0.05, 100, "UNAVAILABLE")
+    text = metrics.export(PrometheusExporter(labels={"app": 'my "producer"'}))
+    lines = text.splitlines()
+    assert "# TYPE diode_sdk_calls_total counter" in lines
+    assert 'diode_sdk_calls_total{app="my \\"producer\\""} 1' in lines
+    assert 'diode_sdk_errors_total{app="my \\"producer\\"",code="UNAVAILABLE"} 1' in lines
+    assert 'diode_sdk_entities_total{app="my \\"producer\\"",type="site"} 1' in lines
+    assert "# TYPE diode_sdk_call_seconds histogram" in lines
+    assert 'diode_sdk_call_seconds_bucket{app="my \\"producer\\"",le="0.1"} 1' in lines
+    assert 'diode_sdk_call_seconds_bucket{app="my \\"producer\\"",le="+Inf"} 1' in lines
+    assert 'diode_sdk_request_bytes_sum{app="my \\"producer\\""} 100' in lines
+    assert text.endswith("\n")
+
+
+def test_prometheus_exporter_without_labels():
+    """Check that PrometheusExporter formats samples without labels when none are set."""
+    text = ClientMetrics().export(PrometheusExporter(prefix="producer"))
+    assert "producer_retries_total 0" in text.splitlines()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs - Tests."""
+import functools
+
+import pytest
+
+from netboxlabs.diode.sdk.client import DiodeClient
+from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+from netboxlabs.diode.sdk.exceptions import DiodeBuildError
+from netboxlabs.diode.sdk.ingester import Entity, Interface
+from netboxlabs.diode.sdk.parallel import ParallelBuilder
+from netboxlabs.diode.sdk.wire import serialize_entities
+
+_build_interfaces = functools.partial(Interface.from_records, as_entities=True)
+
+
+def _build_sites(names: list[str]) -> list[ingester_pb2.Entity | None]:
+    """Build site entities, failing on the name "fail"."""
+    if "fail" in names:
+        raise RuntimeError("invalid site")
+    return [Entity(site=name) for name in names] + [None]
+
+
+def _chunks(count: int, size: int) -> list[list[dict]]:
+    return [
+        [{"name": f"eth{i}", "device": f"Device {n}", "site": "Site A", "mtu": 1500} for i in range(size)]
+        for n in range(count)
+    ]
+
+
+def test_parallel_builder_serializes_chunks_in_order():
+    """Check that ParallelBuilder.map() yields each chunk with its serialized entities, in chunk order."""
+    chunks = _chunks(12, 10)
+    with ParallelBuilder(_build_interfaces, max_workers=2, max_pending=3) as builder:
+        assert builder.max_workers == 2
+        results = list(builder.map(iter(chunks)))
+    assert [chunk for chunk, _ in results] == chunks
+    assert [data for _, data in results] == [
+        serialize_entities(Interface.from_records(chunk, as_entities=True)) for chunk in chunks
+    ]
+
+
+def test_parallel_builder_ingests_chunks(ingest_server):
+    """Check that ParallelBuilder.ingest() sends the entities of each chunk and yields its response in order."""
+    ingest_server.handler = lambda request, context: ingester_pb2.IngestResponse(
+        errors=[request.entities[0].site.name]
+    )
+    chunks = [[f"Site {n}.{i}" for i in range(3)] for n in range(5)]
+    with DiodeClient(
+        target=ingest_server.target, app_name="my-producer", app_version="0.0.1", api_key="abcde"
+    ) as client, ParallelBuilder(_build_sites, max_workers=2) as builder:
+        results = list(builder.ingest(client, chunks, stream="latest"))
+    assert [(chunk, list(response.errors)) for chunk, response in results] == [(chunk, chunk[:1]) for chunk in chunks]
+    assert [[e.site.name for e in request.entities] for request in ingest_server.requests] == chunks
+    assert all(request.stream == "latest" for request in ingest_server.requests)
+
+
+def test_parallel_builder_attributes_build_errors_to_chunks():
+    """Check that ParallelBuilder.map() raises the error building a chunk once it reaches the chunk."""
+    chunks = [["Site A"], ["Site B"], ["fail"], ["Site C"]]
+    with ParallelBuilder(_build_sites, max_workers=2) as builder:
+        results = builder.map(chunks)
+        assert next(results)[0] == ["Site A"]
+        assert next(results)[0] == ["Site B"]
+        with pytest.raises(DiodeBuildError, match="building chunk 2 failed") as exc_info:
+            next(results)
+    assert exc_info.value.index == 2
+    assert exc_info.value.chunk == ["fail"]
+    assert isinstance(exc_info.value.__cause__, RuntimeError)
+    assert str(exc_info.value.__cause__) == "invalid site"
+
+
+def test_parallel_builder_rejects_invalid_sizes():
+    """Check that ParallelBuilder rejects invalid max_workers and max_pending."""
+    with pytest.raises(ValueError, match="max_workers"):
+        ParallelBuilder(_build_sites, max_workers=0)
+    with pytest.raises(ValueError, match="max_pending"):
+        ParallelBuilder(_build_sites, max_pending=0)
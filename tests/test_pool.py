@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs - Tests."""
+import threading
+from unittest import mock
+
+import pytest
+
+from netboxlabs.diode.sdk.pool import EWMA, LEAST_OUTSTANDING, ROUND_ROBIN, ChannelPool
+
+
+def _pool(size, policy=ROUND_ROBIN):
+    """Build a pool of mock channels and stubs."""
+    return ChannelPool([(mock.Mock(), mock.Mock()) for _ in range(size)], policy=policy)
+
+
+def test_pool_rejects_empty_channels():
+    """Check that ChannelPool requires at least one channel."""
+    with pytest.raises(ValueError):
+        ChannelPool([])
+
+
+def test_pool_rejects_unknown_policy():
+    """Check that ChannelPool rejects unknown policies."""
+    with pytest.raises(ValueError):
+        _pool(2, policy="random")
+
+
+def test_pool_round_robin_selects_channels_in_order():
+    """Check that the round-robin policy cycles through all channels."""
+    pool = _pool(3)
+    stubs = [pooled.stub for pooled in pool.channels]
+    selected = []
+    for _ in range(6):
+        pooled = pool.acquire()
+        selected.append(pooled.stub)
+        pool.release(pooled)
+    assert selected == stubs * 2
+
+
+def test_pool_least_outstanding_selects_idle_channel():
+    """Check that the least-outstanding policy selects the channel with the fewest outstanding RPCs."""
+    pool = _pool(3, policy=LEAST_OUTSTANDING)
+    first = pool.acquire()
+    second = pool.acquire()
+    third = pool.acquire()
+    assert len({id(first), id(second), id(third)}) == 3
+
+    pool.release(second)
+    assert pool.acquire() is second
+    assert [pooled.outstanding for pooled in pool.channels] == [1, 1, 1]
+
+
+def test_pool_release_decrements_outstanding_on_error():
+    """Check that releasing a channel after a failed RPC decrements its outstanding RPCs."""
+    pool = _pool(2)
+    pool.release(pool.acquire(), failed=True)
+    assert [pooled.outstanding for pooled in pool.channels] == [0, 0]
+
+
+def test_pool_is_thread_safe():
+    """Check that concurrent acquire and release keep outstanding counts consistent."""
+    pool = _pool(4, policy=LEAST_OUTSTANDING)
+
+    def worker():
+        for _ in range(1000):
+            pool.release(pool.acquire())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [pooled.outstanding for pooled in pool.channels] == [0, 0, 0, 0]
+
+
+def test_pool_close_closes_all_channels():
+    """Check that ChannelPool.close() closes every channel."""
+    pool = _pool(3)
+    pool.close()
+    for pooled in pool.channels:
+        pooled.channel.close.assert_called_once()
+
+
+def _target_pool(policy=ROUND_ROBIN, **kwargs):
+    """Build a pool of mock channels connected to targets a and b."""
+    return ChannelPool(
+        [(mock.Mock(), mock.Mock()) for _ in range(2)], policy=policy, targets=["a", "b"], **kwargs
+    )
+
+
+def test_pool_rejects_mismatched_targets():
+    """Check that ChannelPool requires a target for each channel."""
+    with pytest.raises(ValueError):
+        ChannelPool([(mock.Mock(), mock.Mock())], targets=["a", "b"])
+
+
+def test_pool_ejects_failing_target_and_readmits_after_backoff():
+    """Check that a target failing max_failures RPCs in a row is not selected until its backoff elapsed."""
+    pool = _target_pool(max_failures=2, ejection_backoff=10)
+    a, b = pool.channels
+    with mock.patch("time.monotonic", return_value=100.0):
+        for _ in range(2):
+            a.outstanding += 1
+            pool.release(a, failed=True)
+        assert [pool.acquire() for _ in range(4)] == [b] * 4
+        assert pool.target_stats()["a"] == {
+            "healthy": False,
+            "requests": 2,
+            "failures": 2,
+            "latency": None,
+            "ejections": 1,
+        }
+    with mock.patch("time.monotonic", return_value=110.0):
+        assert a in {pool.acquire(), pool.acquire()}
+        # A re-admitted target is ejected again on its next failure, for twice as long
+        pool.release(a, failed=True)
+        assert [pool.acquire() for _ in range(2)] == [b] * 2
+    with mock.patch("time.monotonic", return_value=129.0):
+        assert [pool.acquire() for _ in range(2)] == [b] * 2
+    with mock.patch("time.monotonic", return_value=130.0):
+        assert a in {pool.acquire(), pool.acquire()}
+        pool.release(a, latency=0.01)
+        assert pool.target_stats()["a"]["healthy"]
+
+
+@pytest.mark.parametrize("policy", [ROUND_ROBIN, LEAST_OUTSTANDING, EWMA])
+def test_pool_does_not_select_excluded_targets(policy):
+    """Check that ChannelPool.acquire() skips the channels of excluded targets, unless all targets are excluded."""
+    pool = ChannelPool(
+        [(mock.Mock(), mock.Mock()) for _ in range(4)], policy=policy, targets=["a", "a", "b", "b"]
+    )
+    assert {pool.acquire(exclude={"a"}).target.target for _ in range(8)} == {"b"}
+    assert pool.acquire(exclude={"a", "b"}) in pool.channels
+
+
+def test_pool_selects_among_all_channels_when_all_targets_are_ejected():
+    """Check that channels are still selected when all targets are ejected."""
+    pool = _target_pool(max_failures=1)
+    for pooled in pool.channels:
+        pooled.outstanding += 1
+        pool.release(pooled, failed=True)
+    assert not any(stats["healthy"] for stats in pool.target_stats().values())
+    assert {id(pool.acquire()), id(pool.acquire())} == {id(pooled) for pooled in pool.channels}
+
+
+def test_pool_ewma_prefers_lowest_latency_target():
+    """Check that the ewma policy selects the target with the lowest latency weighted by outstanding RPCs."""
+    pool = _target_pool(policy=EWMA, latency_smoothing=1.0)
+    a, b = pool.channels
+    for pooled, latency in ((a, 0.01), (b, 0.045)):
+        pooled.outstanding += 1
+        pool.release(pooled, latency=latency)
+    assert pool.target_stats()["b"]["latency"] == 0.045
+    assert [pool.acquire() for _ in range(4)] == [a] * 4
+    assert pool.acquire() is b
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs - Tests."""
+from unittest import mock
+
+from netboxlabs.diode.sdk.registry import ChannelRegistry
+
+
+def test_registry_shares_and_closes_channels_once_unreferenced():
+    """Check that a registered channel is shared and closed once its last reference is released."""
+    registry = ChannelRegistry()
+    factory = mock.Mock()
+    first = registry.acquire(("a", False), factory)
+    second = registry.acquire(("a", False), factory)
+    assert first is second
+    factory.assert_called_once()
+    assert registry.references(("a", False)) == 2
+
+    registry.release(("a", False))
+    first.close.assert_not_called()
+    registry.release(("a", False))
+    first.close.assert_called_once()
+    assert len(registry) == 0
+    registry.release(("a", False))
+
+
+def test_registry_keeps_channels_apart_by_key():
+    """Check that channels registered with different keys are distinct."""
+    registry = ChannelRegistry()
+    assert registry.acquire(("a", False), mock.Mock) is not registry.acquire(("a", True), mock.Mock)
+    assert len(registry) == 2
+
+
+def test_registry_creates_credentials_once():
+    """Check that the registry creates TLS credentials on first use only."""
+    registry = ChannelRegistry()
+    factory = mock.Mock()
+    assert registry.credentials(factory) is registry.credentials(factory)
+    factory.assert_called_once()
+
+
+def test_default_registry_is_process_wide():
+    """Check that default() always returns the same registry."""
+    assert ChannelRegistry.default() is ChannelRegistry.default()
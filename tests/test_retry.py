@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs - Tests."""
+import asyncio
+from unittest import mock
+
+import grpc
+import pytest
+
+from netboxlabs.diode.sdk.retry import DEFAULT_RETRIABLE_STATUS_CODES, RetryPolicy
+
+
+def _rpc_error(code):
+    """Build an RpcError with the given status code."""
+    err = grpc.RpcError()
+    err.code = lambda: code
+    err.details = lambda: str(code)
+    return err
+
+
+def test_retry_policy_default_retriable_status_codes():
+    """Check the default retriable status codes."""
+    assert RetryPolicy().retriable_status_codes == DEFAULT_RETRIABLE_STATUS_CODES
+    assert DEFAULT_RETRIABLE_STATUS_CODES == {
+        grpc.StatusCode.UNAVAILABLE,
+        grpc.StatusCode.RESOURCE_EXHAUSTED,
+        grpc.StatusCode.DEADLINE_EXCEEDED,
+    }
+
+
+def test_retry_policy_rejects_invalid_values():
+    """Check that RetryPolicy rejects invalid values."""
+    with pytest.raises(ValueError):
+        RetryPolicy(max_attempts=0)
+    with pytest.raises(ValueError):
+        RetryPolicy(backoff_multiplier=0.5)
+    with pytest.raises(ValueError):
+        RetryPolicy(attempt_timeout=0)
+    with pytest.raises(ValueError):
+        RetryPolicy(timeout=-1)
+
+
+def test_retry_policy_backoff_uses_full_jitter_with_exponential_ceiling():
+    """Check that RetryPolicy.backoff() draws between 0 and the capped exponential ceiling."""
+    policy = RetryPolicy(initial_backoff=0.1, max_backoff=1.0, backoff_multiplier=2.0)
+    with mock.patch("random.uniform", side_effect=lambda low, high: high) as mock_uniform:
+        assert [round(policy.backoff(attempt), 6) for attempt in range(1, 7)] == [0.1, 0.2, 0.4, 0.8, 1.0, 1.0]
+        assert all(call.args[0] == 0 for call in mock_uniform.call_args_list)
+    assert all(0 <= policy.backoff(3) <= 0.4 for _ in range(100))
+
+
+def test_retry_policy_call_retries_retriable_errors():
+    """Check that RetryPolicy.call() retries retriable errors until success."""
+    policy = RetryPolicy(max_attempts=3, initial_backoff=0)
+    fn = mock.Mock(side_effect=[_rpc_error(grpc.StatusCode.UNAVAILABLE), _rpc_error(grpc.StatusCode.RESOURCE_EXHAUSTED), "ok"])
+    assert policy.call(fn) == "ok"
+    assert fn.call_count == 3
+
+
+def test_retry_policy_call_stops_after_max_attempts():
+    """Check that RetryPolicy.call() raises the last error after max_attempts."""
+    policy = RetryPolicy(max_attempts=2, initial_backoff=0)
+    fn = mock.Mock(side_effect=_rpc_error(grpc.StatusCode.UNAVAILABLE))
+    with pytest.raises(grpc.RpcError):
+        policy.call(fn)
+    assert fn.call_count == 2
+
+
+def test_retry_policy_call_does_not_retry_non_retriable_errors():
+    """Check that RetryPolicy.call() does not retry non-retriable errors."""
+    policy = RetryPolicy(initial_backoff=0)
+    fn = mock.Mock(side_effect=_rpc_error(grpc.StatusCode.INVALID_ARGUMENT))
+    with pytest.raises(grpc.RpcError):
+        policy.call(fn)
+    assert fn.call_count == 1
+
+
+def test_retry_policy_call_passes_attempt_timeout():
+    """Check that RetryPolicy.call() passes the attempt timeout, bounded by the overall deadline."""
+    fn = mock.Mock(return_value="ok")
+    RetryPolicy(attempt_timeout=2.0).call(fn)
+    assert fn.call_args.args[0] == 2.0
+
+    RetryPolicy(attempt_timeout=2.0, timeout=1.0).call(fn)
+    assert 0 < fn.call_args.args[0] <= 1.0
+
+    RetryPolicy().call(fn)
+    assert fn.call_args.args[0] is None
+
+
+def test_retry_policy_does_not_retry_past_overall_deadline():
+    """Check that RetryPolicy.retry_delay() gives up when the backoff would pass the deadline."""
+    policy = RetryPolicy(initial_backoff=10, max_backoff=10, timeout=1)
+    with mock.patch("random.uniform", return_value=5):
+        assert policy.retry_delay(_rpc_error(grpc.StatusCode.UNAVAILABLE), 1, policy.deadline()) is None
+        assert policy.retry_delay(_rpc_error(grpc.StatusCode.UNAVAILABLE), 1, None) == 5
+
+
+def test_retry_policy_call_async_retries_retriable_errors():
+    """Check that RetryPolicy.call_async() retries retriable errors until success."""
+    policy = RetryPolicy(max_attempts=3, initial_backoff=0)
+    outcomes = [_rpc_error(grpc.StatusCode.UNAVAILABLE), "ok"]
+
+    async def fn(timeout):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert asyncio.run(policy.call_async(fn)) == "ok"
+    assert outcomes == []
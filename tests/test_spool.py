@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs - Tests."""
+import os
+from unittest import mock
+
+import pytest
+
+from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+from netboxlabs.diode.sdk.ingester import Entity
+from netboxlabs.diode.sdk.spool import Spool, SpoolRecord, _encode_varint, _read_records
+
+
+def _request(request_id, entities=1):
+    return ingester_pb2.IngestRequest(id=request_id, entities=[Entity(site=f"Site {i}") for i in range(entities)])
+
+
+def _segments(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".seg"))
+
+
+def test_spool_returns_pending_requests_in_order(tmp_path):
+    """Check that the spool returns appended requests in order."""
+    spool = Spool(tmp_path)
+    records = [spool.append(_request(f"req-{i}")) for i in range(3)]
+    assert records == [SpoolRecord(0, 0), SpoolRecord(0, 1), SpoolRecord(0, 2)]
+    assert [(record, request.id) for record, request in spool.pending()] == list(zip(records, ["req-0", "req-1", "req-2"]))
+    assert len(spool) == 3
+
+
+def test_spool_ack_removes_requests_and_deletes_segment(tmp_path):
+    """Check that acknowledged requests are not pending anymore and fully acknowledged segments are deleted."""
+    spool = Spool(tmp_path)
+    first, second = spool.append(_request("req-0")), spool.append(_request("req-1"))
+    spool.ack(first)
+    assert [request.id for _, request in spool.pending()] == ["req-1"]
+    spool.ack(second)
+    assert len(spool) == 0
+    assert os.listdir(tmp_path) == []
+
+
+def test_spool_reloads_pending_requests_and_acks(tmp_path):
+    """Check that a new spool on the same directory returns the requests left pending."""
+    spool = Spool(tmp_path)
+    records = [spool.append(_request(f"req-{i}")) for i in range(3)]
+    spool.ack(records[1])
+    spool.close()
+
+    reloaded = Spool(tmp_path)
+    assert [request.id for _, request in reloaded.pending()] == ["req-0", "req-2"]
+    assert reloaded.append(_request("req-3")).segment == 1
+
+
+def test_spool_ignores_truncated_record(tmp_path):
+    """Check that a record truncated by a crash is ignored."""
+    spool = Spool(tmp_path)
+    spool.append(_request("req-0"))
+    spool.close()
+    data = _request("req-1").SerializeToString()
+    with open(tmp_path / _segments(tmp_path)[0], "ab") as f:
+        f.write(_encode_varint(len(data)) + data[:-1])
+
+    assert [request.id for _, request in Spool(tmp_path).pending()] == ["req-0"]
+
+
+def test_read_records_reads_length_delimited_records():
+    """Check that records are read back from their length-delimited encoding."""
+    records = [b"", b"a", b"b" * 300]
+    assert list(_read_records(b"".join(_encode_varint(len(r)) + r for r in records))) == records
+
+
+def test_spool_rotates_segments(tmp_path):
+    """Check that a new segment is started once a segment reaches max_segment_bytes."""
+    size = len(_request("req-0").SerializeToString()) + 1
+    spool = Spool(tmp_path, max_segment_bytes=2 * size)
+    records = [spool.append(_request(f"req-{i}")) for i in range(5)]
+    assert [record.segment for record in records] == [0, 0, 1, 1, 2]
+    assert len(_segments(tmp_path)) == 3
+    assert [request.id for _, request in spool.pending()] == [f"req-{i}" for i in range(5)]
+
+
+def test_spool_drops_oldest_segments_above_max_bytes(tmp_path):
+    """Check that the oldest segments are dropped when the spool exceeds max_bytes."""
+    size = len(_request("req-0").SerializeToString()) + 1
+    spool = Spool(tmp_path, max_segment_bytes=size, max_bytes=3 * size)
+    for i in range(5):
+        spool.append(_request(f"req-{i}"))
+    assert [request.id for _, request in spool.pending()] == ["req-2", "req-3", "req-4"]
+    assert spool.size == 3 * size
+
+
+def test_spool_drops_segments_older_than_max_age(tmp_path):
+    """Check that segments older than max_age are dropped."""
+    spool = Spool(tmp_path, max_segment_bytes=1, max_age=60)
+    with mock.patch("time.time", return_value=0):
+        spool.append(_request("req-0"))
+    with mock.patch("time.time", return_value=30):
+        spool.append(_request("req-1"))
+    with mock.patch("time.time", return_value=70):
+        spool.append(_request("req-2"))
+    assert [request.id for _, request in spool.pending()] == ["req-1", "req-2"]
+
+
+def test_spool_ignores_acks_of_deleted_segments(tmp_path):
+    """Check that segment numbers are not reused, so that a late ack of a deleted segment leaves new requests pending."""
+    spool = Spool(tmp_path)
+    first = spool.append(_request("req-0"))
+    spool.ack(first)
+    second = spool.append(_request("req-1"))
+    assert second == SpoolRecord(1, 0)
+    spool.ack(first)
+    assert [request.id for _, request in spool.pending()] == ["req-1"]
+    spool.close()
+    assert Spool(tmp_path).append(_request("req-2")).segment == 2
+
+
+def test_spool_does_not_drop_segments_being_sent(tmp_path):
+    """Check that segments holding requests being sent are not dropped above max_bytes until released."""
+    size = len(_request("req-0").SerializeToString()) + 1
+    spool = Spool(tmp_path, max_segment_bytes=size, max_bytes=2 * size)
+    held = spool.append(_request("req-0"))
+    spool.hold(held)
+    assert spool.is_held(held) and spool.held == 1
+    for i in range(1, 4):
+        spool.append(_request(f"req-{i}"))
+    assert [request.id for _, request in spool.pending()] == ["req-0", "req-3"]
+    spool.release(held)
+    spool.append(_request("req-4"))
+    assert [request.id for _, request in spool.pending()] == ["req-3", "req-4"]
+
+
+def test_spool_appends_held_requests(tmp_path):
+    """Check that Spool.append() marks the request as being sent with hold."""
+    spool = Spool(tmp_path)
+    held = spool.append(_request("req-0"), hold=True)
+    assert spool.is_held(held)
+    assert not spool.is_held(spool.append(_request("req-1")))
+
+
+def test_spool_rejects_invalid_limits(tmp_path):
+    """Check that the spool rejects non-positive size limits."""
+    with pytest.raises(ValueError):
+        Spool(tmp_path, max_segment_bytes=0)
+    with pytest.raises(ValueError):
+        Spool(tmp_path, max_bytes=0)
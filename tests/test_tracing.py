@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs - Tests."""
+import functools
+from unittest import mock
+
+import grpc
+import pytest
+import sentry_sdk
+from sentry_sdk.transport import Transport
+
+from netboxlabs.diode.sdk.client import DiodeClient
+from netboxlabs.diode.sdk.exceptions import DiodeClientError
+from netboxlabs.diode.sdk.ingester import Entity
+from netboxlabs.diode.sdk.tracing import TraceSampler, _span_status
+
+
+class _CapturingTransport(Transport):
+    """Sentry transport keeping envelopes in memory."""
+
+    def __init__(self, options=None):
+        super().__init__(options)
+        self.envelopes = []
+
+    def capture_envelope(self, envelope):
+        self.envelopes.append(envelope)
+
+    def transactions(self):
+        return [item.payload.json for envelope in self.envelopes for item in envelope.items if item.type == "transaction"]
+
+
+@pytest.fixture
+def sentry_transport():
+    """Initialize Sentry with a capturing transport for clients created in the test."""
+    transport = _CapturingTransport()
+    with mock.patch("sentry_sdk.init", functools.partial(sentry_sdk.init, transport=transport)):
+        yield transport
+    sentry_sdk.init()
+
+
+def test_sampler_keeps_failed_and_slow_ingests():
+    """Check that TraceSampler keeps failed and slow ingests and samples the others at sample_rate."""
+    sampler = TraceSampler(sample_rate=0.0, max_traces_per_second=100, latency_threshold=0.5)
+    assert not sampler.sample(0.1)
+    assert sampler.sample(0.1, failed=True)
+    assert sampler.sample(0.5)
+    assert TraceSampler(sample_rate=1.0, max_traces_per_second=100).sample(0.1)
+    assert sampler.snapshot() == {"sampled": 2, "rate_limited": 0}
+
+
+def test_sampler_rate_limits_traces():
+    """Check that TraceSampler keeps at most max_traces_per_second traces in a burst."""
+    sampler = TraceSampler(sample_rate=1.0, max_traces_per_second=2)
+    assert [sampler.sample(0.01, failed=True) for _ in range(4)] == [True, True, False, False]
+    assert sampler.snapshot() == {"sampled": 2, "rate_limited": 2}
+    assert not any(TraceSampler(sample_rate=1.0, max_traces_per_second=0).sample(1.0, failed=True) for _ in range(3))
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"sample_rate": 1.5}, {"max_traces_per_second": -1}, {"latency_threshold": -1}],
+)
+def test_sampler_rejects_invalid_arguments(kwargs):
+    """Check that TraceSampler rejects invalid arguments."""
+    with pytest.raises(ValueError):
+        TraceSampler(**kwargs)
+
+
+def test_span_status():
+    """Check that _span_status maps errors to Sentry span statuses."""
+    assert _span_status(None) == "ok"
+    assert _span_status(ValueError()) == "unknown_error"
+
+    class _Error(grpc.RpcError):
+        def __init__(self, code):
+            self._code = code
+
+        def code(self):
+            return self._code
+
+    assert _span_status(_Error(grpc.StatusCode.UNAVAILABLE)) == "unavailable"
+    assert _span_status(_Error(grpc.StatusCode.INTERNAL)) == "internal_error"
+
+
+def test_client_does_not_trace_without_sentry():
+    """Check that DiodeClient does not trace ingests when Sentry is not configured."""
+    client = DiodeClient(target="grpc://localhost:8081", app_name="my-producer", app_version="0.0.1", api_key="abcde")
+    assert client.trace_sampler is None
+
+
+def test_client_traces_sampled_ingests(ingest_server, sentry_transport):
+    """Check that DiodeClient sends sampled ingests to Sentry with build, RPC and serialization spans."""
+    with DiodeClient(
+        target=ingest_server.target,
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        sentry_dsn="https://user@password.mock.dsn/123456",
+        sentry_trace_sampler=TraceSampler(sample_rate=1.0, max_traces_per_second=10),
+    ) as client:
+        client.ingest([Entity(site=f"Site {i}") for i in range(10)], max_request_size=200)
+    sentry_sdk.flush()
+    (transaction,) = sentry_transport.transactions()
+    assert transaction["transaction"] == "DiodeClient.ingest"
+    assert transaction["contexts"]["trace"]["op"] == "diode.ingest"
+    assert transaction["contexts"]["trace"]["status"] == "ok"
+    ops = [span["op"] for span in transaction["spans"]]
+    assert ops.count("diode.build") == ops.count("diode.rpc") == len(ingest_server.requests) > 1
+    assert ops.count("diode.serialize") == len(ingest_server.requests)
+    spans = {span["span_id"]: span for span in transaction["spans"]}
+    for span in transaction["spans"]:
+        if span["op"] == "diode.serialize":
+            assert spans[span["parent_span_id"]]["op"] == "diode.rpc"
+        assert transaction["start_timestamp"] <= span["start_timestamp"] <= span["timestamp"] <= transaction["timestamp"]
+
+
+def test_client_traces_failed_ingests(sentry_transport):
+    """Check that DiodeClient sends failed ingests to Sentry even when other ingests are not sampled."""
+    with DiodeClient(
+        target="grpc://127.0.0.1:1",
+        app_name="my-producer",
+        app_version="0.0.1",
+        api_key="abcde",
+        sentry_dsn="https://user@password.mock.dsn/123456",
+        sentry_traces_sample_rate=0.0,
+        sentry_trace_sampler=TraceSampler(sample_rate=0.0),
+    ) as client:
+        with pytest.raises(DiodeClientError):
+            client.ingest([Entity(site="Site A")])
+    sentry_sdk.flush()
+    (transaction,) = sentry_transport.transactions()
+    assert transaction["contexts"]["trace"]["status"] == "unavailable"
+    assert [span["status"] for span in transaction["spans"] if span["op"] == "diode.rpc"] == ["unavailable"]
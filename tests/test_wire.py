@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# Copyright 2024 NetBox Labs Inc
+"""NetBox Labs - Tests."""
+import uuid
+
+import pytest
+
+from netboxlabs.diode.sdk.diode.v1 import ingester_pb2
+from netboxlabs.diode.sdk.ingester import Device, Entity, Interface
+from netboxlabs.diode.sdk.wire import (
+    _entity_frames,
+    _entity_types,
+    _request_id,
+    _SerializedRequest,
+    serialize_entities,
+)
+
+_ENTITIES = [Entity(site="Site A"), Entity(device=Device(name="dev", site="Site A")), Entity(interface=Interface(name="eth0"))]
+
+
+def test_serialize_entities_serializes_entities_field():
+    """Check that serialize_entities() serializes the entities field of an ingest request, skipping None."""
+    data = serialize_entities([_ENTITIES[0], None, *_ENTITIES[1:]])
+    assert ingester_pb2.IngestRequest.FromString(data) == ingester_pb2.IngestRequest(entities=_ENTITIES)
+    assert serialize_entities([]) == b""
+
+
+def test_entity_frames_checks_and_splits_serialized_entities():
+    """Check that _entity_frames() returns serialized entities whole, or split into one frame per entity."""
+    data = serialize_entities(_ENTITIES[:1]) + bytearray(serialize_entities(_ENTITIES[1:]))
+    (frame,) = _entity_frames(data)
+    assert bytes(frame) == data
+    frames = _entity_frames(memoryview(data), split=True)
+    assert [bytes(frame) for frame in frames] == [serialize_entities([entity]) for entity in _ENTITIES]
+    assert _entity_frames(b"") == []
+
+
+def test_entity_frames_frames_serialized_entity_messages():
+    """Check that _entity_frames() frames each serialized Entity message of an iterable."""
+    frames = _entity_frames(entity.SerializeToString() for entity in _ENTITIES)
+    assert b"".join(frames) == serialize_entities(_ENTITIES)
+
+
+@pytest.mark.parametrize(
+    "data,message",
+    [
+        (b"\x0a\x00", "should only hold entities"),
+        (b"\x12\x05abc", "truncated entity"),
+        (b"\x12\x80", "truncated varint"),
+    ],
+)
+def test_entity_frames_rejects_malformed_serialized_entities(data, message):
+    """Check that _entity_frames() raises ValueError for serialized entities that are not entity frames."""
+    with pytest.raises(ValueError, match=message):
+        _entity_frames(data)
+    with pytest.raises(ValueError, match=message):
+        _entity_frames(data, split=True)
+
+
+def test_entity_types_reads_entity_types_from_frames():
+    """Check that _entity_types() yields the type of each entity of the frames."""
+    frames = [serialize_entities(_ENTITIES[:2]), serialize_entities(_ENTITIES[2:] + [ingester_pb2.Entity()])]
+    assert list(_entity_types(frames)) == ["site", "device", "interface"]
+
+
+@pytest.mark.parametrize("stream", [None, "", "latest"])
+def test_serialized_request_serializes_as_ingest_request(stream):
+    """Check that _SerializedRequest serializes to the same bytes as the equivalent IngestRequest."""
+    trailer = ingester_pb2.IngestRequest(
+        producer_app_name="my-producer", producer_app_version="0.0.1", sdk_name="sdk", sdk_version="1.0"
+    )
+    request = _SerializedRequest(stream, _entity_frames(serialize_entities(_ENTITIES)), trailer, "abc")
+    expected = ingester_pb2.IngestRequest(stream=stream, entities=_ENTITIES, id="abc")
+    expected.MergeFrom(trailer)
+    assert request.SerializeToString() == expected.SerializeToString()
+    assert request.ByteSize() == expected.ByteSize()
+    assert request.id == "abc"
+    assert request.stream == (stream or "")
+
+
+def test_serialized_request_derives_request_id_from_content():
+    """Check that _SerializedRequest derives its id from the serialization of the request without id."""
+    namespace = uuid.uuid4()
+    trailer = ingester_pb2.IngestRequest(sdk_name="sdk")
+    request = _SerializedRequest("latest", [serialize_entities(_ENTITIES)], trailer, lambda chunks: _request_id(namespace, chunks))
+    expected = ingester_pb2.IngestRequest(stream="latest", entities=_ENTITIES, sdk_name="sdk")
+    assert request.id == _request_id(namespace, [expected.SerializeToString(deterministic=True)])
+    assert uuid.UUID(request.id).version == 5